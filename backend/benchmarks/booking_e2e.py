@@ -0,0 +1,160 @@
+"""
+Réservation et lecture du carnet de bout en bout contre le faux site local
+(benchmarks/fake_tennis_site.py), avec le temps passé dans chaque étape.
+
+    cd backend && python -m benchmarks.booking_e2e
+    cd backend && python -m benchmarks.booking_e2e --iterations 10 --latency-ms 150 --latency search=800
+    cd backend && python -m benchmarks.booking_e2e --fresh-session --scenario booking
+    cd backend && python -m benchmarks.booking_e2e --fresh-session --waits both --latency autocomplete=300
+    cd backend && python -m benchmarks.booking_e2e --fresh-session --scenario booking --form both
+
+Le code exécuté est le vrai : Chrome du driver pool, session_cache, recherche
+HTTP, solveur de captcha. Seul GPT est remplacé par le faux endpoint OpenAI de
+benchmarks/captcha.py, qui lit le captcha du faux site. --fresh-session
+supprime la session enregistrée avant chaque itération : login et recherche
+par le formulaire du navigateur à chaque fois.
+
+Les durées par étape sont celles des spans de modules/tracing.py (p50, p95 et
+total sur toutes les itérations), écrits dans une base SQLite temporaire.
+--waits both exécute les scénarios avec les anciennes pauses fixes puis avec
+les attentes rapides de modules/fast_wait.py ; --form both compare le
+formulaire de recherche rempli par script et au clavier (le formulaire ne sert
+que sans session enregistrée, d'où --fresh-session). Chaque combinaison est
+mesurée sur une base à part, puis comparée aux autres (p50 de bout en bout).
+"""
+import argparse
+import math
+import os
+import tempfile
+import time
+from datetime import date, timedelta
+from benchmarks.fake_tennis_site import add_site_arguments, site_from_arguments
+
+SCENARIOS = ('booking', 'remaining')
+
+
+def percentile(sorted_values, q):
+    return sorted_values[max(0, math.ceil(q * len(sorted_values)) - 1)]
+
+
+def summary(durations):
+    durations = sorted(durations)
+    return (f"p50 {percentile(durations, 0.5) * 1000:8.0f} ms | p95 {percentile(durations, 0.95) * 1000:8.0f} ms | "
+            f"total {sum(durations):7.2f} s")
+
+
+def print_steps(spans):
+    """Une ligne par étape tracée, les plus coûteuses d'abord."""
+    durations = {}
+    for pipeline, step, duration_ms in spans:
+        durations.setdefault((pipeline, step), []).append(duration_ms / 1000)
+    for (pipeline, step), values in sorted(durations.items(), key=lambda item: -sum(item[1])):
+        print(f"  {pipeline:<16} {step:<40} x{len(values):<4} {summary(values)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_site_arguments(parser)
+    parser.add_argument('--scenario', choices=SCENARIOS + ('all',), default='all')
+    parser.add_argument('--iterations', type=int, default=3)
+    parser.add_argument('--fresh-session', action='store_true',
+                        help="supprime la session enregistrée avant chaque itération")
+    parser.add_argument('--date', default=(date.today() + timedelta(days=2)).isoformat())
+    parser.add_argument('--start-time', type=int, default=18)
+    parser.add_argument('--end-time', type=int, default=20)
+    parser.add_argument('--court-type', default='indoor')
+    parser.add_argument('--mock-latency-ms', type=float, default=1500)
+    parser.add_argument('--mock-accuracy', type=float, default=1.0)
+    parser.add_argument('--waits', choices=['fast', 'legacy', 'both'], default='fast',
+                        help="attentes rapides, anciennes pauses fixes, ou les deux pour comparer")
+    parser.add_argument('--form', choices=['script', 'keys', 'both'], default='script',
+                        help="formulaire de recherche rempli par script, au clavier, ou les deux pour comparer")
+    args = parser.parse_args()
+
+    scenarios = SCENARIOS if args.scenario == 'all' else (args.scenario,)
+    os.environ['CAPTCHA_SAMPLES'] = '0'
+
+    with site_from_arguments(args) as site:
+        os.environ.update(site.env())
+        # Les modules lisent leur configuration (site_urls, captcha_samples) à
+        # l'import : ils ne sont importés qu'une fois l'environnement en place.
+        import modules.booking_tennis as booking_tennis_module
+        import modules.database as database
+        import modules.fast_wait as fast_wait
+        import modules.gpt_capcha_model as gpt_capcha_model
+        from benchmarks.captcha import MockOpenAIServer
+        from modules.booking_tennis import booking_tennis
+        from modules.driver_pool import driver_pool
+        from modules.get_time_remaining import get_remaining_time
+
+        def run_scenarios(mode, waits, form):
+            # Une base par combinaison : les spans de chacune restent séparés.
+            fast_wait.FAST_WAITS = waits == 'fast'
+            booking_tennis_module.SEARCH_FORM_MODE = form
+            database.DB_NAME = os.path.join(tempfile.mkdtemp(), 'benchmark.db')
+            database.init_db()
+            account = {'id': database.add_account('benchmark@example.com', 'benchmark', True)['id'],
+                       'email': 'benchmark@example.com', 'password': 'benchmark'}
+            pipelines = {
+                'booking': lambda: booking_tennis(args.date, args.start_time, args.end_time, args.court_type, account),
+                'remaining': lambda: get_remaining_time(account),
+            }
+
+            totals = {}
+            for scenario in scenarios:
+                durations = []
+                successes = 0
+                for iteration in range(args.iterations):
+                    if args.fresh_session:
+                        database.delete_account_session(account['id'])
+                    start = time.perf_counter()
+                    result = pipelines[scenario]()
+                    durations.append(time.perf_counter() - start)
+                    successes += result['isSuccess']
+                    print(f"[{mode}] {scenario} #{iteration + 1}: {durations[-1]:.2f} s - {result['message']}")
+                print(f"[{mode}] {scenario:<10} réussites {successes}/{args.iterations} | {summary(durations)}")
+                totals[scenario] = durations
+
+            print(f"\n[{mode}] Étapes :")
+            print_steps(database.get_pipeline_span_durations())
+            print()
+            return totals
+
+        with MockOpenAIServer({}, args.mock_latency_ms, args.mock_accuracy,
+                              default_label=site.captcha_answer) as openai:
+            os.environ.setdefault('OAI_API_KEY', 'mock')
+            os.environ.setdefault('AZURE_GPT_MODEL', 'mock')
+            os.environ['OPENAI_BASE_URL'] = openai.url
+            gpt_capcha_model.warm_up_openai(1)
+            driver_pool.warm_up()
+
+            try:
+                waits_modes = ('legacy', 'fast') if args.waits == 'both' else (args.waits,)
+                form_modes = ('keys', 'script') if args.form == 'both' else (args.form,)
+                results = {}
+                for waits in waits_modes:
+                    for form in form_modes:
+                        mode = f"{waits}/{form}"
+                        results[mode] = run_scenarios(mode, waits, form)
+            finally:
+                driver_pool.shutdown()
+
+        if len(results) > 1:
+            print("Comparaison (p50 de bout en bout, écart à la première combinaison) :")
+            baseline, *others = results
+            for scenario in scenarios:
+                reference = percentile(sorted(results[baseline][scenario]), 0.5)
+                print(f"  {scenario:<10} {baseline:<14} {reference:6.2f} s")
+                for mode in others:
+                    p50 = percentile(sorted(results[mode][scenario]), 0.5)
+                    print(f"  {'':<10} {mode:<14} {p50:6.2f} s ({p50 - reference:+.2f} s)")
+
+        print("\nFaux site (requêtes, latence injectée) :")
+        for route, count in site.requests.most_common():
+            print(f"  {route:<16} x{count:<4} {site.injected_secs[route]:7.2f} s")
+        print(f"Réservations enregistrées : {len(site.bookings)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,221 @@
+"""
+Rejoue les captchas étiquetés contre un solveur et mesure exactitude, latence
+et coût par résolution.
+
+    cd backend && python -m benchmarks.captcha --solver local
+    cd backend && python -m benchmarks.captcha --solver mock --mock-latency-ms 1500
+    cd backend && python -m benchmarks.captcha --solver gpt --limit 50
+    cd backend && python -m benchmarks.captcha --solver hedged-mock --mock-accuracy 0.7
+
+Les captchas viennent de modules/captcha_samples.py (ou de --samples, un
+dossier PNG + labels.json). `mock` appelle solve_capcha_with_gpt contre un
+faux endpoint OpenAI local : le code client est le vrai, sans coût ni réseau.
+`hedged` et `hedged-mock` passent par solve_capcha_hedged (local, GPT en
+parallèle et vote). --raw envoie les captures sans prétraitement, pour
+comparer taille, latence et exactitude avec les images réduites.
+"""
+import argparse
+import base64
+import io
+import json
+import math
+import os
+import random
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from PIL import Image
+import modules.gpt_capcha_model as gpt_capcha_model
+import modules.captcha_solver as captcha_solver
+import modules.database as database
+from modules.captcha_image import preprocess_captcha
+import modules.local_captcha_model as local_captcha_model
+from modules.captcha_samples import iter_labeled_samples
+
+
+def load_dataset(samples_directory, limit):
+    """Retourne [(image en base64, étiquette)]."""
+    if samples_directory:
+        with open(os.path.join(samples_directory, 'labels.json'), encoding='utf-8') as file:
+            labels = json.load(file)
+        dataset = []
+        for filename, label in sorted(labels.items())[:limit]:
+            with open(os.path.join(samples_directory, filename), 'rb') as file:
+                dataset.append(
+                    (base64.b64encode(file.read()).decode(), label))
+        return dataset
+    return [(base64.b64encode(image).decode(), label)
+            for _, image, label in iter_labeled_samples(limit)]
+
+
+class MockOpenAIServer:
+    """
+    Faux /v1/chat/completions : répond l'étiquette du captcha reçu avec la
+    probabilité `accuracy` (sinon une réponse altérée), après une latence
+    log-normale de médiane `latency_ms` et d'écart-type logarithmique `jitter`.
+    Une image inconnue reçoit `default_label`.
+    """
+
+    def __init__(self, labels_by_image, latency_ms, accuracy, jitter=0.5, completion_tokens=12, default_label=''):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(
+                    int(self.headers['Content-Length'])))
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.end_headers()
+                self.wfile.write(json.dumps(server.completion(body)).encode())
+
+            def do_GET(self):
+                # GET /v1/models/<id> : requête de préchauffage de warm_up_openai.
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.end_headers()
+                self.wfile.write(json.dumps({"id": self.path.rsplit('/', 1)[-1], "object": "model",
+                                             "created": 0, "owned_by": "mock"}).encode())
+
+            def log_message(self, format, *args):
+                pass
+
+        self.labels_by_image = labels_by_image
+        self.default_label = default_label
+        self.latency_ms = latency_ms
+        self.accuracy = accuracy
+        self.jitter = jitter
+        self.completion_tokens = completion_tokens
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/v1/"
+
+    @staticmethod
+    def prompt_tokens(body, image_part):
+        """Estimation des tokens facturés : ~4 caractères par token de texte, tuiles de 512 px pour l'image."""
+        text = sum(len(message['content']) if isinstance(message['content'], str) else
+                   sum(len(part.get('text', '')) for part in message['content'])
+                   for message in body['messages'])
+        if image_part.get('detail') == 'low':
+            return text // 4 + 85
+        with Image.open(io.BytesIO(base64.b64decode(image_part['url'].split(',', 1)[1]))) as image:
+            tiles = math.ceil(image.width / 512) * math.ceil(image.height / 512)
+        return text // 4 + 85 + 170 * tiles
+
+    def completion(self, body):
+        image_part = next(part['image_url'] for message in body['messages']
+                          if isinstance(message['content'], list)
+                          for part in message['content'] if part['type'] == 'image_url')
+        label = self.labels_by_image.get(
+            image_part['url'].split(',', 1)[1], self.default_label)
+        prompt_tokens = self.prompt_tokens(body, image_part)
+        if random.random() >= self.accuracy:
+            label = label[::-1] if len(set(label)) > 1 else label + '?'
+        time.sleep(self.latency_ms * random.lognormvariate(0, self.jitter) / 1000)
+        return {
+            "id": "chatcmpl-mock",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get('model', 'mock'),
+            "choices": [{
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": json.dumps({"capcha_value": label})}
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": self.completion_tokens,
+                "total_tokens": prompt_tokens + self.completion_tokens
+            }
+        }
+
+    def __enter__(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def percentile(sorted_values, q):
+    return sorted_values[max(0, math.ceil(q * len(sorted_values)) - 1)]
+
+
+def run(solve, dataset):
+    durations, costs = [], []
+    correct = answered = 0
+    for image, label in dataset:
+        start = time.perf_counter()
+        result = solve(image)
+        durations.append(time.perf_counter() - start)
+        costs.append(result.get('cost_usd') or 0.0)
+        if result.get('success', False):
+            answered += 1
+            correct += result.get('response') == label
+
+    durations.sort()
+    total = len(dataset)
+    print(f"captchas {total} | réponses {answered / total:.1%} | exactitude {correct / total:.1%} "
+          f"(sur les réponses {correct / answered if answered else 0.0:.1%}) | "
+          f"p50 {percentile(durations, 0.5) * 1000:.0f} ms | p95 {percentile(durations, 0.95) * 1000:.0f} ms | "
+          f"coût {sum(costs) / total:.5f} $/captcha")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--solver', choices=['local', 'gpt', 'mock', 'hedged', 'hedged-mock'], default='local')
+    parser.add_argument('--samples', help="dossier PNG + labels.json au lieu de la base des captchas")
+    parser.add_argument('--limit', type=int)
+    parser.add_argument('--min-confidence', type=float, default=local_captcha_model.MIN_CONFIDENCE)
+    parser.add_argument('--mock-latency-ms', type=float, default=1500)
+    parser.add_argument('--mock-accuracy', type=float, default=0.9)
+    parser.add_argument('--mock-jitter', type=float, default=0.5)
+    parser.add_argument('--raw', action='store_true', help="désactive le prétraitement des images")
+    args = parser.parse_args()
+
+    dataset = load_dataset(args.samples, args.limit)
+    if not dataset:
+        parser.error("aucun captcha étiqueté")
+
+    start = time.perf_counter()
+    processed = [preprocess_captcha(image) for image, _ in dataset]
+    preprocess_ms = (time.perf_counter() - start) * 1000 / len(dataset)
+    raw_kb = sum(len(image) for image, _ in dataset) / len(dataset) / 1024
+    processed_kb = sum(len(image) for image in processed) / len(dataset) / 1024
+    print(f"image envoyée {raw_kb:.1f} Ko (brute) -> {processed_kb:.1f} Ko (prétraitée) | "
+          f"prétraitement {preprocess_ms:.1f} ms/captcha")
+    captcha_solver.CAPTCHA_PREPROCESS = not args.raw
+    gpt_capcha_model.CAPTCHA_PREPROCESS = not args.raw
+    # Les résolutions du benchmark ne comptent ni dans slots.db ni dans le budget mensuel.
+    database.DB_NAME = os.path.join(tempfile.mkdtemp(), 'benchmark.db')
+    database.init_db()
+
+    if args.solver == 'local':
+        run(lambda image: local_captcha_model.solve_capcha_locally(
+            image, args.min_confidence), dataset)
+    elif args.solver == 'gpt':
+        run(lambda image: gpt_capcha_model.solve_capcha_with_gpt(
+            image, preprocess=not args.raw), dataset)
+    elif args.solver == 'hedged':
+        run(captcha_solver.solve_capcha_hedged, dataset)
+    else:
+        if args.solver == 'hedged-mock':
+            solve = captcha_solver.solve_capcha_hedged
+        else:
+            def solve(image):
+                return gpt_capcha_model.solve_capcha_with_gpt(image, preprocess=not args.raw)
+        labels_by_image = dict(dataset)
+        labels_by_image.update(
+            (image, label) for image, (_, label) in zip(processed, dataset))
+        with MockOpenAIServer(labels_by_image, args.mock_latency_ms, args.mock_accuracy, args.mock_jitter) as server:
+            os.environ.setdefault('OAI_API_KEY', 'mock')
+            os.environ.setdefault('AZURE_GPT_MODEL', 'mock')
+            # Lu par le client OpenAI partagé, créé au premier appel.
+            os.environ['OPENAI_BASE_URL'] = server.url
+            gpt_capcha_model.warm_up_openai(captcha_solver.CAPTCHA_HEDGE_REQUESTS)
+            run(solve, dataset)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+"""
+Micro-benchmark de modules/database.py : connexion par appel (comportement
+historique), connexion par thread en WAL, et connexion par thread rendue au
+pool en fin de thread. La colonne « thread court » lance un thread par
+opération, comme Flask (threaded=True) pour chaque requête.
+
+    cd backend && python -m benchmarks.database [--operations 2000] [--threads 8]
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+import modules.database as database
+
+INSERT_SLOT = """
+    INSERT INTO slots (id, date, start_time, end_time, type, status)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+SELECT_SLOTS = """
+    SELECT id, date, start_time, end_time, type, status
+    FROM slots WHERE date = ? AND status = ?
+"""
+
+
+def legacy_add_slot(db_name, date):
+    with sqlite3.connect(db_name) as conn:
+        conn.execute(INSERT_SLOT, (str(uuid.uuid4()), date,
+                     10, 11, 'indoor', 'waiting'))
+        conn.commit()
+
+
+def legacy_get_slots(db_name, date):
+    with sqlite3.connect(db_name) as conn:
+        return conn.execute(SELECT_SLOTS, (date, 'waiting')).fetchall()
+
+
+def pooled_add_slot(db_name, date):
+    # Les fonctions du module journalisent les erreurs au lieu de les lever.
+    result = database.add_slot(date, 10, 11, 'indoor', 'waiting')
+    if not result["isSuccess"]:
+        raise sqlite3.OperationalError(result["message"])
+
+
+def pooled_get_slots(db_name, date):
+    result = database.get_slots_by_date_and_status(date, 'waiting')
+    if not result["isSuccess"]:
+        raise sqlite3.OperationalError(result["message"])
+    return result["data"]
+
+
+def _run_threads(func, db_name, operations, threads):
+    errors = []
+
+    def worker(index):
+        for i in range(operations // threads):
+            try:
+                func(db_name, f"2024-01-{(index + i) % 28 + 1:02d}")
+            except sqlite3.OperationalError as e:
+                errors.append(str(e))
+
+    workers = [threading.Thread(target=worker, args=(i,))
+               for i in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return time.perf_counter() - start, len(errors)
+
+
+def _run_short_threads(func, db_name, operations, teardown):
+    """Un thread par opération, terminé par `teardown` (fin de requête Flask)."""
+    errors = []
+
+    def request(i):
+        try:
+            func(db_name, f"2024-01-{i % 28 + 1:02d}")
+        except sqlite3.OperationalError as e:
+            errors.append(str(e))
+        finally:
+            teardown()
+
+    start = time.perf_counter()
+    for i in range(operations):
+        thread = threading.Thread(target=request, args=(i,))
+        thread.start()
+        thread.join()
+    return time.perf_counter() - start, len(errors)
+
+
+def run(label, add, get, db_name, operations, threads, teardown=lambda: None):
+    write_secs, write_errors = _run_threads(add, db_name, operations, 1)
+    read_secs, _ = _run_threads(get, db_name, operations, 1)
+    mixed_secs, mixed_errors = _run_threads(
+        lambda name, date: (add(name, date), get(name, date)), db_name, operations, threads)
+    short_secs, short_errors = _run_short_threads(get, db_name, operations, teardown)
+
+    print(f"{label:<22} écritures {operations / write_secs:8.0f} ops/s | "
+          f"lectures {operations / read_secs:8.0f} ops/s | "
+          f"mixte {threads} threads {2 * operations / mixed_secs:8.0f} ops/s | "
+          f"thread court {operations / short_secs:8.0f} ops/s | "
+          f"verrous {write_errors + mixed_errors + short_errors}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--operations', type=int, default=2000)
+    parser.add_argument('--threads', type=int, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        legacy_db = os.path.join(directory, 'legacy.db')
+        database.DB_NAME = legacy_db
+        database.init_db()
+        database.close_connection()
+        with sqlite3.connect(legacy_db) as conn:
+            conn.execute("PRAGMA journal_mode=DELETE")
+        run("connexion par appel", legacy_add_slot, legacy_get_slots,
+            legacy_db, args.operations, args.threads)
+
+        # Sans pool, la connexion d'un thread court meurt avec lui.
+        database.DB_NAME = os.path.join(directory, 'per_thread.db')
+        database.init_db()
+        run("connexion par thread", pooled_add_slot, pooled_get_slots,
+            database.DB_NAME, args.operations, args.threads, database.close_connection)
+        database.close_connection()
+
+        database.DB_NAME = os.path.join(directory, 'pooled.db')
+        database.init_db()
+        run("pool de connexions", pooled_add_slot, pooled_get_slots,
+            database.DB_NAME, args.operations, args.threads, database.release_connection)
+        database.close_connection()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,575 @@
+"""
+Faux tennis.paris.fr (et son serveur d'authentification) pour exécuter
+booking_tennis() et get_remaining_time() sans le vrai site.
+
+    cd backend && python -m benchmarks.fake_tennis_site [--latency-ms 150] [--latency search=800]
+
+Le faux site reproduit les contrats DOM dont dépend le code : formulaire
+`username` / `password` / `Submit`, `whereToken`, `when` et ses `div.date`,
+`dropdownTerrain`, slider `tooltip1` / `tooltip2`, `rechercher`, blocs
+`search-result-block` / `tennis-court` ou `no_result`, `li-antibot-iframe`,
+`submitControle`, partenaire `player1`, `paymentmode='existingTicket'` et les
+blocs `h4` du carnet. Les deux serveurs écoutent sur des ports différents de
+127.0.0.1 : TENNIS_BASE_URL et TENNIS_LOGIN_URL (voir modules/site_urls.py)
+les désignent au code de réservation.
+
+Chaque page est servie après une latence injectée, par route (`--latency
+search=800`) ou par défaut (`--latency-ms`), log-normale si `--jitter` > 0.
+Routes : clock, login_page, login, home, search_page, autocomplete, search,
+reservation, captcha, captcha_check, partner, payment, confirmation, carnet.
+"""
+import argparse
+import base64
+import html
+import io
+import json
+import random
+import secrets
+import threading
+import time
+from collections import Counter
+from datetime import date, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from http.cookies import SimpleCookie
+from urllib.parse import parse_qs, urlencode, urlparse
+from PIL import Image, ImageDraw, ImageFont
+
+PORTAL_PATH = '/tennis/jsp/site/Portal.jsp'
+AUTH_PATH = '/auth/realms/paris/protocol/openid-connect/auth'
+SESSION_COOKIE = 'JSESSIONID'
+TENNIS_NAMES = ['Elisabeth', 'Atlantique', 'Henry de Montherlant', 'Suzanne Lenglen']
+# (nom, surface, couvert)
+COURTS = [
+    ('Court 1', 'Quick', True),
+    ('Court 2', 'Béton poreux', False),
+    ('Court 3', 'Quick', True),
+    ('Court 4', 'Terre battue', False),
+]
+DAYS = ['lundi', 'mardi', 'mercredi', 'jeudi', 'vendredi', 'samedi', 'dimanche']
+MONTHS = ['janvier', 'février', 'mars', 'avril', 'mai', 'juin', 'juillet',
+          'août', 'septembre', 'octobre', 'novembre', 'décembre']
+DATE_PICKER_DAYS = 8
+
+
+def french_date(day):
+    """Libellé d'un `div.date`, identique à strftime('%A %d %B') en locale fr_FR."""
+    return f"{DAYS[day.weekday()]} {day:%d} {MONTHS[day.month - 1]}"
+
+
+def captcha_image(text):
+    """PNG en base64 du texte à recopier, avec quelques lignes de bruit."""
+    image = Image.new('RGB', (220, 70), 'white')
+    draw = ImageDraw.Draw(image)
+    rng = random.Random(text)
+    for _ in range(4):
+        draw.line([(rng.randrange(220), rng.randrange(70)), (rng.randrange(220), rng.randrange(70))],
+                  fill=(150, 150, 150), width=1)
+    draw.text((18, 12), ' '.join(text), fill='black', font=ImageFont.load_default(size=36))
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG')
+    return base64.b64encode(buffer.getvalue()).decode()
+
+
+def page(title, body, script=''):
+    return f"""<!DOCTYPE html>
+<html lang="fr"><head><meta charset="utf-8"><title>{html.escape(title)}</title>
+<style>
+  [hidden] {{ display: none !important; }}
+  .slider-handle {{ display: inline-block; padding: 4px 8px; margin: 4px; border: 1px solid #888; }}
+  .date, .suggestions li, .price-item {{ cursor: pointer; padding: 4px; }}
+  .suggestions li.active, .price-item.selected {{ background: #cde; }}
+</style></head>
+<body>{body}<script>{script}</script></body></html>"""
+
+
+SEARCH_SCRIPT = """
+const form = document.getElementById('searchForm');
+const whereInput = document.querySelector('#whereToken input');
+const suggestions = document.getElementById('whereSuggestions');
+let active = -1;
+
+whereInput.addEventListener('input', async () => {
+    const term = whereInput.value.trim();
+    const response = await fetch('Portal.jsp?page=recherche&action=autocomplete&term=' + encodeURIComponent(term));
+    const names = await response.json();
+    if (whereInput.value.trim() !== term) return;
+    suggestions.replaceChildren(...names.map(name => {
+        const item = document.createElement('li');
+        item.textContent = name;
+        item.addEventListener('click', () => selectTennis(name));
+        return item;
+    }));
+    active = -1;
+    suggestions.hidden = names.length === 0;
+});
+
+whereInput.addEventListener('keydown', event => {
+    const items = suggestions.children;
+    if (event.key === 'ArrowDown' && items.length) {
+        event.preventDefault();
+        active = Math.min(active + 1, items.length - 1);
+        [...items].forEach((item, index) => item.classList.toggle('active', index === active));
+    } else if (event.key === 'Enter') {
+        event.preventDefault();
+        if (active >= 0) selectTennis(items[active].textContent);
+    }
+});
+
+function selectTennis(name) {
+    const token = document.createElement('li');
+    token.className = 'token';
+    token.textContent = name;
+    whereInput.parentElement.before(token);
+    form.selWhereTennisName.value = name;
+    whereInput.value = '';
+    suggestions.hidden = true;
+}
+
+const when = document.getElementById('when');
+const picker = document.getElementById('whenPicker');
+when.addEventListener('click', () => { picker.hidden = !picker.hidden; });
+for (const day of picker.querySelectorAll('.date')) {
+    day.addEventListener('click', () => {
+        form.when.value = day.dataset.value;
+        when.textContent = day.textContent;
+        picker.hidden = true;
+    });
+}
+
+const terrainMenu = document.getElementById('terrainMenu');
+document.getElementById('dropdownTerrain').addEventListener('click', () => {
+    terrainMenu.hidden = !terrainMenu.hidden;
+});
+
+const range = {start: 8, end: 22};
+for (const handle of document.querySelectorAll('.slider-handle')) {
+    handle.addEventListener('keydown', event => {
+        const step = {ArrowRight: 1, ArrowLeft: -1}[event.key];
+        if (!step) return;
+        event.preventDefault();
+        const key = handle.dataset.handle;
+        const value = range[key] + step;
+        if (key === 'start' ? value < 8 || value >= range.end : value > 22 || value <= range.start) return;
+        range[key] = value;
+        handle.firstElementChild.textContent = value + 'h';
+        form.hourRange.value = range.start + '-' + range.end;
+    });
+}
+"""
+
+RESULTS_SCRIPT = """
+const reservation = document.getElementById('reservationForm');
+for (const button of document.querySelectorAll('.tennis-court button')) {
+    button.addEventListener('click', () => {
+        reservation.courtId.value = button.getAttribute('courtid');
+        reservation.dateDeb.value = button.getAttribute('datedeb');
+        reservation.dateFin.value = button.getAttribute('datefin');
+        reservation.submit();
+    });
+}
+"""
+
+PAYMENT_SCRIPT = """
+const paymentForm = document.getElementById('paymentForm');
+for (const option of document.querySelectorAll('.price-item')) {
+    option.addEventListener('click', () => {
+        document.querySelectorAll('.price-item').forEach(item => item.classList.remove('selected'));
+        option.classList.add('selected');
+        paymentForm.paymentMode.value = option.getAttribute('paymentmode');
+    });
+}
+"""
+
+
+class FakeTennisSite:
+    """
+    Les deux faux serveurs et leur état (sessions, réservations, heures de
+    carnet). Toute combinaison identifiant / mot de passe non vide est acceptée.
+
+    - `latency_ms` : latence injectée par route, en ms ;
+    - `default_latency_ms` : latence des routes absentes de `latency_ms` ;
+    - `jitter` : écart-type logarithmique de la latence (0 : latence fixe) ;
+    - `courts_per_hour` : courts libres par heure (0 : toujours `no_result`) ;
+    - `captcha_answer` : réponse attendue par le captcha ;
+    - `carnet_hours` : heures de chaque carnet à la création d'un compte.
+    """
+
+    def __init__(self, latency_ms=None, default_latency_ms=0, jitter=0.0, courts_per_hour=2,
+                 captcha_answer='K7P2QX', carnet_hours=10, host='127.0.0.1', tennis_port=0, auth_port=0):
+        self.latency_ms = dict(latency_ms or {})
+        self.default_latency_ms = default_latency_ms
+        self.jitter = jitter
+        self.courts_per_hour = courts_per_hour
+        self.captcha_answer = captcha_answer
+        self.captcha_png = captcha_image(captcha_answer)
+        self.carnet_hours = carnet_hours
+        self.requests = Counter()
+        self.injected_secs = Counter()
+        self.bookings = []
+        self._sessions = {}
+        self._tickets = {}
+        self._hours = {}
+        self._lock = threading.Lock()
+
+        self.tennis_httpd = ThreadingHTTPServer((host, tennis_port), self._handler(self._tennis))
+        self.auth_httpd = ThreadingHTTPServer((host, auth_port), self._handler(self._auth))
+        self.base_url = f"http://{host}:{self.tennis_httpd.server_address[1]}{PORTAL_PATH}"
+        self.auth_url = f"http://{host}:{self.auth_httpd.server_address[1]}{AUTH_PATH}"
+        self.login_url = self.login_url_for(f"{self.base_url}?page=tennis&view=startDefault&full=1")
+
+    def env(self):
+        """Variables d'environnement qui dirigent le code de réservation vers ce site."""
+        return {'TENNIS_BASE_URL': self.base_url, 'TENNIS_LOGIN_URL': self.login_url}
+
+    def login_url_for(self, back_url):
+        return f"{self.auth_url}?{urlencode({'client_id': 'moncompte_modal', 'back_url': back_url})}"
+
+    def remaining_hours(self, email):
+        with self._lock:
+            return dict(self._hours.setdefault(
+                email, {'couvert': self.carnet_hours, 'decouvert': self.carnet_hours}))
+
+    def __enter__(self):
+        for httpd in (self.tennis_httpd, self.auth_httpd):
+            threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        for httpd in (self.tennis_httpd, self.auth_httpd):
+            httpd.shutdown()
+            httpd.server_close()
+
+    # Infrastructure HTTP
+
+    def _handler(self, route):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                route(self, 'GET', {})
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length') or 0)).decode()
+                route(self, 'POST', parse_qs(body, keep_blank_values=True))
+
+            def do_HEAD(self):
+                # Référence d'horloge (modules/server_clock.py) : seul l'en-tête Date compte.
+                site._delay('clock')
+                self.send_response(200)
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def _delay(self, route):
+        self.requests[route] += 1
+        latency_ms = self.latency_ms.get(route, self.default_latency_ms)
+        if latency_ms <= 0:
+            return
+        secs = latency_ms * random.lognormvariate(0, self.jitter) / 1000 if self.jitter else latency_ms / 1000
+        self.injected_secs[route] += secs
+        time.sleep(secs)
+
+    @staticmethod
+    def _send(handler, status, body='', content_type='text/html; charset=utf-8', headers=()):
+        payload = body.encode()
+        handler.send_response(status)
+        for name, value in headers:
+            handler.send_header(name, value)
+        handler.send_header('Content-Type', content_type)
+        handler.send_header('Content-Length', str(len(payload)))
+        handler.end_headers()
+        handler.wfile.write(payload)
+
+    def _redirect(self, handler, location, headers=()):
+        self._send(handler, 302, headers=[('Location', location), *headers])
+
+    # Serveur d'authentification
+
+    def _auth(self, handler, method, form):
+        url = urlparse(handler.path)
+        if url.path != AUTH_PATH:
+            return self._send(handler, 404, 'Not found')
+        back_url = parse_qs(url.query).get('back_url', [self.base_url])[0]
+
+        if method == 'GET':
+            self._delay('login_page')
+            return self._send(handler, 200, page('Connexion', """
+                <form method="POST">
+                    <input id="username" name="username" type="text" autocomplete="username">
+                    <input id="password" name="password" type="password" autocomplete="current-password">
+                    <input type="submit" name="Submit" value="Se connecter">
+                </form>"""))
+
+        self._delay('login')
+        email = form.get('username', [''])[0]
+        if not email or not form.get('password', [''])[0]:
+            return self._send(handler, 200, page('Connexion', '<p class="alert">Identifiant ou mot de passe invalide.</p>'))
+        ticket = secrets.token_urlsafe(16)
+        with self._lock:
+            self._tickets[ticket] = email
+        separator = '&' if '?' in back_url else '?'
+        self._redirect(handler, f"{back_url}{separator}{urlencode({'ticket': ticket})}")
+
+    # Site de réservation
+
+    def _tennis(self, handler, method, form):
+        url = urlparse(handler.path)
+        if url.path != PORTAL_PATH:
+            return self._send(handler, 404, 'Not found')
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+
+        # Retour du serveur d'authentification : le ticket devient un cookie de session.
+        if 'ticket' in query:
+            with self._lock:
+                email = self._tickets.pop(query.pop('ticket'), None)
+                token = secrets.token_urlsafe(16)
+                if email is not None:
+                    self._sessions[token] = {'email': email, 'reservation': None, 'captcha_ok': False}
+            if email is None:
+                return self._send(handler, 403, 'Ticket invalide')
+            return self._redirect(handler, f"{self.base_url}?{urlencode(query)}",
+                                  [('Set-Cookie', f"{SESSION_COOKIE}={token}; Path=/; HttpOnly")])
+
+        cookie = SimpleCookie(handler.headers.get('Cookie', ''))
+        token = cookie[SESSION_COOKIE].value if SESSION_COOKIE in cookie else None
+        session = self._sessions.get(token)
+        if session is None:
+            # Comme le vrai site : toute page demande une session, sinon retour au formulaire Keycloak.
+            self._delay('home')
+            return self._redirect(handler, self.login_url_for(f"{self.base_url}?{url.query}"))
+
+        key = (method, query.get('page'), query.get('view') or query.get('action'))
+        routes = {
+            ('GET', 'tennis', 'startDefault'): self._home,
+            ('GET', 'recherche', 'recherche_creneau'): self._search_page,
+            ('GET', 'recherche', 'autocomplete'): self._autocomplete,
+            ('POST', 'recherche', 'rechercher_creneau'): self._search,
+            ('POST', 'reservation', 'reservation_creneau'): self._reservation,
+            ('GET', 'antibot', None): self._captcha,
+            ('POST', 'antibot', None): self._captcha_check,
+            ('POST', 'reservation', 'methods_players'): self._partner,
+            ('POST', 'reservation', 'methods_payment'): self._payment,
+            ('POST', 'reservation', 'confirmation'): self._confirmation,
+            ('GET', 'profil', 'carnet_reservation'): self._carnet,
+        }
+        if key not in routes:
+            return self._send(handler, 404, page('Introuvable', '<p>Page introuvable.</p>'))
+        status, body, *content_type = routes[key](session, query, form)
+        self._send(handler, status, body, *content_type)
+
+    def _home(self, session, query, form):
+        self._delay('home')
+        return 200, page('Tennis', f'<p>Bienvenue {html.escape(session["email"])}.</p>')
+
+    def _search_page(self, session, query, form):
+        self._delay('search_page')
+        today = date.today()
+        days = ''.join(
+            f'<div class="date" data-value="{day:%d/%m/%Y}">{french_date(day)}</div>'
+            for day in (today + timedelta(days=offset) for offset in range(DATE_PICKER_DAYS)))
+        return 200, page('Recherche', f"""
+            <form id="searchForm" method="POST" action="Portal.jsp?page=recherche&amp;action=rechercher_creneau">
+                <ul id="whereToken" class="tokens"><li class="token-input"><input type="text" autocomplete="off"></li></ul>
+                <ul id="whereSuggestions" class="suggestions" hidden></ul>
+                <input type="hidden" name="selWhereTennisName">
+                <div id="when" class="form-control" tabindex="0">Quand ?</div>
+                <div id="whenPicker" hidden>{days}</div>
+                <input type="hidden" name="when">
+                <button type="button" id="dropdownTerrain">Type de court</button>
+                <div id="terrainMenu" hidden>
+                    <input type="checkbox" id="chckCouvert" name="selInOut" value="V" checked>
+                    <label for="chckCouvert">Couvert</label>
+                    <input type="checkbox" id="chckDécouvert" name="selInOut" value="F" checked>
+                    <label for="chckDécouvert">Découvert</label>
+                </div>
+                <div class="slider">
+                    <span class="slider-handle" tabindex="0" data-handle="start"><span class="tooltip1">8h</span></span>
+                    <span class="slider-handle" tabindex="0" data-handle="end"><span class="tooltip2">22h</span></span>
+                </div>
+                <input type="hidden" name="hourRange" value="8-22">
+                <button type="submit" id="rechercher">Rechercher</button>
+            </form>""", SEARCH_SCRIPT)
+
+    def _autocomplete(self, session, query, form):
+        self._delay('autocomplete')
+        term = query.get('term', '').lower()
+        names = [name for name in TENNIS_NAMES if term and term in name.lower()]
+        return 200, json.dumps(names), 'application/json'
+
+    def _search(self, session, query, form):
+        self._delay('search')
+        courts = self._available_courts(form)
+        if not courts:
+            return 200, page('Résultats', '<div class="no_result">Aucun créneau disponible.</div>')
+
+        rows = ''.join(f"""
+            <div class="row tennis-court">
+                <span class="court">{html.escape(name)}</span>
+                <span class="surface">{html.escape(surface)}</span>
+                <span>{'Couvert' if covered else 'Découvert'}</span>
+                <button type="button" class="btn btn-darkblue" courtid="{court_id}"
+                        datedeb="{date_deb}" datefin="{date_fin}">Réserver</button>
+            </div>""" for court_id, name, surface, covered, date_deb, date_fin in courts)
+        return 200, page('Résultats', f"""
+            <form id="reservationForm" method="POST" action="Portal.jsp?page=reservation&amp;view=reservation_creneau">
+                <input type="hidden" name="courtId"><input type="hidden" name="dateDeb"><input type="hidden" name="dateFin">
+            </form>
+            <div class="search-result-block">
+                <h4>{html.escape(form['selWhereTennisName'][0])}</h4>
+                {rows}
+            </div>""", RESULTS_SCRIPT)
+
+    def _available_courts(self, form):
+        try:
+            name = form['selWhereTennisName'][0]
+            day = datetime.strptime(form['when'][0], '%d/%m/%Y')
+            start, end = (int(hour) for hour in form['hourRange'][0].split('-'))
+        except (KeyError, ValueError):
+            return []
+        if name not in TENNIS_NAMES:
+            return []
+
+        in_out = set(form.get('selInOut', []))
+        courts = []
+        for hour in range(start, end):
+            for index, (court, surface, covered) in enumerate(COURTS[:self.courts_per_hour]):
+                if ('V' if covered else 'F') in in_out:
+                    courts.append((f"{index + 1}-{hour}", court, surface, covered,
+                                   f"{day:%Y/%m/%d} {hour:02d}:00:00", f"{day:%Y/%m/%d} {hour + 1:02d}:00:00"))
+        return courts
+
+    def _reservation(self, session, query, form):
+        self._delay('reservation')
+        session['reservation'] = {key: form.get(key, [''])[0] for key in ('courtId', 'dateDeb', 'dateFin')}
+        session['captcha_ok'] = False
+        return 200, page('Réservation', f"""
+            <h3>Réservation du {html.escape(session['reservation']['dateDeb'])}</h3>
+            <iframe id="li-antibot-iframe" src="Portal.jsp?page=antibot" width="320" height="220"></iframe>
+            <form method="POST" action="Portal.jsp?page=reservation&amp;view=methods_players">
+                <button type="submit" id="submitControle" class="btn">Étape suivante</button>
+            </form>""")
+
+    def _captcha_page(self, error=''):
+        return page('Captcha', f"""
+            <div id="li-antibot-questions-container">
+                <p>Recopiez les caractères de l'image :</p>
+                <img src="data:image/png;base64,{self.captcha_png}" alt="captcha">
+            </div>
+            {f'<p class="alert">{error}</p>' if error else ''}
+            <form method="POST" action="Portal.jsp?page=antibot">
+                <input id="li-antibot-answer" name="answer" type="text" autocomplete="off">
+                <button type="submit" id="li-antibot-validate">Valider</button>
+            </form>""")
+
+    def _captcha(self, session, query, form):
+        self._delay('captcha')
+        return 200, self._captcha_page()
+
+    def _captcha_check(self, session, query, form):
+        self._delay('captcha_check')
+        if form.get('answer', [''])[0].strip() != self.captcha_answer:
+            return 200, self._captcha_page('Réponse incorrecte.')
+        session['captcha_ok'] = True
+        return 200, page('Captcha', '<div id="li-antibot-check-img" class="check">&#10003;</div>')
+
+    def _partner(self, session, query, form):
+        self._delay('partner')
+        if session['reservation'] is None or not session['captcha_ok']:
+            return 200, page('Réservation', '<p class="alert">Veuillez valider le captcha.</p>')
+        return 200, page('Partenaire', """
+            <form method="POST" action="Portal.jsp?page=reservation&amp;view=methods_payment">
+                <div class="form-group has-feedback name"><input name="player1" type="text" placeholder="Nom"></div>
+                <div class="form-group has-feedback firstname"><input name="player1" type="text" placeholder="Prénom"></div>
+                <button type="submit" class="btn">Étape suivante</button>
+            </form>""")
+
+    def _payment(self, session, query, form):
+        self._delay('payment')
+        if len([value for value in form.get('player1', []) if value.strip()]) < 2:
+            return 200, page('Partenaire', '<p class="alert">Nom et prénom du partenaire obligatoires.</p>')
+        session['partner'] = ' '.join(form['player1'])
+        hours = self.remaining_hours(session['email'])
+        return 200, page('Paiement', f"""
+            <form id="paymentForm" method="POST" action="Portal.jsp?page=reservation&amp;view=confirmation">
+                <input type="hidden" name="paymentMode">
+                <table class="price-item text-center option" paymentmode="existingTicket">
+                    <tr><td>Carnet</td><td>{hours['couvert'] + hours['decouvert']} heure(s)</td></tr>
+                </table>
+                <table class="price-item text-center option" paymentmode="creditCard">
+                    <tr><td>Carte bancaire</td></tr>
+                </table>
+                <button type="submit" id="submit" class="btn">Payer</button>
+            </form>""", PAYMENT_SCRIPT)
+
+    def _confirmation(self, session, query, form):
+        self._delay('confirmation')
+        reservation = session['reservation']
+        if reservation is None or form.get('paymentMode', [''])[0] != 'existingTicket':
+            return 200, page('Paiement', '<p class="alert">Choisissez un mode de paiement.</p>')
+        covered = COURTS[int(reservation['courtId'].split('-')[0]) - 1][2]
+        with self._lock:
+            hours = self._hours[session['email']]
+            carnet = 'couvert' if covered else 'decouvert'
+            if hours[carnet] <= 0:
+                return 200, page('Paiement', '<p class="alert">Carnet épuisé.</p>')
+            hours[carnet] -= 1
+            self.bookings.append({**reservation, 'email': session['email'], 'partner': session.get('partner')})
+        session['reservation'] = None
+        return 200, page('Confirmation', '<p class="confirmation">Votre réservation est confirmée.</p>')
+
+    def _carnet(self, session, query, form):
+        self._delay('carnet')
+        hours = self.remaining_hours(session['email'])
+        return 200, page('Mes carnets', f"""
+            <div class="carnet">
+                <h4>Tarif plein - Court découvert : <span class="subtitle">{hours['decouvert']} heure(s) restante(s)</span></h4>
+            </div>
+            <div class="carnet">
+                <h4>Tarif plein - Court couvert : <span class="subtitle">{hours['couvert']} heure(s) restante(s)</span></h4>
+            </div>""")
+
+
+def parse_latency(values):
+    """`['search=800', 'login=300']` -> {'search': 800.0, 'login': 300.0}"""
+    latency = {}
+    for value in values or []:
+        route, _, ms = value.partition('=')
+        latency[route] = float(ms)
+    return latency
+
+
+def add_site_arguments(parser):
+    """Options du faux site, partagées avec benchmarks/booking_e2e.py."""
+    parser.add_argument('--latency-ms', type=float, default=0, help="latence par défaut de chaque page")
+    parser.add_argument('--latency', action='append', metavar='ROUTE=MS', help="latence d'une route")
+    parser.add_argument('--jitter', type=float, default=0.0)
+    parser.add_argument('--courts-per-hour', type=int, default=2)
+
+
+def site_from_arguments(args, **kwargs):
+    return FakeTennisSite(parse_latency(args.latency), args.latency_ms, args.jitter,
+                          args.courts_per_hour, **kwargs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_site_arguments(parser)
+    parser.add_argument('--tennis-port', type=int, default=8081)
+    parser.add_argument('--auth-port', type=int, default=8082)
+    args = parser.parse_args()
+
+    with site_from_arguments(args, tennis_port=args.tennis_port, auth_port=args.auth_port) as site:
+        for name, value in site.env().items():
+            print(f"{name}='{value}'")
+        print(f"captcha : {site.captcha_answer}")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == '__main__':
+    main()
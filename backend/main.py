@@ -1,26 +1,59 @@
+import base64
+import contextvars
+import functools
+import hashlib
+import json
+import os
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
 from threading import Thread
-from flask import Flask, jsonify, request
-from modules.booking_tennis import booking_tennis
-from modules.database import add_account, delete_account, get_all_accounts, get_slots_by_date_and_status, get_used_account, init_db, add_slot, delete_slot, get_all_slots, update_account, update_slot_status, delete_slots_before_today, get_slot_by_id
+from flask import Flask, Response, jsonify, request
+from modules.account_fanout import FANOUT_MAX_CONCURRENCY, has_remaining_hours, start_booking_fanout
+from modules.booking_race import BookingRace, ResultCollector
+from modules.booking_tennis import start_booking
+from modules.database import add_account, delete_account, get_all_accounts, get_slots_by_date_and_status, get_used_account, init_db, add_slot, delete_slot, get_slots_page, get_table_version, get_latest_slot_change_seq, get_slot_changes, update_account, update_slots_status, delete_slots_before_today, get_slot_by_id, get_job, get_captcha_cost_since, get_captcha_solve_stats, release_connection
 import flask_cors
 import flasgger
-from modules.get_time_remaining import get_remaining_time
+from modules.remaining_hours_cache import remaining_hours_cache
+from modules.captcha_solver import CAPTCHA_HEDGE_REQUESTS
+import modules.gpt_capcha_model
+from modules.driver_pool import driver_pool
+import modules.prewarmed_booking
+from modules.server_clock import measure_clock_offset, sleep_until
+from modules.tracing import render_metrics
+from modules.jobs import defer_current_job, register_handler, start_workers, submit_job
+from modules.events import event_broadcaster, event_context, publish_event
 import modules.swagger
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 
 app = Flask(__name__)
-flask_cors.CORS(app)
+flask_cors.CORS(app, expose_headers=['ETag'])
 swagger = flasgger.Swagger(app, template=modules.swagger.generate_template())
 
 init_db()
 
 
-def create_response(is_success, message, data=None, status_code=200):
+@app.teardown_appcontext
+def release_database_connection(exception):
+    # Chaque requête a son propre thread : sa connexion retourne au pool au lieu d'attendre le ramasse-miettes.
+    release_connection()
+
+
+BOOKING_MAX_CONCURRENCY = int(os.getenv('BOOKING_MAX_CONCURRENCY', '2'))
+# Premières tentatives des créneaux en course ; les reprises sont planifiées par modules/retry_policy.py.
+booking_executor = ThreadPoolExecutor(max_workers=BOOKING_MAX_CONCURRENCY)
+# 'single' : seul le compte is_used réserve ; 'fanout' : tous les comptes tentent le même créneau.
+BOOKING_ACCOUNT_MODE = os.getenv('BOOKING_ACCOUNT_MODE', 'single')
+
+
+def create_response(is_success, message, data=None, status_code=200, meta=None):
     response = {"isSuccess": is_success, "message": message}
     if data is not None:
         response["data"] = data['data']
+    if meta is not None:
+        response.update(meta)
     return jsonify(response), status_code
 
 
@@ -67,29 +100,76 @@ def add_slot_endpoint():
                     status_code=400
                 )
 
-            result = booking_tennis_with_account(
-                date, start_time, end_time, slot_type)
-
-            if not result["isSuccess"]:
-                status_code = 500 if "Erreur interne" in result["message"] else 400
-                return create_response(False, result["message"], status_code=status_code)
-
-            if 'Aucun créneau disponible' in result.get("message"):
-                return create_response(
-                    False,
-                    result.get("message")
-                )
-            status = 'book' if result.get("isSuccess", False) else 'not_book'
-            add_slot(date, start_time, end_time, slot_type, status)
+            job_id = submit_job('booking', {
+                "date": date,
+                "start_time": start_time,
+                "end_time": end_time,
+                "type": slot_type
+            })
 
             return create_response(
                 True,
-                f"Créneau ajouté avec le statut '{status}'"
+                "Réservation en cours, suivez son avancement avec GET /jobs/<id>",
+                data={"data": {"job_id": job_id}},
+                status_code=202
             )
     except Exception as e:
         return create_response(False, str(e), status_code=500)
 
 
+def run_booking_job(payload):
+    """
+    Tâche 'booking' : réserve le créneau et l'enregistre avec le statut 'book' en
+    cas de succès. La tâche se termine quand la réservation aboutit ou abandonne,
+    sans occuper de worker pendant l'attente des reprises.
+    """
+    date = payload["date"]
+
+    slots = get_slots_by_date_and_status(date, 'book')
+    if len(slots['data']) > 0:
+        return {"isSuccess": False, "message": f"Un créneau avec le statut 'book' existe déjà pour la date {date}."}
+
+    complete = defer_current_job()
+
+    def on_done(result):
+        if not result["isSuccess"]:
+            return complete({"isSuccess": False, "message": result["message"]})
+
+        slot = add_slot(date, payload["start_time"],
+                        payload["end_time"], payload["type"], 'book')
+        if slot["isSuccess"]:
+            publish_event('slot_status', slot_id=slot["slot_id"], status='book')
+        complete({"isSuccess": True, "message": "Créneau ajouté avec le statut 'book'", "status": 'book'})
+
+    booking_tennis_with_account(
+        date, payload["start_time"], payload["end_time"], payload["type"], on_done=on_done)
+
+
+@app.route('/jobs/<id>', methods=['GET'])
+@flasgger.swag_from('swags/get_job.yml')
+def get_job_endpoint(id):
+    try:
+        job = get_job(id)
+        if not job["isSuccess"]:
+            return create_response(False, job["message"], status_code=404)
+
+        job = job["data"]
+        return create_response(
+            True,
+            "Tâche récupérée",
+            data={"data": {
+                "id": job["id"],
+                "status": job["status"],
+                "step": job["step"],
+                "result": job["result"],
+                "created_at": job["created_at"],
+                "updated_at": job["updated_at"]
+            }}
+        )
+    except Exception as e:
+        return create_response(False, str(e), status_code=500)
+
+
 @app.route('/slots/<id>', methods=['DELETE'])
 @flasgger.swag_from('swags/delete_slot.yml')
 def delete_slot_endpoint(id):
@@ -112,12 +192,104 @@ def delete_slot_endpoint(id):
         return create_response(False, str(e), status_code=500)
 
 
+SLOTS_PAGE_DEFAULT_LIMIT = 100
+SLOTS_PAGE_MAX_LIMIT = 500
+
+
+def encode_cursor(key):
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+
+def decode_cursor(cursor):
+    date, slot_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    return str(date), str(slot_id)
+
+
 @app.route('/slots', methods=['GET'])
 @flasgger.swag_from('swags/get_slots.yml')
 def get_slots_endpoint():
     try:
-        slots = get_all_slots()
-        return create_response(True, "Liste des créneaux récupérée", data=slots)
+        date_from = request.args.get('from')
+        date_to = request.args.get('to')
+        status = request.args.get('status')
+        cursor = request.args.get('cursor')
+
+        try:
+            for value in (date_from, date_to):
+                if value:
+                    datetime.strptime(value, "%Y-%m-%d")
+            limit = int(request.args.get('limit', SLOTS_PAGE_DEFAULT_LIMIT))
+            after = decode_cursor(cursor) if cursor else None
+        except (ValueError, TypeError):
+            return create_response(False, "Paramètres de filtre ou de pagination invalides", status_code=400)
+
+        if status and status not in ('book', 'not_book', 'waiting'):
+            return create_response(False, "Statut invalide", status_code=400)
+        if not 1 <= limit <= SLOTS_PAGE_MAX_LIMIT:
+            return create_response(False, f"limit doit être compris entre 1 et {SLOTS_PAGE_MAX_LIMIT}", status_code=400)
+
+        # ETag fort : version de la table + paramètres de la requête, sans lire les créneaux.
+        version = get_table_version('slots')
+        etag = None
+        if version["isSuccess"]:
+            query_hash = hashlib.sha1(request.query_string).hexdigest()[:16]
+            etag = f"slots-{version['data']}-{query_hash}"
+            if request.if_none_match.contains(etag):
+                response = Response(status=304)
+                response.set_etag(etag)
+                return response
+
+        # Lu avant les créneaux : un changement concurrent sera renvoyé par /slots/changes
+        # et réappliqué sans effet, jamais perdu.
+        change_seq = get_latest_slot_change_seq()
+        slots = get_slots_page(date_from, date_to, status, after, limit)
+        if not slots["isSuccess"]:
+            return create_response(False, slots["message"], status_code=500)
+
+        response, status_code = create_response(
+            True,
+            "Liste des créneaux récupérée",
+            data=slots,
+            meta={
+                "nextCursor": encode_cursor(slots["next"]) if slots["next"] else None,
+                "changeSeq": change_seq["data"] if change_seq["isSuccess"] else None
+            }
+        )
+        if etag is not None:
+            response.set_etag(etag)
+        return response, status_code
+    except Exception as e:
+        return create_response(False, str(e), status_code=500)
+
+
+@app.route('/slots/changes', methods=['GET'])
+@flasgger.swag_from('swags/get_slot_changes.yml')
+def get_slot_changes_endpoint():
+    try:
+        try:
+            since = int(request.args.get('since', ''))
+        except ValueError:
+            return create_response(False, "Le paramètre since est requis et doit être un entier", status_code=400)
+
+        changes = get_slot_changes(since)
+        if not changes["isSuccess"]:
+            return create_response(False, changes["message"], status_code=500)
+
+        if changes["reset"]:
+            return create_response(
+                False,
+                "Curseur trop ancien : rechargez la liste complète avec GET /slots",
+                status_code=410,
+                meta={"latestSeq": changes["latest_seq"]}
+            )
+
+        return create_response(
+            True,
+            "Changements récupérés",
+            data=changes,
+            meta={"latestSeq": changes["latest_seq"],
+                  "hasMore": changes["has_more"]}
+        )
     except Exception as e:
         return create_response(False, str(e), status_code=500)
 
@@ -141,20 +313,156 @@ def booking_tennis_cron():
     if len(slots['data']) == 0:
         return
 
-    booking_successful = False
+    run_booking_race(slots['data'], settle_race(slots['data']))
+
+
+def set_slots_status(statuses):
+    """Enregistre les nouveaux statuts et les publie sur le flux d'événements."""
+    result = update_slots_status(statuses)
+    if result["isSuccess"]:
+        for slot_id, status in statuses.items():
+            publish_event('slot_status', slot_id=slot_id, status=status)
+    return result
+
+
+def settle_race(slots):
+    """
+    Retourne le callback de fin de course : le créneau réservé passe à 'book',
+    les autres à 'not_book'.
+    """
+    def on_done(results):
+        winner = next((slot_id for slot_id, result in results.items()
+                       if result.get("isSuccess", False)), None)
+
+        set_slots_status({
+            slot['id']: 'book' if slot['id'] == winner else 'not_book'
+            for slot in slots
+        })
+
+        delete_slots_before_today()
 
+    return on_done
+
+
+def start_slot_bookings(slots, race, collector):
+    """
+    Lance la réservation de chaque créneau dans la course `race` (au plus
+    BOOKING_MAX_CONCURRENCY premières tentatives à la fois) ; chaque résultat
+    est remis à `collector` sous l'id du créneau.
+    """
     for slot in slots:
-        result = booking_tennis_with_account(
-            slot['date'], slot['start_time'], slot['end_time'], slot['type']
+        booking_executor.submit(
+            contextvars.copy_context().run,
+            booking_tennis_with_account,
+            slot['date'], int(slot['start_time']), int(
+                slot['end_time']), slot['type'], race,
+            lambda result, slot_id=slot['id']: collector.add(slot_id, result)
         )
 
-        if result.get("isSuccess", False) and not booking_successful:
-            update_slot_status(slot['id'], 'book')
-            booking_successful = True
+
+def run_booking_race(slots, on_done):
+    """
+    Lance la réservation de tous les créneaux en parallèle ; la première
+    réussite annule les autres. Appelle `on_done({slot_id: résultat})` une fois
+    toutes les réservations terminées.
+    """
+    start_slot_bookings(slots, BookingRace(), ResultCollector(len(slots), on_done))
+
+
+def prepare_booking_cron():
+    """
+    Prépare à 7h58 la réservation du créneau en attente préféré, pour la
+    déclencher à 8h pile : avec le compte is_used, ou en mode 'fanout' avec
+    chaque compte dont le carnet a encore des heures (dans la limite des
+    navigateurs du pool).
+    """
+    target_date = (datetime.now().date() +
+                   timedelta(days=6)).strftime("%Y-%m-%d")
+
+    if len(get_slots_by_date_and_status(target_date, 'book')['data']) > 0:
+        return
+
+    slots = get_slots_by_date_and_status(target_date, 'waiting')
+    if len(slots['data']) == 0:
+        return
+    slot = slots['data'][0]
+
+    if BOOKING_ACCOUNT_MODE == 'fanout':
+        accounts = get_all_accounts()
+        if not accounts["isSuccess"]:
+            return
+        # Les carnets sont lus maintenant : à 8h, la vérification des heures ne lit que le cache.
+        accounts = [account for account in accounts["data"]
+                    if has_remaining_hours(account, slot['type'], load=True)]
+        accounts = accounts[:min(FANOUT_MAX_CONCURRENCY, driver_pool.max_drivers)]
+    else:
+        account = get_used_account()
+        if not account["isSuccess"]:
+            return
+        accounts = [account["data"]]
+
+    modules.prewarmed_booking.discard()
+    for account in accounts:
+        modules.prewarmed_booking.prepare(slot, account)
+    modules.gpt_capcha_model.warm_up_openai(CAPTCHA_HEDGE_REQUESTS)
+
+
+def fire_staged_booking(staged, opening_time, race, on_done):
+    """Déclenche une réservation préparée et remet son résultat à `on_done`."""
+    with event_context(slot_id=staged.slot['id'], date=staged.slot['date'], account_id=staged.account['id']):
+        result = modules.prewarmed_booking.fire(
+            staged, opening_time.timestamp(), race)
+        publish_event('booking', step='paid' if result.get("isSuccess", False) else 'failed',
+                      message=result["message"], latency_ms=result.get("latency_ms"))
+    if result.get("isSuccess", False):
+        remaining_hours_cache.invalidate(staged.account['id'])
+    on_done(result)
+
+
+def fire_booking_cron():
+    """
+    Déclenche à 8h00:00 (heure du site) les réservations préparées et, dans la
+    même course, celles des autres créneaux en attente ; sans réservation
+    préparée, la réservation classique de tous les créneaux, lancée elle aussi
+    à l'ouverture.
+    """
+    opening_time = datetime.now().replace(hour=8, minute=0, second=0, microsecond=0)
+    staged_bookings = modules.prewarmed_booking.take()
+    if not staged_bookings:
+        # Lancée à 7h59:58, la recherche ne trouverait encore aucun créneau.
+        sleep_until(opening_time.timestamp(), measure_clock_offset())
+        return booking_tennis_cron()
+
+    staged_slot = staged_bookings[0].slot
+    slots = get_slots_by_date_and_status(staged_slot['date'], 'waiting')['data']
+    if staged_slot['id'] not in {slot['id'] for slot in slots}:
+        slots.insert(0, staged_slot)
+    race = BookingRace()
+    collector = ResultCollector(len(slots), settle_race(slots))
+
+    def on_staged_done(results):
+        winner = next((result for result in results.values()
+                       if result.get("isSuccess", False)), None)
+        if winner is None and not race.is_won:
+            # Le créneau préparé repasse par la réservation classique, avec ses reprises.
+            start_slot_bookings([staged_slot], race, collector)
         else:
-            update_slot_status(slot['id'], 'not_book')
+            collector.add(staged_slot['id'], winner or results[0])
+
+    staged_collector = ResultCollector(len(staged_bookings), on_staged_done)
+
+    # Les autres créneaux partent à l'ouverture, sans attendre l'issue du créneau préparé.
+    sleep_until(opening_time.timestamp(), staged_bookings[0].clock_offset)
+    start_slot_bookings([slot for slot in slots if slot['id'] != staged_slot['id']],
+                        race, collector)
 
-    delete_slots_before_today()
+    # Une réservation préparée par compte ; la première garde le thread du scheduler.
+    for index, staged in enumerate(staged_bookings[1:], start=1):
+        Thread(target=contextvars.copy_context().run, daemon=True, args=(
+            fire_staged_booking, staged, opening_time, race,
+            functools.partial(staged_collector.add, index))).start()
+    fire_staged_booking(staged_bookings[0], opening_time, race,
+                        functools.partial(staged_collector.add, 0))
 
 
 @app.route('/accounts', methods=['POST'])
@@ -179,13 +487,6 @@ def add_account_endpoint():
                 status_code=400
             )
 
-        if is_used:
-            current_account = get_used_account()
-            if current_account['isSuccess'] and current_account['data']:
-                account = current_account['data']
-                update_account(
-                    account['id'], account['email'], account['password'], False)
-
         result = add_account(
             email, password, is_used)
         return create_response(result['isSuccess'], result['message'])
@@ -217,6 +518,7 @@ def delete_account_endpoint(id):
             )
 
         result = delete_account(id)
+        remaining_hours_cache.invalidate(id)
         return create_response(result['isSuccess'], result['message'])
     except Exception as e:
         return create_response(False, str(e), status_code=500)
@@ -243,15 +545,10 @@ def update_account_endpoint(id):
                 status_code=400
             )
 
-        current_used_account = get_used_account()
-
-        if is_used:
-            if current_used_account['isSuccess'] and current_used_account['data']:
-                account = current_used_account['data']
-                update_account(
-                    account['id'], account['email'], account['password'], False)
-        else:
-            if id == current_used_account['data']['id']:
+        # add_account/update_account désactivent l'ancien compte utilisé dans la même transaction.
+        if not is_used:
+            current_used_account = get_used_account()
+            if current_used_account['isSuccess'] and id == current_used_account['data']['id']:
                 return create_response(False, "Vous ne pouvez pas désactiver le compte qui est celui utilisé", status_code=400)
 
         result = update_account(
@@ -260,6 +557,7 @@ def update_account_endpoint(id):
             password,
             is_used
         )
+        remaining_hours_cache.invalidate(id)
         return create_response(result['isSuccess'], result['message'])
     except Exception as e:
         return create_response(False, str(e), status_code=500)
@@ -276,7 +574,7 @@ def get_remaining_hours_endpoint():
         if not account["isSuccess"] or not account.get("data"):
             return create_response(False, "Aucun compte avec is_used = true trouvé.", status_code=400)
 
-        result = get_remaining_time(account["data"])
+        result = remaining_hours_cache.get(account["data"])
         if not result["isSuccess"]:
             return create_response(False, result["message"], status_code=500)
 
@@ -286,18 +584,87 @@ def get_remaining_hours_endpoint():
         return create_response(False, f"Erreur interne : {str(e)}", status_code=500)
 
 
-def booking_tennis_with_account(date, start_time, end_time, slot_type):
+@app.route('/metrics', methods=['GET'])
+@flasgger.swag_from('swags/metrics.yml')
+def metrics_endpoint():
+    """
+    Endpoint Prometheus : p50/p95/p99 de la durée de chaque étape du pipeline de réservation.
+    """
+    return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
+
+
+@app.route('/captcha_solves/stats', methods=['GET'])
+@flasgger.swag_from('swags/get_captcha_stats.yml')
+def get_captcha_stats_endpoint():
+    """
+    Endpoint pour agréger les résolutions de captcha par solveur et modèle, ou par jour.
+    """
     try:
+        date_from = request.args.get('from')
+        date_to = request.args.get('to')
+        group_by = request.args.get('group_by', 'model')
+        if group_by not in ('model', 'day'):
+            return create_response(False, "Le paramètre group_by doit valoir 'model' ou 'day'", status_code=400)
+        for value in (date_from, date_to):
+            if value:
+                try:
+                    datetime.strptime(value, "%Y-%m-%d")
+                except ValueError:
+                    return create_response(False, f"Date invalide : {value} (format attendu YYYY-MM-DD)", status_code=400)
+
+        stats = get_captcha_solve_stats(date_from, date_to, group_by)
+        if not stats["isSuccess"]:
+            return create_response(False, stats["message"], status_code=500)
+        return create_response(True, "Statistiques des captchas récupérées", data=stats)
+    except Exception as e:
+        return create_response(False, str(e), status_code=500)
+
+
+@app.route('/captcha_solves/budget', methods=['GET'])
+@flasgger.swag_from('swags/get_captcha_budget.yml')
+def get_captcha_budget_endpoint():
+    """
+    Endpoint pour récupérer le coût des captchas du mois en cours et le plafond mensuel.
+    """
+    try:
+        month_start = datetime.now().replace(
+            day=1, hour=0, minute=0, second=0, microsecond=0)
+        spent = get_captcha_cost_since(month_start)
+        if not spent["isSuccess"]:
+            return create_response(False, spent["message"], status_code=500)
+
+        budget = modules.gpt_capcha_model.CAPTCHA_MONTHLY_BUDGET_USD
+        return create_response(True, "Budget des captchas récupéré", data={"data": {
+            "month": month_start.strftime("%Y-%m"),
+            "spent_usd": round(spent["data"], 4),
+            "budget_usd": budget if budget > 0 else None,
+            "remaining_usd": round(max(0.0, budget - spent["data"]), 4) if budget > 0 else None
+        }})
+    except Exception as e:
+        return create_response(False, str(e), status_code=500)
+
+
+def booking_tennis_with_account(date, start_time, end_time, slot_type, race=None, on_done=None):
+    """Lance la réservation avec le compte is_used (ou tous les comptes en mode 'fanout') ; `on_done(result)` reçoit le résultat."""
+    try:
+        if BOOKING_ACCOUNT_MODE == 'fanout':
+            accounts = get_all_accounts()
+            if not accounts["isSuccess"]:
+                return on_done({"isSuccess": False, "message": accounts["message"]})
+
+            return start_booking_fanout(date, start_time, end_time,
+                                        slot_type, accounts["data"], race, on_done)
+
         account = get_used_account()
 
         if not account["isSuccess"]:
-            return {"isSuccess": False, "message": "Aucun compte avec is_used = true trouvé."}
+            return on_done({"isSuccess": False, "message": "Aucun compte avec is_used = true trouvé."})
 
-        return booking_tennis(date, start_time, end_time,
-                              slot_type, account["data"])
+        start_booking(date, start_time, end_time,
+                      slot_type, account["data"], race, on_done)
 
     except Exception as e:
-        return {"isSuccess": False, "message": f"Erreur interne : {str(e)}"}
+        on_done({"isSuccess": False, "message": f"Erreur interne : {str(e)}"})
 
 
 def run_flask():
@@ -307,16 +674,51 @@ def run_flask():
 def configure_scheduler():
     scheduler = BackgroundScheduler()
 
+    # Relance les navigateurs au repos avant la fenêtre de réservation de 8h.
+    scheduler.add_job(
+        func=remaining_hours_cache.refresh_expiring,
+        trigger=IntervalTrigger(minutes=1),
+    )
     scheduler.add_job(
-        func=booking_tennis_cron,
-        trigger=CronTrigger(hour='8', minute='0'),
+        func=driver_pool.warm_up,
+        trigger=CronTrigger(hour='7', minute='55'),
+    )
+    # Connexions TLS vers OpenAI ouvertes juste avant 8h, pour les captchas.
+    scheduler.add_job(
+        func=modules.gpt_capcha_model.warm_up_openai,
+        args=[CAPTCHA_HEDGE_REQUESTS],
+        trigger=CronTrigger(hour='7', minute='59', second='0'),
     )
 
+    if os.getenv('PREWARMED_BOOKING', '1') == '1':
+        # Phase 1 : navigateur connecté et recherche prête avant l'ouverture.
+        scheduler.add_job(
+            func=prepare_booking_cron,
+            trigger=CronTrigger(hour='7', minute='58'),
+        )
+        # Phase 2 : démarre juste avant 8h, puis attend la seconde exacte sur l'horloge du site.
+        scheduler.add_job(
+            func=fire_booking_cron,
+            trigger=CronTrigger(hour='7', minute='59', second='58'),
+            misfire_grace_time=60,
+        )
+    else:
+        scheduler.add_job(
+            func=booking_tennis_cron,
+            trigger=CronTrigger(hour='8', minute='0'),
+        )
+
     scheduler.start()
 
 
 configure_scheduler()
 
+register_handler('booking', run_booking_job)
+start_workers()
+# Flux SSE de la progression des réservations, servi sur EVENTS_PORT hors de Flask.
+event_broadcaster.start()
+
 if __name__ == '__main__':
+    Thread(target=driver_pool.warm_up, daemon=True).start()
     thread = Thread(target=run_flask)
     thread.start()
@@ -0,0 +1,82 @@
+import contextvars
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from modules.booking_race import BookingCancelled, BookingRace, ResultCollector
+from modules.booking_tennis import start_booking
+from modules.remaining_hours_cache import remaining_hours_cache
+from typesForFilters.court_type_enum import CourtType
+
+FANOUT_MAX_CONCURRENCY = int(os.getenv('FANOUT_MAX_CONCURRENCY', '3'))
+
+_executor = ThreadPoolExecutor(max_workers=FANOUT_MAX_CONCURRENCY)
+
+
+def has_remaining_hours(account, court_type, load=False):
+    """
+    Indique si le carnet du compte permet de payer ce type de court. Sans
+    `load`, seul le cache est consulté (les heures sont lues à la préparation
+    de 7h58) : aucune lecture du carnet ne retarde la réservation. Si les heures
+    sont inconnues, le compte est gardé : le site refusera le paiement de lui-même.
+    """
+    if load:
+        result = remaining_hours_cache.get(account)
+    else:
+        result = remaining_hours_cache.peek(account['id'])
+    if result is None or not result["isSuccess"]:
+        return True
+
+    hours = result["data"]
+    if court_type == CourtType.INDOOR.value:
+        return hours["court_couvert_hours"] > 0
+    if court_type == CourtType.OUTDOOR.value:
+        return hours["court_decouvert_hours"] > 0
+    return hours["court_couvert_hours"] > 0 or hours["court_decouvert_hours"] > 0
+
+
+def _book_with_account(date, start_time, end_time, court_type, account, race, on_done):
+    def finish(result):
+        on_done({**result, "account_id": account["id"]})
+
+    try:
+        race.check()
+        if not has_remaining_hours(account, court_type):
+            return finish({"isSuccess": False, "message": f"Plus d'heures disponibles sur le carnet de {account['email']}."})
+        race.check()
+    except BookingCancelled as e:
+        return finish({"isSuccess": False, "message": str(e)})
+    start_booking(date, start_time, end_time, court_type, account, race, finish)
+
+
+def _fanout_result(results):
+    winner = next(
+        (result for result in results if result["isSuccess"]), None)
+    if winner is not None:
+        return winner
+
+    # Le message "Aucun créneau disponible" est celui que l'API sait interpréter.
+    return next(
+        (result for result in results if 'Aucun créneau disponible' in result["message"]),
+        results[0]
+    )
+
+
+def start_booking_fanout(date, start_time, end_time, court_type, accounts, race=None, on_done=None):
+    """
+    Tente de réserver le même créneau avec plusieurs comptes en parallèle, chacun
+    dans sa propre session (au plus FANOUT_MAX_CONCURRENCY premières tentatives
+    à la fois). Le premier compte qui paie gagne et les autres s'arrêtent avant
+    le paiement. `on_done(result)` reçoit le résultat du gagnant, sinon l'échec
+    le plus parlant, une fois toutes les réservations terminées.
+    """
+    if not accounts:
+        return on_done({"isSuccess": False, "message": "Aucun compte disponible pour la réservation."})
+
+    race = race or BookingRace()
+    collector = ResultCollector(len(accounts), lambda results: on_done(
+        _fanout_result([results[index] for index in range(len(accounts))])))
+    for index, account in enumerate(accounts):
+        # Le contexte est copié pour que les étapes restent rattachées à la tâche en cours.
+        _executor.submit(contextvars.copy_context().run, _book_with_account,
+                         date, start_time, end_time, court_type, account, race,
+                         functools.partial(collector.add, index))
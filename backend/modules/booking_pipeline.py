@@ -0,0 +1,51 @@
+class StepFailed(Exception):
+    """Échec d'une étape du pipeline : `step` est son nom, `cause` l'exception d'origine."""
+
+    def __init__(self, step, cause):
+        super().__init__(str(cause))
+        self.step = step
+        self.cause = cause
+
+
+class Step:
+    """
+    Étape du pipeline : `run(state)` fait avancer l'état partagé. `resume_from`
+    est l'étape à rejouer quand celle-ci échoue sans casser la session (par
+    défaut l'étape elle-même, par exemple une étape antérieure quand la page
+    courante n'est plus exploitable).
+    """
+
+    def __init__(self, name, run, resume_from=None):
+        self.name = name
+        self.run = run
+        self.resume_from = resume_from or name
+
+
+class ResumablePipeline:
+    """
+    Machine à états linéaire : les étapes s'exécutent dans l'ordre. Une nouvelle
+    tentative repart de l'étape donnée par `resume_point` au lieu de tout reprendre.
+    """
+
+    def __init__(self, steps):
+        self.steps = steps
+        self._positions = {step.name: index for index, step in enumerate(steps)}
+
+    def run(self, state, start=None):
+        """Exécute les étapes à partir de `start` (la première par défaut). Lève StepFailed."""
+        for step in self.steps[self._positions[start] if start else 0:]:
+            try:
+                step.run(state)
+            except Exception as e:
+                raise StepFailed(step.name, e) from e
+
+    def resume_point(self, failed_step, rewind_to=None):
+        """
+        Étape de reprise après l'échec de `failed_step`. `rewind_to` force un
+        retour au moins jusqu'à cette étape (session perdue, navigateur cassé) ;
+        la plus ancienne des deux étapes l'emporte.
+        """
+        resume_from = self.steps[self._positions[failed_step]].resume_from
+        if rewind_to is None:
+            return resume_from
+        return min(resume_from, rewind_to, key=self._positions.__getitem__)
@@ -0,0 +1,74 @@
+import threading
+from contextlib import contextmanager
+
+
+class BookingCancelled(RuntimeError):
+    """Levée dans une tentative de réservation quand une tentative concurrente a déjà réussi."""
+
+
+class BookingRace:
+    """
+    Coordonne des tentatives de réservation lancées en parallèle : la première
+    qui paie gagne, les autres s'arrêtent à leur prochaine étape.
+    """
+
+    def __init__(self):
+        self._payment_lock = threading.Lock()
+        self._won = threading.Event()
+        self._callbacks = []
+        self._callbacks_lock = threading.Lock()
+
+    @property
+    def is_won(self):
+        return self._won.is_set()
+
+    def check(self):
+        """Lève BookingCancelled si une autre tentative a déjà réussi."""
+        if self._won.is_set():
+            raise BookingCancelled(
+                "Réservation annulée : un autre créneau a déjà été réservé.")
+
+    def on_won(self, callback):
+        """Appelle `callback()` quand la course est gagnée, tout de suite si elle l'est déjà."""
+        with self._callbacks_lock:
+            if not self._won.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    @contextmanager
+    def claim(self):
+        """
+        Entoure l'étape de paiement : une seule tentative à la fois peut payer, et
+        la course n'est gagnée que si le bloc se termine sans erreur.
+        """
+        with self._payment_lock:
+            self.check()
+            yield
+            with self._callbacks_lock:
+                self._won.set()
+                callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback()
+
+
+class ResultCollector:
+    """
+    Rassemble les résultats de `expected` réservations lancées sans attendre,
+    et appelle `on_done({clé: résultat})` à l'arrivée du dernier.
+    """
+
+    def __init__(self, expected, on_done):
+        self.expected = expected
+        self.on_done = on_done
+        self.results = {}
+        self._lock = threading.Lock()
+        if expected == 0:
+            on_done({})
+
+    def add(self, key, result):
+        with self._lock:
+            self.results[key] = result
+            complete = len(self.results) == self.expected
+        if complete:
+            self.on_done(dict(self.results))
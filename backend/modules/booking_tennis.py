@@ -1,47 +1,44 @@
+import logging
+import os
 import time
+from collections import Counter
+from concurrent.futures import Future
 from datetime import datetime
-from selenium import webdriver
+from urllib.parse import urlencode
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.action_chains import ActionChains
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, WebDriverException
-from modules.gpt_capcha_model import solve_capcha_with_gpt
+from selenium.common.exceptions import JavascriptException, TimeoutException, WebDriverException
+from modules.booking_pipeline import ResumablePipeline, Step, StepFailed
+from modules.booking_race import BookingCancelled
+from modules.driver_pool import driver_pool
+from modules.events import event_context, publish_event
+from modules.fast_wait import dom_settled, pause, wait_page_ready
+from modules.remaining_hours_cache import remaining_hours_cache
+from modules.retry_policy import NoSlotAvailable, booking_retry_policy, classify_failure, schedule_retry
+from modules.session_cache import authenticate, get_cached_cookies
+from modules.search_client import SearchClient, SEARCH_PARAMS, build_search_query
+from modules.slot_preferences import slot_preferences
+from modules.site_urls import AUTH_HOST, LOGIN_URL, SEARCH_PAGE_URL, TENNIS_BASE_URL
+from modules.captcha_solver import solve_capcha_hedged
+from modules.captcha_samples import save_sample
+from modules.tracing import TracedWebDriverWait, finish_attempt, record_span, start_attempt, traced
 from typesForFilters.court_type_enum import CourtType
 import locale
 
 
-def setup_driver():
-    """Configure et retourne un driver Selenium pour Chrome."""
-    try:
-        chrome_options = Options()
-        chrome_options.add_argument('--disable-gpu')
-        chrome_options.add_argument('--no-sandbox')
-        chrome_options.add_argument('--disable-dev-shm-usage')
-        chrome_options.add_argument('--headless')
-
-        service = Service()
-        driver = webdriver.Chrome(service=service, options=chrome_options)
-        return driver
-    except WebDriverException as e:
-        raise RuntimeError(
-            f"Erreur lors de la configuration du driver : {str(e)}")
-
-
+@traced
 def login(driver, account):
     """Connecte l'utilisateur avec ses identifiants."""
     try:
-        driver.get(
-            'https://v70-auth.paris.fr/auth/realms/paris/protocol/openid-connect/auth?client_id=moncompte_modal&response_type=code&redirect_uri=https%3A%2F%2Fmoncompte.paris.fr%2Fmoncompte%2Fjsp%2Fsite%2FPortal.jsp%3Fpage%3Dmyluteceusergu%26view%3DcreateAccountModal%26close_modal%3Dtrue%26data_client%3DauthData%26handler_name%3DbannerLoginHandler&scope=openid&state=be6675ef91c4d4e5143440d10b7e0cef&nonce=39f06d1f2f815f275edec4f6b8c30a13&app_code=&back_url=https%3A%2F%2Ftennis.paris.fr%2Ftennis%2Fjsp%2Fsite%2FPortal.jsp%3Fpage%3Dtennis%26view%3DstartDefault%26full%3D1')
+        driver.get(LOGIN_URL)
 
-        WebDriverWait(driver, 30).until(EC.presence_of_element_located(
+        TracedWebDriverWait(driver, 30).until(EC.presence_of_element_located(
             (By.ID, 'username'))).send_keys(account['email'])
-        WebDriverWait(driver, 30).until(EC.presence_of_element_located(
+        TracedWebDriverWait(driver, 30).until(EC.presence_of_element_located(
             (By.ID, 'password'))).send_keys(account['password'])
-        WebDriverWait(driver, 30).until(
+        TracedWebDriverWait(driver, 30).until(
             EC.element_to_be_clickable((By.NAME, 'Submit'))).click()
     except TimeoutException:
         raise RuntimeError("Erreur : Temps dépassé lors de la connexion.")
@@ -49,16 +46,83 @@ def login(driver, account):
         raise RuntimeError(f"Erreur lors de la connexion : {str(e)}")
 
 
+@traced
 def navigate_to_tennis_page(driver):
     """Accède à la page des créneaux de tennis."""
     try:
-        driver.get(
-            'https://tennis.paris.fr/tennis/jsp/site/Portal.jsp?page=recherche&view=recherche_creneau')
+        driver.get(SEARCH_PAGE_URL)
     except WebDriverException as e:
         raise RuntimeError(
             f"Erreur lors de la navigation vers la page de tennis : {str(e)}")
 
 
+STAGED_SEARCH_FORM_ID = 'staged-search-form'
+# Remplissage du formulaire de recherche quand la recherche HTTP est
+# indisponible : 'script' (un seul execute_script, repli sur le clavier) ou
+# 'keys' (autocomplétion, calendrier, menu et slider au clavier).
+SEARCH_FORM_MODE = os.getenv('SEARCH_FORM_MODE', 'script')
+# Délai laissé à la soumission par script pour afficher une page de résultats.
+SCRIPTED_SEARCH_TIMEOUT_SECS = 10
+
+
+@traced
+def stage_search_form(driver, query):
+    """Insère dans la page de tennis un formulaire de recherche caché, prêt à être soumis."""
+    try:
+        driver.execute_script("""
+            const [formId, action, fields] = arguments;
+            document.getElementById(formId)?.remove();
+            const form = document.createElement('form');
+            form.id = formId;
+            form.method = 'POST';
+            form.action = action;
+            form.style.display = 'none';
+            for (const [name, value] of Object.entries(fields)) {
+                for (const item of [].concat(value)) {
+                    const input = document.createElement('input');
+                    input.type = 'hidden';
+                    input.name = name;
+                    input.value = item;
+                    form.appendChild(input);
+                }
+            }
+            document.body.appendChild(form);
+        """, STAGED_SEARCH_FORM_ID, f"{TENNIS_BASE_URL}?{urlencode(SEARCH_PARAMS)}", query)
+    except WebDriverException as e:
+        raise RuntimeError(
+            f"Erreur lors de la préparation du formulaire de recherche : {str(e)}")
+
+
+@traced
+def submit_staged_search(driver):
+    """Soumet le formulaire préparé par stage_search_form."""
+    try:
+        driver.execute_script(
+            "document.getElementById(arguments[0]).submit();", STAGED_SEARCH_FORM_ID)
+    except WebDriverException as e:
+        raise RuntimeError(
+            f"Erreur lors de l'ouverture des résultats de recherche : {str(e)}")
+
+
+def open_search_results(driver, query):
+    """Soumet directement le formulaire de recherche depuis la page de tennis, sans remplir les filtres."""
+    stage_search_form(driver, query)
+    submit_staged_search(driver)
+
+
+@traced
+def search_available_slots(cookies, date, start_time, end_time, court_type):
+    """Recherche les créneaux par HTTP. Retourne None si la recherche HTTP est indisponible."""
+    if not cookies:
+        return None
+    try:
+        return SearchClient(cookies).search(date, start_time, end_time, court_type)
+    except RuntimeError as e:
+        logging.warning(f"HTTP search unavailable, falling back to the browser: {e}")
+        return None
+
+
+@traced
 def select_location_and_time(driver, date):
     """Sélectionne l'emplacement et l'heure du créneau."""
     # locale.setlocale(locale.LC_TIME, 'fr_FR.UTF-8')  # Sur Linux/Mac
@@ -68,21 +132,22 @@ def select_location_and_time(driver, date):
     try:
         date_obj = datetime.strptime(date, '%Y-%m-%d')
         formatted_date = date_obj.strftime("%A %d %B")
-        where_token = WebDriverWait(driver, 10).until(
+        where_token = TracedWebDriverWait(driver, 10).until(
             EC.presence_of_element_located(
                 (By.CSS_SELECTOR, 'ul#whereToken input'))
         )
-        where_token.send_keys('Elisabeth')
-        time.sleep(0.5)
-        ActionChains(driver).send_keys(
-            Keys.ARROW_DOWN).send_keys(Keys.ENTER).perform()
-        time.sleep(0.5)
-        when_field = WebDriverWait(driver, 10).until(
+        # Attend les suggestions, puis le jeton du lieu choisi.
+        with dom_settled(driver, fallback_secs=0.5):
+            where_token.send_keys('Elisabeth')
+        with dom_settled(driver, fallback_secs=0.5):
+            ActionChains(driver).send_keys(
+                Keys.ARROW_DOWN).send_keys(Keys.ENTER).perform()
+        when_field = TracedWebDriverWait(driver, 10).until(
             EC.element_to_be_clickable((By.ID, 'when'))
         )
         when_field.click()
 
-        date_button = WebDriverWait(driver, 10).until(
+        date_button = TracedWebDriverWait(driver, 10).until(
             EC.element_to_be_clickable((By.XPATH, f"//div[@class='date' and normalize-space(text()) = '{formatted_date}']")
                                        ))
         date_button.click()
@@ -94,26 +159,27 @@ def select_location_and_time(driver, date):
             f"Erreur lors de la sélection du lieu et de l'heure : {str(e)}")
 
 
+@traced
 def select_terrain(driver, court_type: CourtType):
     """Sélectionne le type de terrain."""
     try:
         if court_type == CourtType.BOTH.value:
             return
 
-        dropdown_button = WebDriverWait(driver, 20).until(
+        dropdown_button = TracedWebDriverWait(driver, 20).until(
             EC.presence_of_element_located((By.ID, 'dropdownTerrain'))
         )
-        time.sleep(1)
+        wait_page_ready(driver, fallback_secs=1)
 
         dropdown_button.click()
 
         if court_type == CourtType.INDOOR.value:
-            label = WebDriverWait(driver, 10).until(
+            label = TracedWebDriverWait(driver, 10).until(
                 EC.element_to_be_clickable(
                     (By.CSS_SELECTOR, 'label[for="chckDécouvert"]'))
             )
         else:
-            label = WebDriverWait(driver, 10).until(
+            label = TracedWebDriverWait(driver, 10).until(
                 EC.element_to_be_clickable(
                     (By.CSS_SELECTOR, 'label[for="chckCouvert"]'))
             )
@@ -128,14 +194,15 @@ def select_terrain(driver, court_type: CourtType):
             f"Erreur lors de la sélection du terrain : {str(e)}")
 
 
+@traced
 def handle_slider(driver, start_time, end_time):
     """Manipule le slider (sélection des créneaux)."""
     try:
         start_time_diff = abs(8 - start_time)
         end_time_diff = abs(22 - end_time)
-        time.sleep(0.5)
+        wait_page_ready(driver, fallback_secs=0.5)
 
-        tooltip1 = WebDriverWait(driver, 10).until(
+        tooltip1 = TracedWebDriverWait(driver, 10).until(
             EC.presence_of_element_located((By.CLASS_NAME, 'tooltip1'))
         )
         parent_span1 = tooltip1.find_element(By.XPATH, 'parent::span')
@@ -143,9 +210,9 @@ def handle_slider(driver, start_time, end_time):
 
         for _ in range(start_time_diff):
             ActionChains(driver).send_keys(Keys.ARROW_RIGHT).perform()
-            time.sleep(0.1)
+            pause(0.1)
 
-        tooltip2 = WebDriverWait(driver, 10).until(
+        tooltip2 = TracedWebDriverWait(driver, 10).until(
             EC.presence_of_element_located((By.CLASS_NAME, 'tooltip2'))
         )
         parent_span2 = tooltip2.find_element(By.XPATH, 'parent::span')
@@ -153,7 +220,7 @@ def handle_slider(driver, start_time, end_time):
 
         for _ in range(end_time_diff):
             ActionChains(driver).send_keys(Keys.ARROW_LEFT).perform()
-            time.sleep(0.1)
+            pause(0.1)
 
     except TimeoutException:
         raise RuntimeError(
@@ -163,10 +230,11 @@ def handle_slider(driver, start_time, end_time):
             f"Erreur lors de la manipulation du slider : {str(e)}")
 
 
+@traced
 def click_search_button(driver):
     """Clique sur le bouton pour valider les filtres et faire la recherche."""
     try:
-        search_button = WebDriverWait(driver, 10).until(
+        search_button = TracedWebDriverWait(driver, 10).until(
             EC.element_to_be_clickable((By.ID, 'rechercher'))
         )
         search_button.click()
@@ -175,42 +243,170 @@ def click_search_button(driver):
             "Erreur : Le bouton de recherche n'a pas pu être cliqué dans le délai imparti.")
 
 
-def is_no_result_element_found(driver):
-    """Retourne True si l'élément est trouvé, sinon False."""
+FILL_SEARCH_FORM_SCRIPT = """
+const [fields, buttonId] = arguments;
+const button = document.getElementById(buttonId);
+const form = button && button.form;
+if (!form) return ['form'];
+const missing = Object.keys(fields).filter(name => !form.elements[name]);
+if (missing.length) return missing;
+for (const [name, value] of Object.entries(fields)) {
+    const values = [].concat(value);
+    for (const input of form.querySelectorAll(`[name="${name}"]`)) {
+        if (input.type === 'checkbox') input.checked = values.includes(input.value);
+        else input.value = values[0];
+        input.dispatchEvent(new Event('change', {bubbles: true}));
+    }
+}
+form.requestSubmit(button);
+return [];
+"""
+
+
+@traced
+def fill_search_form(driver, date, start_time, end_time, court_type):
+    """
+    Remplit le lieu, la date, le type de terrain et la plage horaire du
+    formulaire de recherche, puis le soumet, en un seul aller-retour.
+    """
     try:
-        WebDriverWait(driver, 3).until(
-            EC.presence_of_all_elements_located(
-                (By.CLASS_NAME, 'no_result'))
-        )
-        return True
+        TracedWebDriverWait(driver, 10).until(
+            EC.presence_of_element_located((By.ID, 'rechercher')))
+        missing = driver.execute_script(
+            FILL_SEARCH_FORM_SCRIPT, build_search_query(date, start_time, end_time, court_type), 'rechercher')
     except TimeoutException:
-        return False
+        raise RuntimeError(
+            "Erreur : Le formulaire de recherche n'a pas été trouvé dans le délai imparti.")
+    except WebDriverException as e:
+        raise RuntimeError(
+            f"Erreur lors du remplissage du formulaire de recherche : {str(e)}")
+    if missing:
+        raise RuntimeError(
+            f"Erreur : Champs absents du formulaire de recherche : {', '.join(missing)}")
 
 
-def click_first_booking_button(driver):
-    """Clique sur le premier bouton pour réserver un créneau de tennis après la recherche."""
+def search_with_form(driver, date, start_time, end_time, court_type):
+    """
+    Lance la recherche depuis le formulaire de la page de tennis, par script
+    si SEARCH_FORM_MODE le permet, sinon au clavier. Le clavier prend aussi le
+    relais si le formulaire a changé ou si la soumission par script n'aboutit
+    pas à une page de résultats.
+    """
+    if SEARCH_FORM_MODE == 'script':
+        try:
+            fill_search_form(driver, date, start_time, end_time, court_type)
+            extract_search_results(driver, SCRIPTED_SEARCH_TIMEOUT_SECS)
+            return
+        except RuntimeError as e:
+            logging.warning(f"Scripted search form unavailable, falling back to the keyboard: {e}")
+            navigate_to_tennis_page(driver)
+    select_location_and_time(driver, date)
+    select_terrain(driver, court_type)
+    handle_slider(driver, start_time, end_time)
+    click_search_button(driver)
+
+
+BOOKING_BUTTON_SELECTOR = '.search-result-block .tennis-court button.btn'
+
+# Lit toute la page de résultats : null tant qu'elle n'est pas chargée, sinon
+# {no_result, results} avec les mêmes champs que search_client.parse_search_results.
+EXTRACT_RESULTS_SCRIPT = """
+const selector = arguments[0];
+if (document.querySelector('.no_result')) return {no_result: true, results: []};
+const blocks = document.querySelectorAll('.search-result-block');
+if (!blocks.length) return null;
+const buttons = [...document.querySelectorAll(selector)];
+const results = [];
+for (const block of blocks) {
+    const heading = block.querySelector('h4');
+    for (const court of block.querySelectorAll('.tennis-court')) {
+        const button = court.querySelector('button.btn');
+        if (!button) continue;
+        const texts = [];
+        const walker = document.createTreeWalker(court, NodeFilter.SHOW_TEXT);
+        while (walker.nextNode()) {
+            const text = walker.currentNode.textContent.trim();
+            if (text && !button.contains(walker.currentNode)) texts.push(text);
+        }
+        const lowered = texts.join(' ').toLowerCase();
+        const dateDeb = button.getAttribute('datedeb');
+        const hour = dateDeb ? dateDeb.match(/ (\\d{1,2}):/) : block.textContent.match(/(\\d{1,2})\\s*h/);
+        results.push({
+            index: buttons.indexOf(button),
+            tennis: heading ? heading.textContent.trim() : '',
+            court: texts[0] || '',
+            surface: texts.slice(1).find(text => !text.toLowerCase().includes('couvert')) || null,
+            covered: lowered.includes('découvert') ? false : lowered.includes('couvert') ? true : null,
+            hour: hour ? parseInt(hour[1], 10) : null,
+            court_id: button.getAttribute('courtid'),
+            date_deb: dateDeb,
+            date_fin: button.getAttribute('datefin'),
+        });
+    }
+}
+return {no_result: false, results};
+"""
+
+CLICK_RESULT_SCRIPT = """
+const [selector, index, courtId] = arguments;
+const button = document.querySelectorAll(selector)[index];
+if (!button || button.getAttribute('courtid') !== courtId) return false;
+button.click();
+return true;
+"""
+
+
+@traced
+def extract_search_results(driver, timeout=10):
+    """
+    Retourne {"no_result": bool, "results": [...]} pour la page de résultats,
+    lue en un seul execute_script dès qu'elle est chargée.
+    """
     try:
-        if is_no_result_element_found(driver):
-            raise RuntimeError(
-                "Erreur : Aucun créneau disponible avec les filtres choisis.")
-
-        first_booking_button = WebDriverWait(driver, 10).until(
-            EC.element_to_be_clickable((By.XPATH, "//div[contains(@class, 'search-result-block')]//div[contains(@class, 'row tennis-court')]//button[contains(@class, 'btn')]")
-                                       ))
-        first_booking_button.click()
+        # Le script peut tomber pendant le déchargement de la page précédente.
+        return TracedWebDriverWait(driver, timeout, ignored_exceptions=(JavascriptException,)).until(
+            lambda d: d.execute_script(EXTRACT_RESULTS_SCRIPT, BOOKING_BUTTON_SELECTOR))
     except TimeoutException:
+        raise RuntimeError(
+            "Erreur : La page de résultats ne s'est pas chargée dans le délai imparti.")
+    except WebDriverException as e:
+        raise RuntimeError(
+            f"Erreur lors de la lecture des résultats de recherche : {str(e)}")
+
+
+@traced
+def click_preferred_booking_button(driver, preferences=None):
+    """
+    Clique sur le bouton du créneau le mieux classé par les préférences
+    (court, surface, heure) et retourne ce créneau.
+    """
+    page = extract_search_results(driver)
+    if page['no_result'] or not page['results']:
+        raise NoSlotAvailable(
+            "Erreur : Aucun créneau disponible avec les filtres choisis.")
+
+    slot = (preferences or slot_preferences).rank(page['results'])[0]
+    try:
+        clicked = driver.execute_script(
+            CLICK_RESULT_SCRIPT, BOOKING_BUTTON_SELECTOR, slot['index'], slot['court_id'])
+    except WebDriverException as e:
+        raise RuntimeError(
+            f"Erreur lors du clic sur le bouton de réservation : {str(e)}")
+    if not clicked:
         raise RuntimeError(
             "Erreur : Impossible de cliquer sur le bouton de réservation.")
+    return slot
 
 
+@traced
 def switch_to_iframe(driver):
     """Passe au contexte iframe pour gérer le captcha."""
     try:
-        time.sleep(1)
-        iframe = WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.ID, 'li-antibot-iframe'))
+        pause(1)
+        # Le contenu du captcha est attendu dans l'iframe par les étapes suivantes.
+        TracedWebDriverWait(driver, 10).until(
+            EC.frame_to_be_available_and_switch_to_it((By.ID, 'li-antibot-iframe'))
         )
-        driver.switch_to.frame(iframe)
     except TimeoutException:
         raise RuntimeError("Erreur : Iframe non trouvé dans le délai imparti.")
 
@@ -223,10 +419,11 @@ def switch_to_default_frame(driver):
         raise RuntimeError(f"Error switching to the default frame: {e}")
 
 
+@traced
 def get_screenshot_captcha(driver):
     """Captures a screenshot of the captcha as base64."""
     try:
-        image_div = WebDriverWait(driver, 10).until(
+        image_div = TracedWebDriverWait(driver, 10).until(
             EC.visibility_of_element_located(
                 (By.ID, "li-antibot-questions-container"))
         )
@@ -235,35 +432,62 @@ def get_screenshot_captcha(driver):
         raise RuntimeError(f"Error capturing captcha screenshot: {e}")
 
 
+@traced
 def solve_captcha(driver):
     """Attempts to solve the captcha by interacting with the iframe and using an external solver."""
+    # Le solveur local n'est plus essayé après une réponse refusée par le site.
+    use_local = True
     try:
-        for _ in range(3):
+        for captcha_attempt in range(3):
+            image_data = None
+            solver = None
+            response = {}
+            submitted = False
             try:
+                publish_event('booking', step='captcha_attempt',
+                              attempt=captcha_attempt + 1)
                 switch_to_iframe(driver)
 
                 image_data = get_screenshot_captcha(driver)
 
-                response = solve_capcha_with_gpt(image_data)
-
-                input_field = WebDriverWait(driver, 10).until(
+                # Solveur local puis appels GPT parallèles avec vote, sous une échéance.
+                response = solve_capcha_hedged(image_data, use_local)
+                solver = response.get('solver')
+                record_span('solve_capcha_hedged', response.get(
+                    'duration_secs'), response.get('success', False))
+                if solver == 'local':
+                    use_local = False
+                if not response.get('success', False):
+                    raise RuntimeError(response.get('err_msg'))
+
+                input_field = TracedWebDriverWait(driver, 10).until(
                     EC.presence_of_element_located(
                         (By.ID, 'li-antibot-answer'))
                 )
                 input_field.send_keys(response.get('response'))
 
-                validate_button = WebDriverWait(driver, 10).until(
+                validate_button = TracedWebDriverWait(driver, 10).until(
                     EC.element_to_be_clickable((By.ID, 'li-antibot-validate'))
                 )
                 validate_button.click()
+                submitted = True
 
-                WebDriverWait(driver, 5).until(
+                TracedWebDriverWait(driver, 5).until(
                     EC.presence_of_element_located(
                         (By.ID, 'li-antibot-check-img'))
                 )
+                _save_captcha_attempt(image_data, response, solver, True)
                 return
 
             except Exception as e:
+                if submitted and isinstance(e, TimeoutException):
+                    reason = f"answer {response.get('response')!r} rejected"
+                else:
+                    reason = str(e) or type(e).__name__
+                logging.warning(
+                    f"Captcha attempt {captcha_attempt + 1}/3 failed ({solver or 'no solver'}): {reason}")
+                _save_captcha_attempt(
+                    image_data, response, solver, False if submitted else None, reason)
                 switch_to_default_frame(driver)
 
         raise RuntimeError(
@@ -273,10 +497,18 @@ def solve_captcha(driver):
         switch_to_default_frame(driver)
 
 
+def _save_captcha_attempt(image_data, response, solver, accepted, reason=None):
+    if image_data is None or solver is None:
+        return
+    save_sample(image_data, response.get('response'), solver, accepted,
+                response.get('duration_secs'), response.get('cost_usd'), reason)
+
+
+@traced
 def go_to_add_partenaire(driver):
     """Navigates to the "Add Partner" section by clicking the appropriate button."""
     try:
-        submit_control = WebDriverWait(driver, 10).until(
+        submit_control = TracedWebDriverWait(driver, 10).until(
             EC.element_to_be_clickable((By.ID, 'submitControle'))
         )
         submit_control.click()
@@ -284,9 +516,10 @@ def go_to_add_partenaire(driver):
         raise RuntimeError(f"Error navigating to Add Partner section: {e}")
 
 
+@traced
 def add_partenaire(driver):
     try:
-        name_input = WebDriverWait(driver, 10).until(
+        name_input = TracedWebDriverWait(driver, 10).until(
             EC.visibility_of_element_located(
                 (By.XPATH,
                  "//div[@class='form-group has-feedback name']//input[@name='player1']")
@@ -294,7 +527,7 @@ def add_partenaire(driver):
         )
         name_input.send_keys("Lelandais")
 
-        firstname_input = WebDriverWait(driver, 10).until(
+        firstname_input = TracedWebDriverWait(driver, 10).until(
             EC.visibility_of_element_located(
                 (By.XPATH,
                  "//div[@class='form-group has-feedback firstname']//input[@name='player1']")
@@ -307,9 +540,10 @@ def add_partenaire(driver):
         raise RuntimeError(f"Error in add_partenaire: {str(e)}")
 
 
+@traced
 def select_payment_formule(driver):
     try:
-        selected_table = WebDriverWait(driver, 10).until(
+        selected_table = TracedWebDriverWait(driver, 10).until(
             EC.element_to_be_clickable(
                 (By.CSS_SELECTOR,
                  "table.price-item.text-center.option[paymentmode='existingTicket']")
@@ -317,7 +551,7 @@ def select_payment_formule(driver):
         )
         selected_table.click()
 
-        button_next_step = WebDriverWait(driver, 10).until(
+        button_next_step = TracedWebDriverWait(driver, 10).until(
             EC.element_to_be_clickable(
                 (By.ID, 'submit')
             )
@@ -347,46 +581,264 @@ def check_inputs(date, start_time, end_time, court_type):
             f"court_type must be one of the following: {[ct.value for ct in CourtType]}, got: {court_type}.")
 
 
-def booking_tennis(date, start_time, end_time, court_type, account):
-    """Attempts to book a tennis slot with retries on failure."""
-    max_attempts = 3
+def add_partner(driver):
+    """Passe à l'étape du partenaire et le renseigne."""
+    go_to_add_partenaire(driver)
+    add_partenaire(driver)
+    publish_event('booking', step='partner_added')
 
-    for attempt in range(max_attempts):
-        try:
-            # Input validation
-            check_inputs(date, start_time, end_time, court_type)
 
-            # Setup and navigation
-            driver = setup_driver()
-            login(driver, account)
-            navigate_to_tennis_page(driver)
+def pay(driver, race=None):
+    """Paie avec le carnet ; avec `race`, seulement si aucune tentative concurrente n'a payé."""
+    if race is None:
+        select_payment_formule(driver)
+        return
 
-            # Booking process
-            select_location_and_time(driver, date)
-            select_terrain(driver, court_type)
-            handle_slider(driver, start_time, end_time)
-            click_search_button(driver)
-            click_first_booking_button(driver)
-            solve_captcha(driver)
-            go_to_add_partenaire(driver)
-            add_partenaire(driver)
-            select_payment_formule(driver)
+    # Une seule des tentatives concurrentes va jusqu'au paiement.
+    with race.claim():
+        select_payment_formule(driver)
 
-            return {"isSuccess": True, "message": "Booking successful."}
 
-        except RuntimeError as e:
-            if attempt == max_attempts - 1 or attempt == 0:
-                return {"isSuccess": False, "message": str(e)}
-        except Exception as e:
-            if attempt == max_attempts - 1:
-                return {"isSuccess": False, "message": f"Unknown error: {str(e)}"}
+def confirm_booking(driver, race=None):
+    """Termine une réservation après le clic sur un créneau : captcha, partenaire, paiement."""
+    solve_captcha(driver)
+    add_partner(driver)
+    pay(driver, race)
+
+
+class BookingSession:
+    """État d'une réservation partagé par les étapes du pipeline et conservé d'une tentative à l'autre."""
+
+    def __init__(self, date, start_time, end_time, court_type, account, race):
+        self.date = date
+        self.start_time = start_time
+        self.end_time = end_time
+        self.court_type = court_type
+        self.account = account
+        self.race = race
+        self.driver = None
+        self.cookies = None
+        self.results = None
+
+    def check_race(self):
+        if self.race is not None:
+            self.race.check()
+
+
+def _step_validate(session):
+    check_inputs(session.date, session.start_time,
+                 session.end_time, session.court_type)
+
+
+def _step_search(session):
+    # Recherche HTTP : le navigateur n'est ouvert que s'il y a un créneau à réserver
+    session.cookies = get_cached_cookies(session.account)
+    session.results = search_available_slots(
+        session.cookies, session.date, session.start_time, session.end_time, session.court_type)
+    if session.results is not None and not session.results:
+        raise NoSlotAvailable(
+            "Erreur : Aucun créneau disponible avec les filtres choisis.")
+    if session.results:
+        publish_event('booking', step='results_found',
+                      count=len(session.results))
+
+
+def _step_authenticate(session):
+    session.check_race()
+    if session.driver is None:
+        session.driver = driver_pool.acquire()
+    authenticate(session.driver, session.account, login, session.cookies)
+    publish_event('booking', step='logged_in')
+
+
+def _step_open_search_page(session):
+    navigate_to_tennis_page(session.driver)
+
+
+def _step_search_results(session):
+    if session.results:
+        open_search_results(session.driver, build_search_query(
+            session.date, session.start_time, session.end_time, session.court_type))
+    else:
+        search_with_form(session.driver, session.date,
+                         session.start_time, session.end_time, session.court_type)
+
+
+def _step_select_slot(session):
+    session.check_race()
+    slot = click_preferred_booking_button(session.driver)
+    publish_event('booking', step='slot_selected', court=slot['court'],
+                  surface=slot['surface'], hour=slot['hour'])
+    session.check_race()
+
+
+def _step_captcha(session):
+    solve_captcha(session.driver)
+
+
+def _step_partner(session):
+    add_partner(session.driver)
+
+
+def _step_payment(session):
+    pay(session.driver, session.race)
+
+
+# Un échec après l'ouverture de la page de recherche (résultats, créneau,
+# captcha, partenaire, paiement) laisse une page inexploitable : la reprise
+# relance la recherche dans la même session plutôt que tout le pipeline.
+# Attente de reprise au-delà de laquelle le navigateur est rendu au pool (une
+# nouvelle recherche après un captcha raté le garde, une panne du site non).
+KEEP_DRIVER_MAX_DELAY_SECS = float(os.getenv('BOOKING_KEEP_DRIVER_MAX_DELAY_SECS', '5'))
+
+BOOKING_PIPELINE = ResumablePipeline([
+    Step('validate', _step_validate),
+    Step('search', _step_search),
+    Step('authenticate', _step_authenticate),
+    Step('open_search_page', _step_open_search_page),
+    Step('search_results', _step_search_results, resume_from='open_search_page'),
+    Step('select_slot', _step_select_slot, resume_from='open_search_page'),
+    Step('captcha', _step_captcha, resume_from='open_search_page'),
+    Step('partner', _step_partner, resume_from='open_search_page'),
+    Step('payment', _step_payment, resume_from='open_search_page'),
+])
+
+
+def _session_rewind(session, cause):
+    """
+    Retourne 'authenticate' si la session du navigateur est perdue (driver
+    cassé ou renvoyé au formulaire de connexion), None si elle reste utilisable.
+    """
+    if session.driver is None:
+        return None
+    try:
+        broken = isinstance(cause, WebDriverException) and not isinstance(
+            cause, TimeoutException)
+        logged_out = not broken and AUTH_HOST in session.driver.current_url
+    except WebDriverException:
+        broken = True
+    if broken:
+        driver_pool.release(session.driver, broken=True)
+        session.driver = None
+    elif not logged_out:
+        return None
+    # Les cookies en mémoire ne sont plus valides : authenticate revérifie ceux enregistrés.
+    session.cookies = None
+    return 'authenticate'
+
+
+class BookingRun:
+    """
+    Une réservation en cours : la session, les échecs déjà rencontrés et le
+    point de reprise. Chaque tentative s'exécute dans le thread qui l'appelle ;
+    après un échec, la suivante est planifiée selon la politique de reprise au
+    lieu d'attendre dans le thread.
+    """
+
+    def __init__(self, session, policy, on_done):
+        self.session = session
+        self.policy = policy
+        self.on_done = on_done
+        self.started_at = time.monotonic()
+        self.attempts = 0
+        self.failures = Counter()
+        self.resume = None
+
+    def attempt(self):
+        self.attempts += 1
+        start_attempt('booking')
+        try:
+            publish_event('booking', step='searching', attempt=self.attempts)
+            self.session.check_race()
+            BOOKING_PIPELINE.run(self.session, self.resume)
+            result = {"isSuccess": True, "message": "Booking successful."}
+        except BookingCancelled as e:
+            result = {"isSuccess": False, "message": str(e)}
+        except StepFailed as failure:
+            result = self._retry_or_fail(failure)
         finally:
-            try:
-                driver.quit()
-            except Exception:
-                print("Error closing the browser.")
+            finish_attempt()
 
-        if attempt < max_attempts - 1:
-            time.sleep(120)
+        if result is not None:
+            self._finish(result)
 
-    return {"isSuccess": False, "message": "All booking attempts failed."}
+    def _retry_or_fail(self, failure):
+        """Planifie la reprise et retourne None, ou retourne le résultat d'échec final."""
+        cause = failure.cause
+        if isinstance(cause, (RuntimeError, ValueError)):
+            message = str(cause)
+        else:
+            message = f"Unknown error: {str(cause)}"
+
+        failure_class = classify_failure(failure.step, cause)
+        self.failures[failure_class] += 1
+        delay = self.policy.next_delay(failure_class, self.failures[failure_class], self.attempts,
+                                       time.monotonic() - self.started_at)
+        if delay is None:
+            logging.warning(
+                f"Booking attempt {self.attempts} failed at {failure.step} ({failure_class}): {message} "
+                f"(giving up)")
+            return {"isSuccess": False, "message": message, "failure": failure_class}
+
+        # Reprise au dernier point sûr, dans la même session si elle est intacte.
+        rewind = _session_rewind(self.session, cause)
+        if delay > KEEP_DRIVER_MAX_DELAY_SECS and self.session.driver is not None:
+            # Le navigateur ne reste pas bloqué pendant l'attente : la reprise se reconnecte.
+            driver_pool.release(self.session.driver)
+            self.session.driver = None
+            rewind = 'authenticate'
+        self.resume = BOOKING_PIPELINE.resume_point(failure.step, rewind)
+        logging.warning(
+            f"Booking attempt {self.attempts} failed at {failure.step} ({failure_class}): {message} "
+            f"(resuming from {self.resume} in {delay:.0f} s)")
+        publish_event('booking', step='retry_scheduled', failure=failure_class,
+                      delay=round(delay), message=message)
+        schedule_retry(self.attempt, delay, self.session.race)
+        return None
+
+    def _finish(self, result):
+        driver_pool.release(self.session.driver)
+        self.session.driver = None
+        publish_event('booking', step='paid' if result["isSuccess"] else 'failed',
+                      message=result["message"])
+        if result["isSuccess"]:
+            # Une heure du carnet vient d'être consommée.
+            remaining_hours_cache.invalidate(self.session.account.get('id'))
+        try:
+            self.on_done(result)
+        except Exception as e:
+            logging.error(f"Erreur dans le traitement du résultat de la réservation : {str(e)}")
+
+
+def start_booking(date, start_time, end_time, court_type, account, race=None, on_done=None, policy=None):
+    """
+    Starts booking a tennis slot without blocking on retries.
+
+    The first attempt runs in the calling thread. A failed attempt is
+    classified (see modules/retry_policy.py) and, when the policy allows it,
+    the next one is scheduled as a future job that resumes from the last safe
+    step of BOOKING_PIPELINE in the same browser session. `on_done(result)` is
+    called once with the final result, from the thread of the last attempt.
+
+    When `race` is given, the booking stops as soon as a concurrent attempt
+    sharing the same BookingRace has booked.
+
+    Each step is published on the event stream (see modules/events.py), tagged
+    with the slot and the account.
+    """
+    session = BookingSession(date, start_time, end_time,
+                             court_type, account, race)
+    run = BookingRun(session, policy or booking_retry_policy,
+                     on_done or (lambda result: None))
+    # Le contexte est copié par schedule_retry : les reprises gardent ces champs.
+    with event_context(date=date, start_time=start_time, end_time=end_time,
+                       court_type=court_type, account_id=account.get('id')):
+        run.attempt()
+
+
+def booking_tennis(date, start_time, end_time, court_type, account, race=None):
+    """Blocking version of start_booking: waits for the final result, retries included."""
+    done = Future()
+    start_booking(date, start_time, end_time, court_type,
+                  account, race, done.set_result)
+    return done.result()
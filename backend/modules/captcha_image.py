@@ -0,0 +1,50 @@
+import base64
+import io
+import logging
+import os
+import numpy as np
+from PIL import Image, ImageFilter
+from modules.local_captcha_model import binarize, remove_thin_lines
+
+# Hauteur cible : assez pour distinguer 0/O et l/1, bien moins que la capture d'origine.
+CAPTCHA_IMAGE_HEIGHT = int(os.getenv('CAPTCHA_IMAGE_HEIGHT', '48'))
+CROP_MARGIN = 4
+
+
+def glyph_bounding_box(image):
+    """Boîte (gauche, haut, droite, bas) qui contient les caractères, sans les lignes de bruit."""
+    ink = remove_thin_lines(binarize(image))
+    rows = np.flatnonzero(ink.any(axis=1))
+    columns = np.flatnonzero(ink.any(axis=0))
+    if rows.size == 0 or columns.size == 0:
+        return 0, 0, image.width, image.height
+    return (
+        max(0, columns[0] - CROP_MARGIN),
+        max(0, rows[0] - CROP_MARGIN),
+        min(image.width, columns[-1] + 1 + CROP_MARGIN),
+        min(image.height, rows[-1] + 1 + CROP_MARGIN),
+    )
+
+
+def preprocess_captcha(image_source_in_base64, height=CAPTCHA_IMAGE_HEIGHT):
+    """
+    Réduit la capture du captcha avant l'envoi au solveur : recadrage serré sur
+    les caractères, niveaux de gris, filtre médian contre le bruit ponctuel,
+    réduction à `height` pixels de haut et PNG optimisé (sans perte). En cas
+    d'erreur, l'image d'origine est retournée telle quelle.
+    """
+    try:
+        with Image.open(io.BytesIO(base64.b64decode(image_source_in_base64))) as image:
+            gray = image.convert('L')
+        gray = gray.crop(glyph_bounding_box(gray)).filter(
+            ImageFilter.MedianFilter(3))
+        if gray.height > height:
+            gray = gray.resize(
+                (max(1, round(gray.width * height / gray.height)), height), Image.LANCZOS)
+
+        buffer = io.BytesIO()
+        gray.save(buffer, format='PNG', optimize=True)
+        return base64.b64encode(buffer.getvalue()).decode()
+    except Exception as e:
+        logging.error(f"Erreur lors du prétraitement du captcha: {str(e)}")
+        return image_source_in_base64
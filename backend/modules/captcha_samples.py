@@ -0,0 +1,141 @@
+"""
+Captchas rencontrés pendant les réservations, avec la réponse soumise et le
+verdict du site, pour mesurer les solveurs et entraîner le solveur local.
+
+    cd backend && python -m modules.captcha_samples export <dossier>
+    cd backend && python -m modules.captcha_samples label <id> <réponse>
+
+`export` écrit les captchas étiquetés au format attendu par
+modules/local_captcha_model.py (PNG + labels.json).
+"""
+import argparse
+import base64
+import json
+import logging
+import os
+import sqlite3
+import threading
+
+# Fichier séparé de slots.db : les images (PNG brut, ~5 Ko) n'alourdissent pas la base de l'application.
+SAMPLES_DB = os.getenv('CAPTCHA_SAMPLES_DB', 'captcha_samples.db')
+SAMPLES_ENABLED = os.getenv('CAPTCHA_SAMPLES', '1') == '1'
+
+_init_lock = threading.Lock()
+_initialized = set()
+
+
+def _connect():
+    conn = sqlite3.connect(SAMPLES_DB, timeout=5)
+    with _init_lock:
+        if SAMPLES_DB not in _initialized:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS samples (
+                    id INTEGER PRIMARY KEY,
+                    created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                    image BLOB NOT NULL,
+                    answer TEXT,
+                    solver TEXT NOT NULL,
+                    accepted INTEGER,
+                    label TEXT,
+                    duration_ms REAL,
+                    cost_usd REAL,
+                    reason TEXT
+                )
+            """)
+            _initialized.add(SAMPLES_DB)
+    return conn
+
+
+def save_sample(image_base64, answer, solver, accepted, duration_secs=None, cost_usd=None, reason=None):
+    """
+    Enregistre une tentative de captcha. `accepted` vaut True si le site a
+    affiché li-antibot-check-img, False s'il a refusé la réponse, None si la
+    réponse n'a pas pu être soumise. Une réponse acceptée sert d'étiquette.
+    """
+    if not SAMPLES_ENABLED:
+        return {"isSuccess": True, "message": "Collecte des captchas désactivée"}
+    try:
+        conn = _connect()
+        with conn:
+            conn.execute("""
+                INSERT INTO samples (image, answer, solver, accepted, label, duration_ms, cost_usd, reason)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                base64.b64decode(image_base64),
+                answer,
+                solver,
+                None if accepted is None else int(accepted),
+                answer if accepted else None,
+                None if duration_secs is None else duration_secs * 1000,
+                cost_usd,
+                reason
+            ))
+        conn.close()
+        return {"isSuccess": True, "message": "Captcha enregistré"}
+    except Exception as e:
+        logging.error(f"Erreur lors de l'enregistrement du captcha: {str(e)}")
+        return {"isSuccess": False, "message": f"Erreur inconnue: {str(e)}"}
+
+
+def iter_labeled_samples(limit=None):
+    """Itère sur (id, image PNG en octets, étiquette) des captchas dont la réponse est connue."""
+    conn = _connect()
+    try:
+        cursor = conn.execute(
+            "SELECT id, image, label FROM samples WHERE label IS NOT NULL ORDER BY id LIMIT ?",
+            (-1 if limit is None else limit,))
+        for row in cursor:
+            yield row[0], row[1], row[2]
+    finally:
+        conn.close()
+
+
+def set_sample_label(sample_id, label):
+    """Étiquette à la main un captcha refusé, pour l'ajouter au jeu de données."""
+    try:
+        conn = _connect()
+        with conn:
+            cursor = conn.execute(
+                "UPDATE samples SET label = ? WHERE id = ?", (label, sample_id))
+        conn.close()
+        if cursor.rowcount == 0:
+            return {"isSuccess": False, "message": "Captcha introuvable"}
+        return {"isSuccess": True, "message": "Étiquette enregistrée"}
+    except Exception as e:
+        logging.error(f"Erreur lors de l'étiquetage du captcha: {str(e)}")
+        return {"isSuccess": False, "message": f"Erreur inconnue: {str(e)}"}
+
+
+def export_samples(directory):
+    """Écrit les captchas étiquetés en PNG avec un labels.json. Retourne leur nombre."""
+    os.makedirs(directory, exist_ok=True)
+    labels = {}
+    for sample_id, image, label in iter_labeled_samples():
+        filename = f"{sample_id}.png"
+        with open(os.path.join(directory, filename), 'wb') as file:
+            file.write(image)
+        labels[filename] = label
+    with open(os.path.join(directory, 'labels.json'), 'w', encoding='utf-8') as file:
+        json.dump(labels, file, ensure_ascii=False, indent=1)
+    return len(labels)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+    export = commands.add_parser('export')
+    export.add_argument('directory')
+    label = commands.add_parser('label')
+    label.add_argument('id', type=int)
+    label.add_argument('label')
+    args = parser.parse_args()
+
+    if args.command == 'export':
+        print(f"{export_samples(args.directory)} captchas exportés dans {args.directory}")
+    else:
+        print(set_sample_label(args.id, args.label)["message"])
+
+
+if __name__ == '__main__':
+    main()
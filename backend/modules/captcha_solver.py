@@ -0,0 +1,135 @@
+import functools
+import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from modules.captcha_image import preprocess_captcha
+from modules.database import add_captcha_solve
+from modules.gpt_capcha_model import CAPTCHA_PREPROCESS, solve_capcha_with_gpt
+from modules.local_captcha_model import CAPTCHA_LENGTH, solve_capcha_locally
+
+# Requêtes GPT lancées en parallèle pour chaque captcha, réparties sur les modèles et les deux prompts.
+CAPTCHA_HEDGE_REQUESTS = int(os.getenv('CAPTCHA_HEDGE_REQUESTS', '3'))
+CAPTCHA_GPT_MODELS = [model for model in os.getenv(
+    'CAPTCHA_GPT_MODELS', os.getenv('AZURE_GPT_MODEL', '')).split(',') if model]
+CAPTCHA_DEADLINE_SECS = float(os.getenv('CAPTCHA_DEADLINE_SECS', '10'))
+
+_executor = ThreadPoolExecutor(max_workers=max(1, 2 * CAPTCHA_HEDGE_REQUESTS))
+_cost_lock = threading.Lock()
+
+
+def is_valid_answer(answer):
+    """Une réponse exploitable fait exactement 6 caractères, sans espace."""
+    return isinstance(answer, str) and len(answer) == CAPTCHA_LENGTH and not any(char.isspace() for char in answer)
+
+
+def _gpt_requests(count):
+    models = CAPTCHA_GPT_MODELS or [None]
+    return [(models[i % len(models)], i % 2 == 1) for i in range(count)]
+
+
+def _solve_preprocessed(image, model, concise, timeout):
+    return solve_capcha_with_gpt(image, model=model, concise=concise, timeout=timeout,
+                                 preprocess=False, detail='low' if CAPTCHA_PREPROCESS else 'auto')
+
+
+def _add_abandoned_cost(result, future):
+    """Ajoute au résultat déjà retourné le coût d'un appel abandonné, une fois celui-ci terminé."""
+    if future.cancelled():
+        return
+    with _cost_lock:
+        result["cost_usd"] = round(result["cost_usd"] + future.result().get('cost_usd', 0.0), 4)
+
+
+def solve_capcha_hedged(image_source_in_base64, use_local=True, requests=CAPTCHA_HEDGE_REQUESTS, deadline_secs=CAPTCHA_DEADLINE_SECS):
+    """
+    Résout le captcha avec plusieurs solveurs à la fois.
+
+    Une réponse locale de confiance suffisante est retournée sans appel réseau.
+    Sinon `requests` appels GPT partent en parallèle ; les réponses qui ne font
+    pas 6 caractères sont écartées, et la première réponse qui obtient la
+    majorité des votes (la réponse locale peu sûre compte pour une voix) est
+    retournée. À l'échéance, les appels en attente sont abandonnés et la réponse
+    la plus votée, à défaut la première réponse GPT valide, est retournée.
+
+    Chaque appel a pour délai le temps restant avant l'échéance : un appel
+    abandonné se termine au plus tard à l'échéance, et son coût est ajouté
+    ensuite à `cost_usd` du résultat.
+
+    Même format de retour que solve_capcha_with_gpt, avec `solver` et `votes`.
+    """
+    start_time = time.time()
+    votes = Counter()
+    first_valid = None
+    cost_usd = 0.0
+    errors = []
+    local_answer = None
+
+    if use_local:
+        local = solve_capcha_locally(image_source_in_base64)
+        add_captcha_solve('local', None, local.get('success', False),
+                          duration_secs=local.get('duration_secs'), error=local.get('err_msg'))
+        if local.get('success', False) and is_valid_answer(local.get('response')):
+            return {**local, "solver": 'local', "votes": {local['response']: 1}}
+        if is_valid_answer(local.get('response')):
+            local_answer = local['response']
+            votes[local_answer] += 1
+
+    # Image réduite une seule fois pour toutes les requêtes.
+    gpt_image = preprocess_captcha(
+        image_source_in_base64) if CAPTCHA_PREPROCESS else image_source_in_base64
+    deadline = start_time + deadline_secs
+    # Le solveur local et le prétraitement ont déjà consommé une partie de l'échéance.
+    timeout = max(0.0, deadline - time.time())
+    pending = {
+        _executor.submit(_solve_preprocessed, gpt_image, model, concise, timeout)
+        for model, concise in _gpt_requests(requests)
+    }
+    quorum = (requests + len(votes)) // 2 + 1
+    winner = None
+
+    while pending and winner is None:
+        done, pending = wait(pending, timeout=max(0.0, deadline - time.time()),
+                             return_when=FIRST_COMPLETED)
+        if not done:
+            break
+        for future in done:
+            result = future.result()
+            cost_usd += result.get('cost_usd', 0.0)
+            answer = result.get('response')
+            if not result.get('success', False) or not is_valid_answer(answer):
+                errors.append(result.get('err_msg') or f"invalid answer {answer!r}")
+                continue
+            votes[answer] += 1
+            first_valid = first_valid or answer
+            if votes[answer] >= quorum:
+                winner = answer
+
+    # Échéance atteinte ou majorité obtenue : les requêtes pas encore parties sont
+    # annulées, celles en cours sont abandonnées (elles finissent d'elles-mêmes).
+    for future in pending:
+        future.cancel()
+
+    if winner is None and votes:
+        best, count = votes.most_common(1)[0]
+        winner = best if count > 1 else first_valid or local_answer
+
+    if winner is not None and votes[winner] > 1:
+        solver = 'vote'
+    else:
+        solver = 'local' if winner is not None and winner == local_answer else 'gpt'
+
+    result = {
+        "success": winner is not None,
+        "response": winner,
+        "solver": solver,
+        "votes": dict(votes),
+        "cost_usd": round(cost_usd, 4),
+        "duration_secs": round(time.time() - start_time, 2)
+    }
+    if winner is None:
+        result["err_msg"] = "; ".join(errors) or "Captcha deadline exceeded."
+    for future in pending:
+        future.add_done_callback(functools.partial(_add_abandoned_cost, result))
+    return result
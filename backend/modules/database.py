@@ -1,52 +1,320 @@
+import collections
+import json
 import logging
+import os
 import sqlite3
+import threading
 import uuid
-from datetime import datetime
+from datetime import date, datetime, timedelta
 
 DB_NAME = "slots.db"
+BUSY_TIMEOUT_MS = 5000
+CACHED_STATEMENTS = 256
+SLOT_CHANGES_RETENTION = 1000
+# Connexions gardées ouvertes entre deux threads courts (une requête Flask = un thread).
+CONNECTION_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '8'))
 
-logging.basicConfig(level=logging.ERROR,
+_local = threading.local()
+_idle_connections = collections.deque()
+_idle_lock = threading.Lock()
+
+# INFO par défaut : échecs de captcha, reprises et latences de réservation sont journalisés.
+logging.basicConfig(level=os.getenv('LOG_LEVEL', 'INFO').upper(),
                     format="%(asctime)s - %(levelname)s - %(message)s")
+# Une ligne par exécution de tâche planifiée ou par requête HTTP : bruit hors erreurs.
+logging.getLogger('apscheduler').setLevel(logging.WARNING)
+logging.getLogger('werkzeug').setLevel(logging.WARNING)
 
 
-def init_db():
-    try:
-        with sqlite3.connect(DB_NAME) as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS slots (
-                    id TEXT PRIMARY KEY,
-                    date TEXT NOT NULL,
-                    start_time TEXT NOT NULL,
-                    end_time TEXT NOT NULL,
-                    type TEXT NOT NULL,
-                    status TEXT NOT NULL DEFAULT 'not_book'
-                )
-            """)
+def _open_connection(db_name):
+    # Une connexion rendue au pool peut être reprise par un autre thread, jamais par deux à la fois.
+    conn = sqlite3.connect(
+        db_name,
+        timeout=BUSY_TIMEOUT_MS / 1000,
+        cached_statements=CACHED_STATEMENTS,
+        check_same_thread=False
+    )
+    # WAL : les lectures ne bloquent plus les écritures du scheduler et des workers.
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+    return conn
 
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS accounts (
-                    id TEXT PRIMARY KEY,
-                    email TEXT NOT NULL,
-                    password TEXT NOT NULL,
-                    is_used BOOL NOT NULL
-                )
-            """)
+
+def _take_idle_connection(db_name):
+    """Reprend une connexion libre du pool, en fermant celles d'une autre base."""
+    with _idle_lock:
+        while _idle_connections:
+            idle_db_name, conn = _idle_connections.pop()
+            if idle_db_name == db_name:
+                return conn
+            conn.close()
+    return None
+
+
+def get_connection():
+    """
+    Retourne la connexion SQLite du thread courant : celle déjà ouverte, une
+    connexion libre du pool, ou une nouvelle connexion.
+    À utiliser avec `with` : le bloc valide ou annule la transaction sans fermer la connexion.
+    """
+    conn = getattr(_local, 'conn', None)
+    if conn is None or _local.db_name != DB_NAME:
+        if conn is not None:
+            conn.close()
+        conn = _take_idle_connection(DB_NAME) or _open_connection(DB_NAME)
+        _local.conn = conn
+        _local.db_name = DB_NAME
+    return conn
+
+
+def release_connection():
+    """
+    Rend la connexion du thread courant au pool, à appeler en fin de thread
+    court (fin de requête Flask) ; au-delà de CONNECTION_POOL_SIZE connexions
+    libres, elle est fermée.
+    """
+    conn = getattr(_local, 'conn', None)
+    if conn is None:
+        return
+    _local.conn = None
+    if conn.in_transaction:
+        conn.rollback()
+    with _idle_lock:
+        if len(_idle_connections) < CONNECTION_POOL_SIZE and _local.db_name == DB_NAME:
+            _idle_connections.append((_local.db_name, conn))
+            return
+    conn.close()
+
+
+def close_connection():
+    """Ferme la connexion SQLite du thread courant."""
+    conn = getattr(_local, 'conn', None)
+    if conn is not None:
+        conn.close()
+        _local.conn = None
+
+
+def _date_key(value):
+    """Normalise une date (date, datetime ou texte) en clé triable 'YYYY-MM-DD'."""
+    if isinstance(value, (date, datetime)):
+        return value.strftime("%Y-%m-%d")
+    return datetime.strptime(str(value), "%Y-%m-%d").strftime("%Y-%m-%d")
+
+
+def _migration_initial_schema(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS slots (
+            id TEXT PRIMARY KEY,
+            date TEXT NOT NULL,
+            start_time TEXT NOT NULL,
+            end_time TEXT NOT NULL,
+            type TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'not_book'
+        )
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS accounts (
+            id TEXT PRIMARY KEY,
+            email TEXT NOT NULL,
+            password TEXT NOT NULL,
+            is_used BOOL NOT NULL
+        )
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS account_sessions (
+            account_id TEXT PRIMARY KEY,
+            cookies TEXT NOT NULL,
+            updated_at TEXT NOT NULL
+        )
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS jobs (
+            id TEXT PRIMARY KEY,
+            kind TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            step TEXT,
+            payload TEXT NOT NULL,
+            result TEXT,
+            created_at TEXT NOT NULL,
+            updated_at TEXT NOT NULL
+        )
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS pipeline_spans (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            attempt_id TEXT NOT NULL,
+            pipeline TEXT NOT NULL,
+            step TEXT NOT NULL,
+            duration_ms REAL NOT NULL,
+            success BOOL NOT NULL,
+            created_at TEXT NOT NULL
+        )
+    """)
+
+
+def _migration_indexes(cursor):
+    # Dates au format 'YYYY-MM-DD' : l'ordre du texte est l'ordre chronologique.
+    cursor.execute("SELECT id, date FROM slots")
+    for slot_id, slot_date in cursor.fetchall():
+        try:
+            normalized = _date_key(slot_date)
+        except ValueError:
+            continue
+        if normalized != slot_date:
+            cursor.execute(
+                "UPDATE slots SET date = ? WHERE id = ?", (normalized, slot_id))
+
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_slots_date_status ON slots(date, status)")
+
+    # Un seul compte peut être utilisé : on garde le premier avant de poser la contrainte.
+    cursor.execute("""
+        UPDATE accounts SET is_used = 0
+        WHERE is_used = 1 AND rowid != (SELECT MIN(rowid) FROM accounts WHERE is_used = 1)
+    """)
+    cursor.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_accounts_single_used
+        ON accounts(is_used) WHERE is_used = 1
+    """)
+
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status)")
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_pipeline_spans_created_at ON pipeline_spans(created_at)")
+
+
+def _migration_table_versions(cursor):
+    # Compteur incrémenté à chaque écriture dans slots : sert d'ETag sans relire les lignes.
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS table_versions (
+            name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL
+        )
+    """)
+    cursor.execute(
+        "INSERT OR IGNORE INTO table_versions (name, version) VALUES ('slots', 0)")
+    for operation in ('INSERT', 'UPDATE', 'DELETE'):
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS slots_version_{operation.lower()}
+            AFTER {operation} ON slots
+            BEGIN
+                UPDATE table_versions SET version = version + 1 WHERE name = 'slots';
+            END
+        """)
+
+
+def _migration_slot_changes(cursor):
+    # Journal append-only des écritures sur slots, pour la synchronisation incrémentale.
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS slot_changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            op TEXT NOT NULL,
+            slot_id TEXT NOT NULL,
+            date TEXT,
+            start_time TEXT,
+            end_time TEXT,
+            type TEXT,
+            status TEXT,
+            created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS slot_changes_insert AFTER INSERT ON slots
+        BEGIN
+            INSERT INTO slot_changes (op, slot_id, date, start_time, end_time, type, status)
+            VALUES ('insert', NEW.id, NEW.date, NEW.start_time, NEW.end_time, NEW.type, NEW.status);
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS slot_changes_update AFTER UPDATE ON slots
+        BEGIN
+            INSERT INTO slot_changes (op, slot_id, date, start_time, end_time, type, status)
+            VALUES ('update', NEW.id, NEW.date, NEW.start_time, NEW.end_time, NEW.type, NEW.status);
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS slot_changes_delete AFTER DELETE ON slots
+        BEGIN
+            INSERT INTO slot_changes (op, slot_id) VALUES ('delete', OLD.id);
+        END
+    """)
+    # Compaction : seules les SLOT_CHANGES_RETENTION dernières entrées sont gardées.
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS slot_changes_compact AFTER INSERT ON slot_changes
+        BEGIN
+            DELETE FROM slot_changes WHERE seq <= NEW.seq - {SLOT_CHANGES_RETENTION};
+        END
+    """)
+
+
+def _migration_captcha_solves(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS captcha_solves (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            solver TEXT NOT NULL,
+            model TEXT,
+            success BOOL NOT NULL,
+            prompt_tokens INTEGER,
+            completion_tokens INTEGER,
+            cost_usd REAL NOT NULL DEFAULT 0,
+            duration_ms REAL,
+            error TEXT,
+            created_at TEXT NOT NULL
+        )
+    """)
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_captcha_solves_created_at ON captcha_solves (created_at)")
+
+
+# Migrations appliquées dans l'ordre ; PRAGMA user_version garde la dernière version appliquée.
+MIGRATIONS = [
+    (1, _migration_initial_schema),
+    (2, _migration_indexes),
+    (3, _migration_table_versions),
+    (4, _migration_slot_changes),
+    (5, _migration_captcha_solves),
+]
+
+
+def run_migrations(conn):
+    """Applique les migrations manquantes, chacune dans sa propre transaction."""
+    current_version = conn.execute("PRAGMA user_version").fetchone()[0]
+    for version, migration in MIGRATIONS:
+        if version <= current_version:
+            continue
+        cursor = conn.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            migration(cursor)
+            cursor.execute(f"PRAGMA user_version = {version}")
             conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+
+def init_db():
+    try:
+        run_migrations(get_connection())
     except Exception as e:
         logging.error(
             f"Erreur lors de l'initialisation de la base de données: {str(e)}")
 
 
-def add_slot(date, start_time, end_time, slot_type, status):
+def add_slot(slot_date, start_time, end_time, slot_type, status):
     try:
         slot_id = str(uuid.uuid4())
-        with sqlite3.connect(DB_NAME) as conn:
+        with get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("""
                 INSERT INTO slots (id, date, start_time, end_time, type, status)
                 VALUES (?, ?, ?, ?, ?, ?)
-            """, (slot_id, date, start_time, end_time, slot_type, status))
+            """, (slot_id, _date_key(slot_date), start_time, end_time, slot_type, status))
             conn.commit()
         return {"isSuccess": True, "message": "Créneau ajouté avec succès", "slot_id": slot_id}
     except sqlite3.IntegrityError as e:
@@ -64,7 +332,7 @@ def update_slot_status(slot_id, new_status):
         return {"isSuccess": False, "message": "Statut invalide"}
 
     try:
-        with sqlite3.connect(DB_NAME) as conn:
+        with get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("""
                 UPDATE slots
@@ -82,9 +350,31 @@ def update_slot_status(slot_id, new_status):
         return {"isSuccess": False, "message": f"Erreur inconnue: {str(e)}"}
 
 
+def update_slots_status(statuses):
+    """Met à jour le statut de plusieurs créneaux ({slot_id: statut}) dans une seule transaction."""
+    valid_statuses = {"book", "not_book", "waiting"}
+    if any(status not in valid_statuses for status in statuses.values()):
+        return {"isSuccess": False, "message": "Statut invalide"}
+
+    try:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.executemany("""
+                UPDATE slots
+                SET status = ?
+                WHERE id = ?
+            """, [(status, slot_id) for slot_id, status in statuses.items()])
+            conn.commit()
+        return {"isSuccess": True, "message": f"{cursor.rowcount} statut(s) mis à jour avec succès"}
+    except Exception as e:
+        logging.error(
+            f"Erreur lors de la mise à jour du statut des créneaux: {str(e)}")
+        return {"isSuccess": False, "message": f"Erreur inconnue: {str(e)}"}
+
+
 def delete_slot(slot_id):
     try:
-        with sqlite3.connect(DB_NAME) as conn:
+        with get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("DELETE FROM slots WHERE id = ?", (slot_id,))
             conn.commit()
@@ -99,7 +389,7 @@ def delete_slot(slot_id):
 
 def get_all_slots():
     try:
-        with sqlite3.connect(DB_NAME) as conn:
+        with get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute(
                 "SELECT id, date, start_time, end_time, type, status FROM slots")
@@ -119,23 +409,155 @@ def get_all_slots():
         return {"isSuccess": False, "message": f"Erreur inconnue: {str(e)}"}
 
 
-def get_slots_by_date_and_status(date=None, status=None):
+def get_table_version(name):
+    try:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT version FROM table_versions WHERE name = ?", (name,))
+            row = cursor.fetchone()
+        return {"isSuccess": True, "data": row[0] if row else 0}
+    except Exception as e:
+        logging.error(
+            f"Erreur lors de la récupération de la version de {name}: {str(e)}")
+        return {"isSuccess": False, "message": f"Erreur inconnue: {str(e)}"}
+
+
+def get_slots_page(date_from=None, date_to=None, status=None, after=None, limit=100):
+    """
+    Retourne une page de créneaux triés par (date, id), filtrés par intervalle de
+    dates et statut. `after` est la clé (date, id) du dernier créneau de la page
+    précédente ; `next` vaut la clé du dernier créneau s'il reste des résultats.
+    """
+    query = "SELECT id, date, start_time, end_time, type, status FROM slots"
+    filters = []
+    params = []
+
+    if date_from:
+        filters.append("date >= ?")
+        params.append(_date_key(date_from))
+    if date_to:
+        filters.append("date <= ?")
+        params.append(_date_key(date_to))
+    if status:
+        filters.append("status = ?")
+        params.append(status)
+    if after:
+        filters.append("(date > ? OR (date = ? AND id > ?))")
+        params.extend([after[0], after[0], after[1]])
+
+    if filters:
+        query += " WHERE " + " AND ".join(filters)
+    query += " ORDER BY date, id LIMIT ?"
+    params.append(limit + 1)
+
+    try:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
+
+        slots = [
+            {
+                "id": row[0],
+                "date": row[1],
+                "start_time": row[2],
+                "end_time": row[3],
+                "type": row[4],
+                "status": row[5]
+            } for row in rows[:limit]
+        ]
+        next_key = (slots[-1]["date"], slots[-1]["id"]
+                    ) if len(rows) > limit else None
+        return {"isSuccess": True, "data": slots, "next": next_key}
+    except Exception as e:
+        logging.error(f"Erreur lors de la récupération des créneaux: {str(e)}")
+        return {"isSuccess": False, "message": f"Erreur inconnue: {str(e)}"}
+
+
+def get_latest_slot_change_seq():
+    try:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT seq FROM sqlite_sequence WHERE name = 'slot_changes'")
+            row = cursor.fetchone()
+        return {"isSuccess": True, "data": row[0] if row else 0}
+    except Exception as e:
+        logging.error(
+            f"Erreur lors de la récupération du dernier changement: {str(e)}")
+        return {"isSuccess": False, "message": f"Erreur inconnue: {str(e)}"}
+
+
+def get_slot_changes(since, limit=500):
+    """
+    Retourne les changements de créneaux de numéro > `since`, dans l'ordre.
+    `reset` vaut True si des changements postérieurs à `since` ont été compactés :
+    le client doit alors recharger la liste complète.
+    """
+    try:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT seq FROM sqlite_sequence WHERE name = 'slot_changes'")
+            row = cursor.fetchone()
+            latest_seq = row[0] if row else 0
+
+            cursor.execute("SELECT MIN(seq) FROM slot_changes")
+            oldest_seq = cursor.fetchone()[0]
+
+            if since > latest_seq or (oldest_seq is not None and since < oldest_seq - 1) or (oldest_seq is None and since < latest_seq):
+                return {"isSuccess": True, "reset": True, "data": [], "latest_seq": latest_seq, "has_more": False}
+
+            cursor.execute("""
+                SELECT seq, op, slot_id, date, start_time, end_time, type, status
+                FROM slot_changes
+                WHERE seq > ?
+                ORDER BY seq
+                LIMIT ?
+            """, (since, limit + 1))
+            rows = cursor.fetchall()
+
+        changes = [
+            {
+                "seq": row[0],
+                "op": row[1],
+                "slot": {"id": row[2]} if row[1] == 'delete' else {
+                    "id": row[2],
+                    "date": row[3],
+                    "start_time": row[4],
+                    "end_time": row[5],
+                    "type": row[6],
+                    "status": row[7]
+                }
+            } for row in rows[:limit]
+        ]
+        return {"isSuccess": True, "reset": False, "data": changes, "latest_seq": latest_seq, "has_more": len(rows) > limit}
+    except Exception as e:
+        logging.error(
+            f"Erreur lors de la récupération des changements de créneaux: {str(e)}")
+        return {"isSuccess": False, "message": f"Erreur inconnue: {str(e)}"}
+
+
+def get_slots_by_date_and_status(slot_date=None, status=None):
     query = "SELECT id, date, start_time, end_time, type, status FROM slots"
     filters = []
     params = []
 
-    if date:
+    if slot_date:
         filters.append("date = ?")
-        params.append(date)
+        params.append(_date_key(slot_date))
     if status:
         filters.append("status = ?")
         params.append(status)
 
     if filters:
         query += " WHERE " + " AND ".join(filters)
+    # Ordre d'ajout des créneaux, qui est l'ordre de préférence des réservations.
+    query += " ORDER BY rowid"
 
     try:
-        with sqlite3.connect(DB_NAME) as conn:
+        with get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute(query, params)
 
@@ -164,11 +586,11 @@ def get_slots_by_date_and_status(date=None, status=None):
 
 
 def delete_slots_before_today():
-    today = datetime.now().date()
+    today = _date_key(datetime.now().date())
     query = "DELETE FROM slots WHERE date < ?"
 
     try:
-        with sqlite3.connect(DB_NAME) as conn:
+        with get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute(query, (today,))
             conn.commit()
@@ -181,7 +603,7 @@ def delete_slots_before_today():
 
 def get_slot_by_id(slot_id):
     try:
-        with sqlite3.connect(DB_NAME) as conn:
+        with get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("""
                 SELECT id, date, start_time, end_time, type, status 
@@ -212,8 +634,12 @@ def get_slot_by_id(slot_id):
 def add_account(email, password, is_used):
     try:
         id = str(uuid.uuid4())
-        with sqlite3.connect(DB_NAME) as conn:
+        with get_connection() as conn:
             cursor = conn.cursor()
+            if is_used:
+                # Même transaction : l'index unique partiel n'autorise qu'un compte utilisé.
+                cursor.execute(
+                    "UPDATE accounts SET is_used = 0 WHERE is_used = 1")
             cursor.execute("""
                 INSERT INTO accounts (id, email, password, is_used)
                 VALUES (?, ?, ?, ?)
@@ -231,7 +657,7 @@ def add_account(email, password, is_used):
 
 def get_all_accounts():
     try:
-        with sqlite3.connect(DB_NAME) as conn:
+        with get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute(
                 "SELECT id, email, password, is_used FROM accounts")
@@ -251,9 +677,11 @@ def get_all_accounts():
 
 def delete_account(id):
     try:
-        with sqlite3.connect(DB_NAME) as conn:
+        with get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("DELETE FROM accounts WHERE id = ?", (id,))
+            conn.execute(
+                "DELETE FROM account_sessions WHERE account_id = ?", (id,))
             conn.commit()
         if cursor.rowcount > 0:
             return {"isSuccess": True, "message": "Compte supprimé avec succès"}
@@ -266,6 +694,7 @@ def delete_account(id):
 
 def update_account(id, email, password, is_used):
     try:
+        current_password = None
         updates = []
         params = []
 
@@ -284,9 +713,25 @@ def update_account(id, email, password, is_used):
         query = f"UPDATE accounts SET {', '.join(updates)} WHERE id = ?"
         params.append(id)
 
-        with sqlite3.connect(DB_NAME) as conn:
+        with get_connection() as conn:
             cursor = conn.cursor()
+            cursor.execute(
+                "SELECT password FROM accounts WHERE id = ?", (id,))
+            row = cursor.fetchone()
+            if row:
+                current_password = row[0]
+
+            if is_used:
+                # Même transaction : l'index unique partiel n'autorise qu'un compte utilisé.
+                cursor.execute(
+                    "UPDATE accounts SET is_used = 0 WHERE is_used = 1 AND id != ?", (id,))
+
             cursor.execute(query, params)
+
+            # Les cookies enregistrés ne sont plus valables après un changement de mot de passe
+            if current_password is not None and current_password != password:
+                conn.execute(
+                    "DELETE FROM account_sessions WHERE account_id = ?", (id,))
             conn.commit()
 
         if cursor.rowcount > 0:
@@ -300,7 +745,7 @@ def update_account(id, email, password, is_used):
 
 def get_used_account():
     try:
-        with sqlite3.connect(DB_NAME) as conn:
+        with get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("""
                 SELECT id, email, password, is_used 
@@ -324,3 +769,284 @@ def get_used_account():
         logging.error(
             f"Erreur lors de la récupération du compte utilisé: {str(e)}")
         return {"isSuccess": False, "message": f"Erreur inconnue: {str(e)}"}
+
+
+def save_account_session(account_id, cookies):
+    try:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                INSERT INTO account_sessions (account_id, cookies, updated_at)
+                VALUES (?, ?, ?)
+                ON CONFLICT(account_id) DO UPDATE SET
+                    cookies = excluded.cookies,
+                    updated_at = excluded.updated_at
+            """, (account_id, json.dumps(cookies), datetime.now().isoformat()))
+            conn.commit()
+        return {"isSuccess": True, "message": "Session enregistrée avec succès"}
+    except Exception as e:
+        logging.error(f"Erreur lors de l'enregistrement de la session: {str(e)}")
+        return {"isSuccess": False, "message": f"Erreur inconnue: {str(e)}"}
+
+
+def get_account_session(account_id):
+    try:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT cookies, updated_at
+                FROM account_sessions
+                WHERE account_id = ?
+            """, (account_id,))
+            row = cursor.fetchone()
+            if row:
+                return {
+                    "isSuccess": True,
+                    "data": {
+                        "cookies": json.loads(row[0]),
+                        "updated_at": row[1]
+                    }
+                }
+            else:
+                return {"isSuccess": False, "message": "Aucune session enregistrée"}
+    except Exception as e:
+        logging.error(
+            f"Erreur lors de la récupération de la session: {str(e)}")
+        return {"isSuccess": False, "message": f"Erreur inconnue: {str(e)}"}
+
+
+def delete_account_session(account_id):
+    try:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "DELETE FROM account_sessions WHERE account_id = ?", (account_id,))
+            conn.commit()
+        return {"isSuccess": True, "message": "Session supprimée avec succès"}
+    except Exception as e:
+        logging.error(f"Erreur lors de la suppression de la session: {str(e)}")
+        return {"isSuccess": False, "message": f"Erreur inconnue: {str(e)}"}
+
+
+def add_pipeline_spans(attempt_id, pipeline, spans):
+    """Enregistre les spans (étape, durée en ms, succès) d'une tentative."""
+    try:
+        created_at = datetime.now().isoformat()
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.executemany("""
+                INSERT INTO pipeline_spans (attempt_id, pipeline, step, duration_ms, success, created_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, [(attempt_id, pipeline, step, duration_ms, success, created_at)
+                  for step, duration_ms, success in spans])
+            conn.commit()
+        return {"isSuccess": True, "message": "Spans enregistrés avec succès"}
+    except Exception as e:
+        logging.error(f"Erreur lors de l'enregistrement des spans: {str(e)}")
+        return {"isSuccess": False, "message": f"Erreur inconnue: {str(e)}"}
+
+
+def get_pipeline_span_durations(days=30):
+    """Retourne les (pipeline, étape, durée en ms) des `days` derniers jours."""
+    try:
+        since = (datetime.now() - timedelta(days=days)).isoformat()
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT pipeline, step, duration_ms
+                FROM pipeline_spans
+                WHERE created_at >= ?
+            """, (since,))
+            return cursor.fetchall()
+    except Exception as e:
+        logging.error(f"Erreur lors de la récupération des spans: {str(e)}")
+        return []
+
+
+def add_captcha_solve(solver, model, success, usage=None, cost_usd=0.0, duration_secs=None, error=None):
+    """Enregistre une résolution de captcha (un appel au solveur) avec son coût."""
+    try:
+        usage = usage or {}
+        with get_connection() as conn:
+            conn.execute("""
+                INSERT INTO captcha_solves (solver, model, success, prompt_tokens, completion_tokens,
+                                            cost_usd, duration_ms, error, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (solver, model, success, usage.get('prompt_tokens'), usage.get('completion_tokens'),
+                  cost_usd or 0.0, None if duration_secs is None else duration_secs * 1000,
+                  error, datetime.now().isoformat()))
+            conn.commit()
+        return {"isSuccess": True, "message": "Résolution enregistrée"}
+    except Exception as e:
+        logging.error(
+            f"Erreur lors de l'enregistrement de la résolution du captcha: {str(e)}")
+        return {"isSuccess": False, "message": f"Erreur inconnue: {str(e)}"}
+
+
+def get_captcha_cost_since(since):
+    """Coût total (USD) des résolutions depuis `since` (datetime)."""
+    try:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT COALESCE(SUM(cost_usd), 0) FROM captcha_solves WHERE created_at >= ?",
+                (since.isoformat(),))
+            return {"isSuccess": True, "data": cursor.fetchone()[0]}
+    except Exception as e:
+        logging.error(
+            f"Erreur lors du calcul du coût des captchas: {str(e)}")
+        return {"isSuccess": False, "message": f"Erreur inconnue: {str(e)}"}
+
+
+def get_captcha_solve_stats(date_from=None, date_to=None, group_by='model'):
+    """
+    Agrège les résolutions par solveur et modèle (`group_by='model'`) ou par jour
+    (`group_by='day'`) : nombre, taux de réussite, tokens, coût et durées.
+    """
+    group = "solver, COALESCE(model, '')" if group_by == 'model' else "substr(created_at, 1, 10)"
+    clauses, params = [], []
+    if date_from:
+        clauses.append("created_at >= ?")
+        params.append(_date_key(date_from))
+    if date_to:
+        # Borne incluse : toute la journée `date_to`.
+        clauses.append("created_at < ?")
+        params.append((datetime.strptime(_date_key(date_to), "%Y-%m-%d") +
+                       timedelta(days=1)).strftime("%Y-%m-%d"))
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+    try:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                SELECT {group}, COUNT(*), AVG(success), COALESCE(SUM(prompt_tokens), 0),
+                       COALESCE(SUM(completion_tokens), 0), COALESCE(SUM(cost_usd), 0), AVG(duration_ms),
+                       MAX(duration_ms)
+                FROM captcha_solves
+                {where}
+                GROUP BY {group}
+                ORDER BY {group}
+            """, params)
+            rows = cursor.fetchall()
+
+        offset = 2 if group_by == 'model' else 1
+        stats = []
+        for row in rows:
+            key = {"solver": row[0], "model": row[1] or None} if group_by == 'model' else {"day": row[0]}
+            count, success_rate, prompt_tokens, completion_tokens, cost_usd, avg_ms, max_ms = row[offset:]
+            stats.append({
+                **key,
+                "solves": count,
+                "success_rate": round(success_rate, 3),
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "cost_usd": round(cost_usd, 4),
+                "cost_per_solve_usd": round(cost_usd / count, 5),
+                "avg_duration_ms": round(avg_ms, 1) if avg_ms is not None else None,
+                "max_duration_ms": round(max_ms, 1) if max_ms is not None else None
+            })
+        return {"isSuccess": True, "data": stats}
+    except Exception as e:
+        logging.error(
+            f"Erreur lors du calcul des statistiques de captcha: {str(e)}")
+        return {"isSuccess": False, "message": f"Erreur inconnue: {str(e)}"}
+
+
+def _row_to_job(row):
+    return {
+        "id": row[0],
+        "kind": row[1],
+        "status": row[2],
+        "step": row[3],
+        "payload": json.loads(row[4]),
+        "result": json.loads(row[5]) if row[5] is not None else None,
+        "created_at": row[6],
+        "updated_at": row[7]
+    }
+
+
+def add_job(kind, payload):
+    try:
+        job_id = str(uuid.uuid4())
+        now = datetime.now().isoformat()
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                INSERT INTO jobs (id, kind, status, payload, created_at, updated_at)
+                VALUES (?, ?, 'pending', ?, ?, ?)
+            """, (job_id, kind, json.dumps(payload), now, now))
+            conn.commit()
+        return {"isSuccess": True, "message": "Tâche créée avec succès", "job_id": job_id}
+    except Exception as e:
+        logging.error(f"Erreur lors de la création de la tâche: {str(e)}")
+        return {"isSuccess": False, "message": f"Erreur inconnue: {str(e)}"}
+
+
+def get_job(job_id):
+    try:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT id, kind, status, step, payload, result, created_at, updated_at
+                FROM jobs
+                WHERE id = ?
+            """, (job_id,))
+            row = cursor.fetchone()
+            if row:
+                return {"isSuccess": True, "data": _row_to_job(row)}
+            else:
+                return {"isSuccess": False, "message": "Tâche introuvable"}
+    except Exception as e:
+        logging.error(
+            f"Erreur lors de la récupération de la tâche {job_id}: {str(e)}")
+        return {"isSuccess": False, "message": f"Erreur inconnue: {str(e)}"}
+
+
+def get_unfinished_jobs():
+    try:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT id, kind, status, step, payload, result, created_at, updated_at
+                FROM jobs
+                WHERE status IN ('pending', 'running')
+                ORDER BY created_at
+            """)
+            jobs = [_row_to_job(row) for row in cursor.fetchall()]
+        return {"isSuccess": True, "data": jobs}
+    except Exception as e:
+        logging.error(
+            f"Erreur lors de la récupération des tâches en cours: {str(e)}")
+        return {"isSuccess": False, "message": f"Erreur inconnue: {str(e)}"}
+
+
+def update_job(job_id, status=None, step=None, result=None):
+    try:
+        updates = ["updated_at = ?"]
+        params = [datetime.now().isoformat()]
+
+        if status is not None:
+            updates.append("status = ?")
+            params.append(status)
+        if step is not None:
+            updates.append("step = ?")
+            params.append(step)
+        if result is not None:
+            updates.append("result = ?")
+            params.append(json.dumps(result))
+
+        query = f"UPDATE jobs SET {', '.join(updates)} WHERE id = ?"
+        params.append(job_id)
+
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            conn.commit()
+
+        if cursor.rowcount > 0:
+            return {"isSuccess": True, "message": "Tâche mise à jour avec succès"}
+        else:
+            return {"isSuccess": False, "message": "Tâche introuvable"}
+    except Exception as e:
+        logging.error(f"Erreur lors de la mise à jour de la tâche: {str(e)}")
+        return {"isSuccess": False, "message": f"Erreur inconnue: {str(e)}"}
@@ -0,0 +1,177 @@
+import logging
+import os
+import queue
+import threading
+from contextlib import contextmanager
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.chrome.options import Options
+from selenium.common.exceptions import WebDriverException
+from modules.site_urls import SITE_ORIGINS
+
+
+class DriverPoolExhausted(RuntimeError):
+    """Aucun driver ne s'est libéré dans le délai imparti."""
+
+
+def setup_driver():
+    """Configure et retourne un driver Selenium pour Chrome."""
+    try:
+        chrome_options = Options()
+        chrome_options.add_argument('--disable-gpu')
+        chrome_options.add_argument('--no-sandbox')
+        chrome_options.add_argument('--disable-dev-shm-usage')
+        chrome_options.add_argument('--headless')
+
+        service = Service()
+        driver = webdriver.Chrome(service=service, options=chrome_options)
+        return driver
+    except WebDriverException as e:
+        raise RuntimeError(
+            f"Erreur lors de la configuration du driver : {str(e)}")
+
+
+class DriverPool:
+    """
+    Garde des sessions Chrome prêtes à l'emploi et limite le nombre de
+    navigateurs ouverts en même temps.
+
+    - `size` : nombre de drivers gardés au chaud entre deux utilisations ;
+    - `max_drivers` : nombre maximum de drivers vivants (prêtés + au repos) ;
+    - `max_uses` : nombre d'utilisations avant qu'un driver soit recyclé ;
+    - `acquire_timeout` : attente maximale d'un driver, en secondes.
+    """
+
+    def __init__(self, size=1, max_drivers=2, max_uses=20, factory=setup_driver, acquire_timeout=30):
+        self.size = size
+        self.max_drivers = max(max_drivers, size)
+        self.max_uses = max_uses
+        self.acquire_timeout = acquire_timeout
+        self.factory = factory
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.max_drivers)
+        self._uses = {}
+        self._lock = threading.Lock()
+
+    def warm_up(self):
+        """Lance des drivers jusqu'à en avoir `size` au repos."""
+        while self._idle.qsize() < self.size:
+            if not self._slots.acquire(blocking=False):
+                return
+            try:
+                driver = self.factory()
+            except Exception as e:
+                self._slots.release()
+                logging.error(f"Erreur lors du préchauffage du driver : {str(e)}")
+                return
+            with self._lock:
+                self._uses[id(driver)] = 0
+            self._idle.put(driver)
+
+    def acquire(self, timeout=None):
+        """
+        Retourne un driver propre, en attendant au plus `timeout` secondes
+        (`acquire_timeout` par défaut) qu'une place se libère. Lève
+        DriverPoolExhausted à l'échéance.
+        """
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        if not self._slots.acquire(timeout=self.acquire_timeout if timeout is None else timeout):
+            raise DriverPoolExhausted(
+                "Erreur : aucun driver disponible dans le délai imparti.")
+
+        # Un driver a pu être rendu pendant l'attente.
+        try:
+            driver = self._idle.get_nowait()
+            self._slots.release()
+            return driver
+        except queue.Empty:
+            pass
+
+        try:
+            driver = self.factory()
+        except Exception:
+            self._slots.release()
+            raise
+        with self._lock:
+            self._uses[id(driver)] = 0
+        return driver
+
+    def release(self, driver, broken=False):
+        """Nettoie le driver et le remet au repos, ou le ferme s'il est usé ou cassé."""
+        if driver is None:
+            return
+
+        with self._lock:
+            uses = self._uses.get(id(driver), 0) + 1
+            self._uses[id(driver)] = uses
+
+        if not broken and uses < self.max_uses and self._idle.qsize() < self.size:
+            try:
+                self._reset(driver)
+                self._idle.put(driver)
+                return
+            except Exception as e:
+                logging.error(f"Erreur lors du nettoyage du driver : {str(e)}")
+
+        self._discard(driver)
+
+    @contextmanager
+    def driver(self, timeout=None):
+        """Prête un driver pour la durée du bloc `with`."""
+        driver = self.acquire(timeout=timeout)
+        broken = False
+        try:
+            yield driver
+        except WebDriverException:
+            broken = True
+            raise
+        finally:
+            self.release(driver, broken=broken)
+
+    def shutdown(self):
+        """Ferme tous les drivers au repos."""
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._discard(driver)
+
+    def _reset(self, driver):
+        """Remet la session dans un état vierge (onglets, cookies, stockage)."""
+        for handle in driver.window_handles[1:]:
+            driver.switch_to.window(handle)
+            driver.close()
+        driver.switch_to.window(driver.window_handles[0])
+        driver.switch_to.default_content()
+        driver.execute_cdp_cmd('Network.clearBrowserCookies', {})
+        driver.execute_cdp_cmd('Network.clearBrowserCache', {})
+        for origin in SITE_ORIGINS:
+            driver.execute_cdp_cmd('Storage.clearDataForOrigin', {
+                'origin': origin, 'storageTypes': 'local_storage,indexeddb'})
+        # sessionStorage est propre à l'onglet gardé : il est vidé depuis la page courante.
+        driver.execute_script(
+            "try { sessionStorage.clear(); } catch (e) {}")
+        driver.get('about:blank')
+
+    def _discard(self, driver):
+        with self._lock:
+            self._uses.pop(id(driver), None)
+        try:
+            driver.quit()
+        except Exception as e:
+            logging.error(f"Erreur lors de la fermeture du navigateur : {str(e)}")
+        finally:
+            self._slots.release()
+
+
+driver_pool = DriverPool(
+    size=int(os.getenv('DRIVER_POOL_SIZE', '1')),
+    max_drivers=int(os.getenv('DRIVER_POOL_MAX', '2')),
+    max_uses=int(os.getenv('DRIVER_POOL_MAX_USES', '20')),
+    acquire_timeout=float(os.getenv('DRIVER_ACQUIRE_TIMEOUT_SECS', '30')),
+)
@@ -0,0 +1,236 @@
+import collections
+import contextlib
+import contextvars
+import itertools
+import json
+import logging
+import os
+import selectors
+import socket
+import threading
+import time
+
+EVENTS_HOST = os.getenv('EVENTS_HOST', '0.0.0.0')
+EVENTS_PORT = int(os.getenv('EVENTS_PORT', '5001'))
+EVENTS_PATH = '/events'
+HEARTBEAT_SECS = 15
+REPLAY_SIZE = 200
+# Au-delà, le client ne lit plus assez vite : il est déconnecté et rejouera via Last-Event-ID.
+MAX_CLIENT_BUFFER = 256 * 1024
+MAX_REQUEST_SIZE = 8 * 1024
+
+_context = contextvars.ContextVar('event_context', default={})
+
+
+@contextlib.contextmanager
+def event_context(**fields):
+    """Ajoute `fields` à tous les événements publiés dans le bloc (et les threads lancés avec copy_context)."""
+    token = _context.set({**_context.get(), **fields})
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+
+class _Client:
+    def __init__(self, sock):
+        self.sock = sock
+        self.request = b''
+        self.outbuf = bytearray()
+        self.subscribed = False
+
+
+class EventBroadcaster:
+    """
+    Serveur Server-Sent Events sur un seul thread : toutes les connexions sont
+    non bloquantes et multiplexées par `selectors`, un abonné inactif ne coûte
+    qu'un socket. `publish()` peut être appelé depuis n'importe quel thread.
+    """
+
+    def __init__(self, host=EVENTS_HOST, port=EVENTS_PORT):
+        self.host = host
+        self.port = port
+        self._pending = collections.deque()
+        self._replay = collections.deque(maxlen=REPLAY_SIZE)
+        self._ids = itertools.count(1)
+        self._id_lock = threading.Lock()
+        self._clients = {}
+        self._selector = None
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._thread = None
+
+    def start(self):
+        """Ouvre le port et démarre le thread du serveur. Retourne False si le port est indisponible."""
+        if self._thread is not None:
+            return True
+        try:
+            server = socket.create_server((self.host, self.port))
+        except OSError as e:
+            logging.error(
+                f"Impossible d'ouvrir le flux d'événements sur le port {self.port}: {str(e)}")
+            return False
+        server.setblocking(False)
+        self._wake_r.setblocking(False)
+        self._wake_w.setblocking(False)
+
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(server, selectors.EVENT_READ, 'accept')
+        self._selector.register(self._wake_r, selectors.EVENT_READ, 'wake')
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+        return True
+
+    def publish(self, event, data):
+        """Diffuse l'événement `event` (données sérialisables en JSON) à tous les abonnés."""
+        with self._id_lock:
+            event_id = next(self._ids)
+            message = (
+                f"id: {event_id}\nevent: {event}\n"
+                f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
+            ).encode('utf-8')
+            self._pending.append((event_id, message))
+        try:
+            self._wake_w.send(b'\0')
+        except (BlockingIOError, OSError):
+            # Le tampon de réveil est plein : le serveur est déjà réveillé.
+            pass
+
+    def _serve(self):
+        last_heartbeat = time.monotonic()
+        while True:
+            for key, mask in self._selector.select(timeout=HEARTBEAT_SECS):
+                if key.data == 'accept':
+                    self._accept(key.fileobj)
+                elif key.data == 'wake':
+                    self._drain_wake()
+                else:
+                    client = key.data
+                    if mask & selectors.EVENT_READ:
+                        self._read(client)
+                    if mask & selectors.EVENT_WRITE and client.sock in self._clients:
+                        self._flush(client)
+            self._broadcast_pending()
+            if time.monotonic() - last_heartbeat >= HEARTBEAT_SECS:
+                self._heartbeat()
+                last_heartbeat = time.monotonic()
+
+    def _accept(self, server):
+        try:
+            sock, _ = server.accept()
+        except BlockingIOError:
+            return
+        sock.setblocking(False)
+        client = _Client(sock)
+        self._clients[sock] = client
+        self._selector.register(sock, selectors.EVENT_READ, client)
+
+    def _drain_wake(self):
+        try:
+            while self._wake_r.recv(4096):
+                pass
+        except BlockingIOError:
+            pass
+
+    def _read(self, client):
+        try:
+            chunk = client.sock.recv(4096)
+        except BlockingIOError:
+            return
+        except OSError:
+            chunk = b''
+        if not chunk:
+            self._close(client)
+            return
+        if client.subscribed:
+            return
+
+        client.request += chunk
+        if b'\r\n\r\n' in client.request:
+            self._handle_request(client)
+        elif len(client.request) > MAX_REQUEST_SIZE:
+            self._close(client)
+
+    def _handle_request(self, client):
+        head = client.request.split(b'\r\n\r\n', 1)[0].decode('latin-1')
+        lines = head.split('\r\n')
+        parts = lines[0].split(' ')
+        headers = {}
+        for line in lines[1:]:
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        if len(parts) < 2 or parts[0] != 'GET' or parts[1].split('?')[0] != EVENTS_PATH:
+            client.outbuf += (
+                b"HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\n"
+                b"Connection: close\r\n\r\n")
+            self._flush(client)
+            self._close(client)
+            return
+
+        client.subscribed = True
+        client.outbuf += (
+            b"HTTP/1.1 200 OK\r\n"
+            b"Content-Type: text/event-stream; charset=utf-8\r\n"
+            b"Cache-Control: no-cache\r\n"
+            b"Connection: keep-alive\r\n"
+            b"Access-Control-Allow-Origin: *\r\n\r\n"
+            b"retry: 3000\n\n")
+
+        # Reconnexion du navigateur : rejoue les événements manqués encore en mémoire.
+        last_event_id = headers.get('last-event-id', '')
+        if last_event_id.isdigit():
+            for event_id, message in self._replay:
+                if event_id > int(last_event_id):
+                    client.outbuf += message
+        self._flush(client)
+
+    def _broadcast_pending(self):
+        while self._pending:
+            event_id, message = self._pending.popleft()
+            self._replay.append((event_id, message))
+            for client in list(self._clients.values()):
+                if client.subscribed:
+                    client.outbuf += message
+                    self._flush(client)
+
+    def _heartbeat(self):
+        # Un commentaire SSE périodique garde la connexion ouverte à travers les proxys.
+        for client in list(self._clients.values()):
+            if client.subscribed and not client.outbuf:
+                client.outbuf += b": ping\n\n"
+                self._flush(client)
+
+    def _flush(self, client):
+        if client.outbuf:
+            try:
+                sent = client.sock.send(client.outbuf)
+                del client.outbuf[:sent]
+            except BlockingIOError:
+                pass
+            except OSError:
+                self._close(client)
+                return
+
+        if len(client.outbuf) > MAX_CLIENT_BUFFER:
+            self._close(client)
+            return
+        events = selectors.EVENT_READ | (
+            selectors.EVENT_WRITE if client.outbuf else 0)
+        self._selector.modify(client.sock, events, client)
+
+    def _close(self, client):
+        if self._clients.pop(client.sock, None) is None:
+            return
+        self._selector.unregister(client.sock)
+        client.sock.close()
+
+
+event_broadcaster = EventBroadcaster()
+
+
+def publish_event(event, **data):
+    """Publie un événement, complété par le contexte courant (voir `event_context`)."""
+    try:
+        event_broadcaster.publish(event, {**_context.get(), **data})
+    except Exception as e:
+        logging.error(f"Erreur lors de la publication de l'événement {event}: {str(e)}")
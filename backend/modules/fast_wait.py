@@ -0,0 +1,111 @@
+import os
+import time
+from contextlib import contextmanager
+from selenium.common.exceptions import WebDriverException
+import modules.tracing as tracing
+
+# FAST_WAITS=0 rétablit les pauses fixes et le polling de 0,5 s de Selenium
+# (pour comparer, voir benchmarks/booking_e2e.py --waits both).
+FAST_WAITS = os.getenv('FAST_WAITS', '1') == '1'
+POLL_INTERVAL_SECS = float(os.getenv('WAIT_POLL_INTERVAL_SECS', '0.05'))
+SELENIUM_POLL_INTERVAL_SECS = 0.5
+# Silence du DOM qui signale que la page a fini de réagir à une action.
+SETTLE_QUIET_MS = int(os.getenv('WAIT_SETTLE_QUIET_MS', '150'))
+
+WATCH_SCRIPT = """
+if (window.__domWatch) window.__domWatch.observer.disconnect();
+const watch = {mutations: 0, last: performance.now(), onMutation: null};
+watch.observer = new MutationObserver(records => {
+    watch.mutations += records.length;
+    watch.last = performance.now();
+    if (watch.onMutation) watch.onMutation();
+});
+watch.observer.observe(document, {childList: true, subtree: true, attributes: true, characterData: true});
+window.__domWatch = watch;
+"""
+
+# Résout dès que le DOM a changé puis est resté `quietMs` sans changer, après
+# `idleMs` si rien n'a changé, ou à l'échéance.
+SETTLE_SCRIPT = """
+const [quietMs, timeoutMs, idleMs, done] = arguments;
+const watch = window.__domWatch;
+if (!watch) return done(-1);
+let quiet = null;
+const finish = () => {
+    clearTimeout(quiet);
+    clearTimeout(idle);
+    clearTimeout(deadline);
+    watch.observer.disconnect();
+    window.__domWatch = null;
+    done(watch.mutations);
+};
+const deadline = setTimeout(finish, timeoutMs);
+const idle = setTimeout(() => { if (!watch.mutations) finish(); }, idleMs);
+const arm = () => {
+    clearTimeout(quiet);
+    quiet = setTimeout(finish, Math.max(0, quietMs - (performance.now() - watch.last)));
+};
+watch.onMutation = arm;
+if (watch.mutations > 0) arm();
+"""
+
+PAGE_READY_SCRIPT = """
+return document.readyState === 'complete' && !(window.jQuery && window.jQuery.active);
+"""
+
+
+def poll_interval():
+    """Intervalle de polling des WebDriverWait du pipeline."""
+    return POLL_INTERVAL_SECS if FAST_WAITS else SELENIUM_POLL_INTERVAL_SECS
+
+
+def pause(seconds):
+    """Pause fixe de l'ancien comportement, sautée quand les attentes rapides sont actives."""
+    if not FAST_WAITS:
+        time.sleep(seconds)
+
+
+@contextmanager
+def dom_settled(driver, timeout=2.0, quiet_ms=None, fallback_secs=0.5):
+    """
+    Entoure une action dont l'effet sur la page est asynchrone (autocomplétion,
+    menu) : un MutationObserver est posé avant l'action, et la sortie du bloc
+    attend, dans la page et en un seul aller-retour, que le DOM ait changé puis
+    soit resté calme `quiet_ms` ms (au plus `timeout` secondes). Si l'action ne
+    change rien, l'attente s'arrête après `fallback_secs`, la pause fixe
+    qu'elle remplace. Sans attentes rapides, ou si la page ne se laisse pas
+    observer, attend `fallback_secs`.
+    """
+    if not FAST_WAITS:
+        yield
+        time.sleep(fallback_secs)
+        return
+
+    try:
+        driver.execute_script(WATCH_SCRIPT)
+        watching = True
+    except WebDriverException:
+        watching = False
+    yield
+    if not watching:
+        time.sleep(fallback_secs)
+        return
+    try:
+        driver.execute_async_script(
+            SETTLE_SCRIPT, SETTLE_QUIET_MS if quiet_ms is None else quiet_ms,
+            timeout * 1000, fallback_secs * 1000)
+    except WebDriverException:
+        # Navigation pendant l'attente : les attentes suivantes prennent le relais.
+        pass
+
+
+def wait_page_ready(driver, timeout=10, fallback_secs=1.0):
+    """
+    Attend la fin du chargement de la page et des requêtes jQuery en cours
+    (handlers des filtres branchés), au lieu d'une pause fixe.
+    """
+    if not FAST_WAITS:
+        time.sleep(fallback_secs)
+        return
+    tracing.TracedWebDriverWait(driver, timeout).until(
+        lambda d: d.execute_script(PAGE_READY_SCRIPT))
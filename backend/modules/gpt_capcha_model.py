@@ -1,10 +1,39 @@
 import json
+import logging
 import os
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import httpx
 import openai
+from modules.captcha_image import preprocess_captcha
+from modules.database import add_captcha_solve, get_captcha_cost_since
 
+# La réponse JSON {"capcha_value": "xxxxxx"} tient en une quinzaine de tokens.
+CAPTCHA_MAX_TOKENS = 32
+CAPTCHA_PREPROCESS = os.getenv('CAPTCHA_PREPROCESS', '1') == '1'
+OPENAI_CONNECT_TIMEOUT = float(os.getenv('OPENAI_CONNECT_TIMEOUT', '3'))
+OPENAI_READ_TIMEOUT = float(os.getenv('OPENAI_READ_TIMEOUT', '15'))
+OPENAI_MAX_CONNECTIONS = int(os.getenv('OPENAI_MAX_CONNECTIONS', '8'))
+# Les connexions ouvertes par le préchauffage doivent survivre jusqu'à 8h.
+OPENAI_KEEPALIVE_SECS = float(os.getenv('OPENAI_KEEPALIVE_SECS', '300'))
+# 0 : pas de plafond.
+CAPTCHA_MONTHLY_BUDGET_USD = float(
+    os.getenv('CAPTCHA_MONTHLY_BUDGET_USD', '0'))
 
-def build_prompt(image_source_in_base64):
+_client = None
+_client_lock = threading.Lock()
+
+
+# Variante courte du prompt, utilisée en parallèle de la variante complète pour diversifier les réponses.
+CONCISE_SYSTEM_PROMPT = """
+    You read captchas. The image contains exactly 6 characters (A-Z, a-z, 0-9 or symbols such as @ # % &),
+    drawn over noise lines. Ignore the lines and return the 6 characters in order, respecting case.
+"""
+
+
+def build_prompt(image_source_in_base64, concise=False, detail='auto'):
     function_schema = {
         "type": "json_schema",
         "json_schema": {
@@ -61,7 +90,7 @@ def build_prompt(image_source_in_base64):
     complete_prompts = [
         {
             "role": "system",
-            "content": SYSTEM_PROMPT
+            "content": CONCISE_SYSTEM_PROMPT if concise else SYSTEM_PROMPT
         },
         {
             "role": "user",
@@ -75,6 +104,7 @@ def build_prompt(image_source_in_base64):
                     "type": "image_url",
                     "image_url": {
                         "url": f"data:image/png;base64,{image_source_in_base64}",
+                        "detail": detail,
                     },
                 }
             ]
@@ -91,26 +121,93 @@ def trim_usage_dict(input_dict):
     }
 
 
-def solve_capcha_with_gpt(image_source_in_base64, in_cost=0.005, out_cost=0.015):
-    key = os.getenv('OAI_API_KEY')
-    model = os.getenv('AZURE_GPT_MODEL')
+def get_openai_client():
+    """
+    Client OpenAI partagé, créé au premier appel : ses connexions HTTP
+    keep-alive sont réutilisées d'un captcha à l'autre, et les délais sont
+    explicites (pas de nouvel essai automatique, l'appelant a sa propre échéance).
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = openai.OpenAI(
+                api_key=os.getenv('OAI_API_KEY'),
+                timeout=httpx.Timeout(
+                    OPENAI_READ_TIMEOUT, connect=OPENAI_CONNECT_TIMEOUT),
+                max_retries=0,
+                http_client=httpx.Client(limits=httpx.Limits(
+                    max_connections=OPENAI_MAX_CONNECTIONS,
+                    max_keepalive_connections=OPENAI_MAX_CONNECTIONS,
+                    keepalive_expiry=OPENAI_KEEPALIVE_SECS,
+                )),
+            )
+        return _client
+
+
+def warm_up_openai(connections=1):
+    """
+    Ouvre `connections` connexions TLS vers l'API avant l'ouverture des
+    créneaux (requête légère sur le modèle), pour que les appels de 8h
+    n'aient plus la poignée de main à faire.
+    """
+    def warm(_):
+        try:
+            get_openai_client().models.retrieve(os.getenv('AZURE_GPT_MODEL'))
+        except Exception as e:
+            logging.error(
+                f"Erreur lors du préchauffage de la connexion OpenAI: {str(e)}")
+
+    with ThreadPoolExecutor(max_workers=connections) as executor:
+        list(executor.map(warm, range(connections)))
+
 
-    # Appel de la méthode build_prompt
-    PromptPayloadMessages, function_schema = build_prompt(
-        image_source_in_base64)
+def is_over_budget():
+    """Indique si le coût des captchas du mois en cours a atteint CAPTCHA_MONTHLY_BUDGET_USD."""
+    if CAPTCHA_MONTHLY_BUDGET_USD <= 0:
+        return False
+    month_start = datetime.now().replace(
+        day=1, hour=0, minute=0, second=0, microsecond=0)
+    spent = get_captcha_cost_since(month_start)
+    return spent["isSuccess"] and spent["data"] >= CAPTCHA_MONTHLY_BUDGET_USD
 
-    # Initialisation de l'API OpenAI
-    openai.api_key = key
+
+def solve_capcha_with_gpt(image_source_in_base64, in_cost=0.005, out_cost=0.015, model=None, concise=False, timeout=None, preprocess=CAPTCHA_PREPROCESS, detail=None):
+    """Résout le captcha avec GPT et enregistre l'appel (tokens, coût, durée) dans captcha_solves."""
+    model = model or os.getenv('AZURE_GPT_MODEL')
+    if is_over_budget():
+        return {
+            "success": False,
+            "err_msg": f"Monthly captcha budget of {CAPTCHA_MONTHLY_BUDGET_USD} USD reached.",
+            "cost_usd": 0.0,
+            "duration_secs": 0.0
+        }
+
+    result = _solve_capcha_with_gpt(image_source_in_base64, in_cost, out_cost,
+                                    model, concise, timeout, preprocess, detail)
+    add_captcha_solve('gpt', model, result["success"], result.get('usage'),
+                      result.get('cost_usd', 0.0), result.get('duration_secs'), result.get('err_msg'))
+    return result
+
+
+def _solve_capcha_with_gpt(image_source_in_base64, in_cost, out_cost, model, concise, timeout, preprocess, detail):
+
+    if preprocess:
+        image_source_in_base64 = preprocess_captcha(image_source_in_base64)
+
+    # Appel de la méthode build_prompt ; une image prétraitée tient dans le mode low (forfait de tokens fixe)
+    PromptPayloadMessages, function_schema = build_prompt(
+        image_source_in_base64, concise, detail or ('low' if preprocess else 'auto'))
 
     start_time = time.time()
 
     try:
         # Appel de l'API OpenAI pour obtenir une réponse
-        chat_completion = openai.chat.completions.create(
+        chat_completion = get_openai_client().chat.completions.create(
             model=model,
             messages=PromptPayloadMessages,
             response_format=function_schema,
-            max_tokens=16384,
+            max_tokens=CAPTCHA_MAX_TOKENS,
+            timeout=timeout if timeout is not None else openai.NOT_GIVEN,
         )
 
         # Récupération des informations d'utilisation
@@ -0,0 +1,112 @@
+import contextvars
+import logging
+import os
+import queue
+import threading
+from modules.database import add_job, get_job, get_unfinished_jobs, update_job
+from modules.events import event_context
+from modules.tracing import add_step_listener
+
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', '2'))
+
+_handlers = {}
+_queue = queue.Queue()
+_current_job_id = contextvars.ContextVar('current_job_id', default=None)
+_started = False
+_start_lock = threading.Lock()
+
+
+def register_handler(kind, handler):
+    """
+    Associe un type de tâche à la fonction `handler(payload) -> dict` qui
+    l'exécute (None si elle termine plus tard, voir defer_current_job).
+    """
+    _handlers[kind] = handler
+
+
+def submit_job(kind, payload):
+    """Enregistre la tâche dans SQLite et la met en file d'attente. Retourne son identifiant."""
+    result = add_job(kind, payload)
+    if not result["isSuccess"]:
+        raise RuntimeError(result["message"])
+    _queue.put(result["job_id"])
+    return result["job_id"]
+
+
+def _report_step(step):
+    job_id = _current_job_id.get()
+    if job_id is not None:
+        update_job(job_id, step=step)
+
+
+def defer_current_job():
+    """
+    Pour un handler qui termine plus tard (réservation dont les reprises sont
+    planifiées) : le handler retourne None, la tâche reste 'running' et la
+    fonction retournée, `complete(result)`, l'achève depuis n'importe quel thread.
+    """
+    job_id = _current_job_id.get()
+    return lambda result: _complete_job(job_id, result)
+
+
+def _complete_job(job_id, result):
+    status = 'done' if result.get("isSuccess", False) else 'failed'
+    update_job(job_id, status=status, result=result)
+
+
+def _run_job(job_id):
+    job = get_job(job_id)
+    if not job["isSuccess"]:
+        return
+
+    handler = _handlers.get(job["data"]["kind"])
+    if handler is None:
+        update_job(job_id, status='failed', result={
+                   "isSuccess": False, "message": f"Type de tâche inconnu : {job['data']['kind']}"})
+        return
+
+    update_job(job_id, status='running')
+    token = _current_job_id.set(job_id)
+    try:
+        with event_context(job_id=job_id):
+            result = handler(job["data"]["payload"])
+        if result is not None:
+            _complete_job(job_id, result)
+    except Exception as e:
+        logging.error(f"Erreur lors de l'exécution de la tâche {job_id}: {str(e)}")
+        update_job(job_id, status='failed', result={
+                   "isSuccess": False, "message": f"Erreur interne : {str(e)}"})
+    finally:
+        _current_job_id.reset(token)
+
+
+def _worker():
+    while True:
+        job_id = _queue.get()
+        try:
+            _run_job(job_id)
+        finally:
+            _queue.task_done()
+
+
+def start_workers(count=JOB_WORKERS):
+    """
+    Démarre les workers et remet en file les tâches qu'un redémarrage a
+    interrompues (statut pending ou running).
+    """
+    global _started
+    with _start_lock:
+        if _started:
+            return
+        _started = True
+
+    add_step_listener(_report_step)
+
+    unfinished = get_unfinished_jobs()
+    if unfinished["isSuccess"]:
+        for job in unfinished["data"]:
+            update_job(job["id"], status='pending')
+            _queue.put(job["id"])
+
+    for _ in range(count):
+        threading.Thread(target=_worker, daemon=True).start()
@@ -0,0 +1,331 @@
+"""
+Solveur local du captcha antibot (6 caractères), sans appel réseau.
+
+L'image est binarisée, découpée en 6 caractères par projection verticale,
+puis chaque caractère est comparé à des modèles (moyennes normalisées des
+exemples d'entraînement). La confiance d'un caractère est l'écart de
+similarité entre le meilleur caractère et le suivant, celle de la réponse
+la plus faible des 6 : sous LOCAL_CAPTCHA_MIN_CONFIDENCE, la réponse est
+rejetée et l'appelant passe à GPT.
+
+Entraînement et évaluation hors ligne sur un dossier d'exemples étiquetés
+(images PNG et un fichier labels.json {"fichier.png": "aB3#xY"}) :
+
+    cd backend && python -m modules.local_captcha_model train <dossier>
+    cd backend && python -m modules.local_captcha_model evaluate <dossier>
+"""
+import argparse
+import base64
+import io
+import json
+import logging
+import os
+import threading
+import time
+import numpy as np
+from PIL import Image
+
+CAPTCHA_LENGTH = 6
+GLYPH_SIZE = 20
+MODEL_PATH = os.getenv('LOCAL_CAPTCHA_MODEL', os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'models', 'captcha_templates.npz'))
+MIN_CONFIDENCE = float(os.getenv('LOCAL_CAPTCHA_MIN_CONFIDENCE', '0.1'))
+# Nombre maximum de modèles gardés par caractère (variantes de forme).
+MAX_TEMPLATES_PER_CHAR = 8
+
+
+def _otsu_threshold(gray):
+    histogram = np.bincount(gray.ravel(), minlength=256).astype(np.float64)
+    total = gray.size
+    cumulative = np.cumsum(histogram)
+    cumulative_mean = np.cumsum(histogram * np.arange(256))
+    background = cumulative[:-1]
+    foreground = total - background
+    valid = (background > 0) & (foreground > 0)
+    between = np.zeros(255)
+    mean_bg = cumulative_mean[:-1][valid] / background[valid]
+    mean_fg = (cumulative_mean[-1] - cumulative_mean[:-1][valid]) / foreground[valid]
+    between[valid] = background[valid] * foreground[valid] * (mean_bg - mean_fg) ** 2
+    return int(np.argmax(between))
+
+
+def binarize(image):
+    """Retourne un tableau booléen où True est l'encre (la classe minoritaire)."""
+    gray = np.asarray(image.convert('L'), dtype=np.uint8)
+    ink = gray <= _otsu_threshold(gray)
+    if ink.mean() > 0.5:
+        ink = ~ink
+    return ink
+
+
+def remove_thin_lines(ink):
+    """Ouverture 2x2 : efface les traits d'un pixel d'épaisseur (lignes de bruit) en gardant les caractères."""
+    eroded = ink[:-1, :-1] & ink[1:, :-1] & ink[:-1, 1:] & ink[1:, 1:]
+    opened = np.zeros_like(ink)
+    opened[:-1, :-1] |= eroded
+    opened[1:, :-1] |= eroded
+    opened[:-1, 1:] |= eroded
+    opened[1:, 1:] |= eroded
+    return opened
+
+
+def segment(ink, count=CAPTCHA_LENGTH):
+    """
+    Découpe l'image en `count` caractères par projection sur les colonnes, une
+    fois les traits fins (lignes de bruit) effacés ; les blocs trop larges sont
+    coupés en deux, les plus étroits fusionnés avec leur voisin. Retourne une
+    liste de tableaux booléens, ou None si le découpage échoue.
+    """
+    ink = remove_thin_lines(ink)
+    columns = ink.any(axis=0)
+
+    spans = []
+    start = None
+    for x, filled in enumerate(columns):
+        if filled and start is None:
+            start = x
+        elif not filled and start is not None:
+            spans.append([start, x])
+            start = None
+    if start is not None:
+        spans.append([start, len(columns)])
+    if not spans:
+        return None
+
+    # Les fragments presque vides (restes de bruit) sont écartés avant fusion et découpe.
+    masses = [ink[:, left:right].sum() for left, right in spans]
+    spans = [span for span, mass in zip(spans, masses)
+             if mass >= 0.15 * np.median(masses)]
+
+    while len(spans) < count:
+        widest = max(range(len(spans)), key=lambda i: spans[i][1] - spans[i][0])
+        left, right = spans[widest]
+        if right - left < 2:
+            return None
+        middle = (left + right) // 2
+        spans[widest:widest + 1] = [[left, middle], [middle, right]]
+
+    while len(spans) > count:
+        narrowest = min(range(len(spans)), key=lambda i: spans[i][1] - spans[i][0])
+        if narrowest == 0:
+            neighbour = 1
+        elif narrowest == len(spans) - 1:
+            neighbour = narrowest - 1
+        else:
+            # Fusion avec le voisin le plus proche.
+            gap_left = spans[narrowest][0] - spans[narrowest - 1][1]
+            gap_right = spans[narrowest + 1][0] - spans[narrowest][1]
+            neighbour = narrowest - 1 if gap_left <= gap_right else narrowest + 1
+        first, second = sorted((narrowest, neighbour))
+        spans[first:second + 1] = [[spans[first][0], spans[second][1]]]
+
+    glyphs = []
+    for left, right in spans:
+        glyph = ink[:, left:right]
+        rows = np.flatnonzero(glyph.sum(axis=1))
+        if rows.size == 0:
+            return None
+        glyphs.append(glyph[rows[0]:rows[-1] + 1])
+    return glyphs
+
+
+def glyph_features(glyph):
+    """Caractère redimensionné en GLYPH_SIZE x GLYPH_SIZE, centré et de norme 1."""
+    image = Image.fromarray((glyph * 255).astype(np.uint8))
+    vector = np.asarray(image.resize(
+        (GLYPH_SIZE, GLYPH_SIZE), Image.BILINEAR), dtype=np.float32).ravel()
+    vector -= vector.mean()
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def extract_features(image):
+    """Retourne la matrice (6, GLYPH_SIZE²) des caractères de l'image, ou None."""
+    glyphs = segment(binarize(image))
+    if glyphs is None:
+        return None
+    return np.stack([glyph_features(glyph) for glyph in glyphs])
+
+
+def decode_image(image_source_in_base64):
+    return Image.open(io.BytesIO(base64.b64decode(image_source_in_base64)))
+
+
+class TemplateModel:
+    """Modèles de caractères : `templates[i]` est le vecteur moyen d'une variante de `labels[i]`."""
+
+    def __init__(self, labels, templates):
+        self.labels = np.asarray(labels)
+        self.templates = np.asarray(templates, dtype=np.float32)
+        self.chars, self._char_index = np.unique(
+            self.labels, return_inverse=True)
+
+    @classmethod
+    def train(cls, samples):
+        """
+        Construit le modèle à partir de `samples`, un itérable de (image PIL,
+        réponse). Les exemples mal découpés sont ignorés.
+        """
+        examples = {}
+        for image, label in samples:
+            if len(label) != CAPTCHA_LENGTH:
+                continue
+            features = extract_features(image)
+            if features is None:
+                continue
+            for char, vector in zip(label, features):
+                examples.setdefault(char, []).append(vector)
+
+        labels, templates = [], []
+        for char, vectors in sorted(examples.items()):
+            for centroid in _cluster(np.stack(vectors), MAX_TEMPLATES_PER_CHAR):
+                labels.append(char)
+                templates.append(centroid)
+        if not templates:
+            raise ValueError("Aucun exemple exploitable pour l'entraînement.")
+        return cls(labels, templates)
+
+    @classmethod
+    def load(cls, path=MODEL_PATH):
+        with np.load(path) as data:
+            return cls(data['labels'], data['templates'])
+
+    def save(self, path=MODEL_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        np.savez_compressed(path, labels=self.labels, templates=self.templates)
+
+    def predict(self, image):
+        """Retourne (réponse, confiance), ou (None, 0.0) si l'image n'est pas découpable."""
+        features = extract_features(image)
+        if features is None:
+            return None, 0.0
+        similarities = features @ self.templates.T
+
+        # Meilleure similarité de chaque caractère, toutes variantes confondues.
+        per_char = np.full((len(self.chars), len(features)), -np.inf)
+        np.maximum.at(per_char, self._char_index, similarities.T)
+        ranked = np.sort(per_char, axis=0)
+        answer = ''.join(self.chars[per_char.argmax(axis=0)])
+        if len(self.chars) < 2:
+            return answer, 0.0
+        margins = ranked[-1] - ranked[-2]
+        return answer, float(margins.min())
+
+
+def _cluster(vectors, max_clusters, iterations=10):
+    """K-moyennes sphériques : quelques variantes par caractère plutôt qu'une seule moyenne floue."""
+    k = min(max_clusters, len(vectors))
+    centroids = vectors[np.linspace(0, len(vectors) - 1, k).astype(int)]
+    for _ in range(iterations):
+        assignment = (vectors @ centroids.T).argmax(axis=1)
+        for i in range(k):
+            members = vectors[assignment == i]
+            if len(members):
+                mean = members.mean(axis=0)
+                norm = np.linalg.norm(mean)
+                centroids[i] = mean / norm if norm else mean
+    return centroids
+
+
+_model = None
+_model_lock = threading.Lock()
+
+
+def get_model():
+    """Charge le modèle une fois ; retourne None s'il n'a pas encore été entraîné."""
+    global _model
+    with _model_lock:
+        if _model is None and os.path.exists(MODEL_PATH):
+            try:
+                _model = TemplateModel.load(MODEL_PATH)
+            except Exception as e:
+                logging.error(
+                    f"Erreur lors du chargement du modèle de captcha local: {str(e)}")
+        return _model
+
+
+def solve_capcha_locally(image_source_in_base64, min_confidence=MIN_CONFIDENCE):
+    """
+    Même format de retour que solve_capcha_with_gpt. `success` est False si le
+    modèle est absent ou si la confiance est sous le seuil : l'appelant doit
+    alors utiliser GPT.
+    """
+    start_time = time.time()
+    model = get_model()
+    if model is None:
+        return {"success": False, "err_msg": "Local model not trained.", "confidence": 0.0,
+                "cost_usd": 0.0, "duration_secs": round(time.time() - start_time, 3)}
+
+    try:
+        answer, confidence = model.predict(
+            decode_image(image_source_in_base64))
+    except Exception as e:
+        return {"success": False, "err_msg": f"Local solver error: {str(e)}", "confidence": 0.0,
+                "cost_usd": 0.0, "duration_secs": round(time.time() - start_time, 3)}
+
+    result = {
+        "success": answer is not None and confidence >= min_confidence,
+        "response": answer,
+        "confidence": round(confidence, 3),
+        "cost_usd": 0.0,
+        "duration_secs": round(time.time() - start_time, 3)
+    }
+    if not result["success"]:
+        result["err_msg"] = f"Low confidence ({confidence:.2f} < {min_confidence})."
+    return result
+
+
+def load_samples(directory):
+    """Lit les exemples d'un dossier : labels.json associe chaque image PNG à sa réponse."""
+    with open(os.path.join(directory, 'labels.json'), encoding='utf-8') as file:
+        labels = json.load(file)
+    for filename, label in sorted(labels.items()):
+        with Image.open(os.path.join(directory, filename)) as image:
+            image.load()
+            yield image, label
+
+
+def evaluate(model, samples, min_confidence=MIN_CONFIDENCE):
+    """Exactitude globale, part des réponses au-dessus du seuil et exactitude de celles-ci."""
+    total = correct = accepted = accepted_correct = 0
+    durations = []
+    for image, label in samples:
+        start = time.perf_counter()
+        answer, confidence = model.predict(image)
+        durations.append(time.perf_counter() - start)
+        total += 1
+        correct += answer == label
+        if confidence >= min_confidence:
+            accepted += 1
+            accepted_correct += answer == label
+    return {
+        "samples": total,
+        "accuracy": correct / total if total else 0.0,
+        "coverage": accepted / total if total else 0.0,
+        "accepted_accuracy": accepted_correct / accepted if accepted else 0.0,
+        "mean_ms": 1000 * sum(durations) / total if total else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('command', choices=['train', 'evaluate'])
+    parser.add_argument('samples', help="dossier contenant les images et labels.json")
+    parser.add_argument('--model', default=MODEL_PATH)
+    parser.add_argument('--min-confidence', type=float, default=MIN_CONFIDENCE)
+    args = parser.parse_args()
+
+    if args.command == 'train':
+        model = TemplateModel.train(load_samples(args.samples))
+        model.save(args.model)
+        print(f"{len(model.templates)} modèles ({len(set(model.labels))} caractères) enregistrés dans {args.model}")
+    else:
+        report = evaluate(TemplateModel.load(args.model),
+                          load_samples(args.samples), args.min_confidence)
+        print(f"exemples {report['samples']} | exactitude {report['accuracy']:.1%} | "
+              f"au-dessus du seuil {report['coverage']:.1%} (exactitude {report['accepted_accuracy']:.1%}) | "
+              f"{report['mean_ms']:.1f} ms/image")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+import logging
+import threading
+import time
+from modules.booking_tennis import check_inputs, click_preferred_booking_button, confirm_booking, login, navigate_to_tennis_page, stage_search_form, submit_staged_search
+from modules.driver_pool import driver_pool
+from modules.search_client import build_search_query
+from modules.server_clock import measure_clock_offset, sleep_until
+from modules.session_cache import authenticate
+from modules.tracing import finish_attempt, record_span, start_attempt
+
+_staged = []
+_lock = threading.Lock()
+
+
+class StagedBooking:
+    """Réservation préparée avant l'ouverture des créneaux : navigateur connecté, formulaire prêt."""
+
+    def __init__(self, slot, account, driver, clock_offset):
+        self.slot = slot
+        self.account = account
+        self.driver = driver
+        self.clock_offset = clock_offset
+
+
+def prepare(slot, account):
+    """
+    Phase 1 (vers 7h58) : emprunte un navigateur, s'authentifie, ouvre la page de
+    recherche et y prépare le formulaire du créneau, puis mesure le décalage avec
+    l'horloge du site. La réservation préparée s'ajoute à celles déjà prêtes
+    (une par compte en mode 'fanout').
+    """
+    driver = None
+    start_attempt('prewarm')
+    try:
+        check_inputs(slot['date'], int(slot['start_time']),
+                     int(slot['end_time']), slot['type'])
+        driver = driver_pool.acquire()
+        authenticate(driver, account, login)
+        navigate_to_tennis_page(driver)
+        stage_search_form(driver, build_search_query(
+            slot['date'], int(slot['start_time']), int(slot['end_time']), slot['type']))
+        clock_offset = measure_clock_offset()
+    except Exception as e:
+        logging.error(
+            f"Erreur lors de la préparation de la réservation : {str(e)}")
+        driver_pool.release(driver, broken=True)
+        return False
+    finally:
+        finish_attempt()
+
+    with _lock:
+        _staged.append(StagedBooking(slot, account, driver, clock_offset))
+    return True
+
+
+def take():
+    """Retire et retourne les réservations préparées (liste vide s'il n'y en a pas)."""
+    global _staged
+    with _lock:
+        staged, _staged = _staged, []
+    return staged
+
+
+def discard():
+    """Abandonne les réservations préparées et rend leurs navigateurs au pool."""
+    for staged in take():
+        driver_pool.release(staged.driver)
+
+
+def fire(staged, target_epoch, race=None):
+    """
+    Phase 2 : attend que l'horloge du site atteigne `target_epoch`, soumet la
+    recherche et réserve. Le résultat contient `latency_ms`, le temps écoulé entre
+    l'heure cible et le clic sur le créneau. Avec `race`, le paiement n'a lieu que
+    si aucune réservation concurrente n'a abouti.
+    """
+    driver = staged.driver
+    latency_ms = None
+    broken = False
+    try:
+        sleep_until(target_epoch, staged.clock_offset)
+        start_attempt('prewarmed_booking')
+        submit_staged_search(driver)
+        click_preferred_booking_button(driver)
+        latency_ms = round(
+            (time.time() + staged.clock_offset - target_epoch) * 1000)
+        logging.info(f"First booking click {latency_ms} ms after the opening time.")
+        record_span('opening_to_first_click', latency_ms / 1000)
+
+        confirm_booking(driver, race)
+        return {"isSuccess": True, "message": "Booking successful.", "latency_ms": latency_ms}
+    except RuntimeError as e:
+        return {"isSuccess": False, "message": str(e), "latency_ms": latency_ms}
+    except Exception as e:
+        broken = True
+        return {"isSuccess": False, "message": f"Unknown error: {str(e)}", "latency_ms": latency_ms}
+    finally:
+        driver_pool.release(driver, broken=broken)
+        finish_attempt()
@@ -0,0 +1,121 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from modules.get_time_remaining import get_remaining_time
+
+REMAINING_HOURS_TTL = int(os.getenv('REMAINING_HOURS_TTL', '900'))
+# Part du TTL après laquelle une lecture déclenche un rafraîchissement en arrière-plan.
+REMAINING_HOURS_REFRESH_AHEAD = float(
+    os.getenv('REMAINING_HOURS_REFRESH_AHEAD', '0.8'))
+
+
+class _Entry:
+    def __init__(self, account, result):
+        self.account = account
+        self.result = result
+        self.fetched_at = time.monotonic()
+        self.read_since_fetch = False
+
+
+class RemainingHoursCache:
+    """
+    Heures restantes des carnets, par compte, gardées `ttl` secondes. Les
+    lectures concurrentes d'un compte absent du cache partagent une seule
+    session Chrome, et les entrées lues sont rafraîchies avant leur expiration.
+    """
+
+    def __init__(self, loader=get_remaining_time, ttl=REMAINING_HOURS_TTL, refresh_ahead=REMAINING_HOURS_REFRESH_AHEAD):
+        self.loader = loader
+        self.ttl = ttl
+        self.refresh_after = ttl * refresh_ahead
+        self._entries = {}
+        self._inflight = {}
+        # Incrémenté à chaque invalidation : un chargement commencé avant n'est pas gardé.
+        self._generations = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1)
+
+    def get(self, account):
+        """Retourne le résultat de `get_remaining_time(account)`, depuis le cache si possible."""
+        account_id = account['id']
+        with self._lock:
+            entry = self._entries.get(account_id)
+            if entry is not None:
+                age = time.monotonic() - entry.fetched_at
+                if age < self.ttl:
+                    entry.read_since_fetch = True
+                    if age >= self.refresh_after:
+                        self._refresh_in_background(account)
+                    return entry.result
+            future, owner = self._join_or_start(account)
+
+        if owner:
+            self._load(account, future)
+        return future.result()
+
+    def peek(self, account_id):
+        """Retourne le résultat en cache s'il n'a pas expiré, sans jamais lancer Chrome, sinon None."""
+        with self._lock:
+            entry = self._entries.get(account_id)
+            if entry is None or time.monotonic() - entry.fetched_at >= self.ttl:
+                return None
+            return entry.result
+
+    def invalidate(self, account_id=None):
+        """Oublie les heures d'un compte (après une réservation ou une modification), ou de tous."""
+        with self._lock:
+            account_ids = [account_id] if account_id is not None else list(
+                set(self._entries) | set(self._inflight))
+            for key in account_ids:
+                self._entries.pop(key, None)
+                self._inflight.pop(key, None)
+                self._generations[key] = self._generations.get(key, 0) + 1
+
+    def refresh_expiring(self):
+        """
+        Rafraîchit les entrées proches de l'expiration qui ont été lues depuis leur
+        dernier chargement ; les comptes que personne ne consulte ne relancent pas Chrome.
+        """
+        now = time.monotonic()
+        with self._lock:
+            for entry in list(self._entries.values()):
+                if entry.read_since_fetch and now - entry.fetched_at >= self.refresh_after:
+                    self._refresh_in_background(entry.account)
+
+    def _join_or_start(self, account):
+        # Appelé avec self._lock : retourne (future, True) si l'appelant doit charger.
+        future = self._inflight.get(account['id'])
+        if future is not None:
+            return future, False
+        future = Future()
+        future.generation = self._generations.get(account['id'], 0)
+        self._inflight[account['id']] = future
+        return future, True
+
+    def _refresh_in_background(self, account):
+        # Appelé avec self._lock.
+        future, owner = self._join_or_start(account)
+        if owner:
+            self._executor.submit(self._load, account, future)
+
+    def _load(self, account, future):
+        try:
+            result = self.loader(account)
+        except Exception as e:
+            logging.error(
+                f"Erreur lors de la récupération des heures restantes: {str(e)}")
+            result = {"isSuccess": False,
+                      "message": f"Erreur inconnue : {str(e)}"}
+
+        with self._lock:
+            if self._inflight.get(account['id']) is future:
+                del self._inflight[account['id']]
+            # Seuls les succès sont gardés : une erreur est retentée au prochain appel.
+            if result["isSuccess"] and future.generation == self._generations.get(account['id'], 0):
+                self._entries[account['id']] = _Entry(account, result)
+        future.set_result(result)
+
+
+remaining_hours_cache = RemainingHoursCache()
@@ -0,0 +1,183 @@
+import contextvars
+import json
+import logging
+import os
+import random
+import threading
+from datetime import datetime, timedelta
+import requests
+from apscheduler.jobstores.base import JobLookupError
+from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.triggers.date import DateTrigger
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from modules.booking_race import BookingCancelled
+from modules.driver_pool import DriverPoolExhausted
+
+# Classes d'échec d'une tentative de réservation.
+NO_SLOT = 'no_slot'
+CAPTCHA = 'captcha'
+TIMEOUT = 'timeout'
+AUTH = 'auth'
+SITE_DOWN = 'site_down'
+CANCELLED = 'cancelled'
+INVALID = 'invalid'
+UNKNOWN = 'unknown'
+
+# Erreurs réseau de Chrome : le site ne répond pas, ce n'est pas la page qui a changé.
+SITE_DOWN_MARKERS = ('net::ERR_', 'ERR_CONNECTION', 'ERR_NAME_NOT_RESOLVED', '502 Bad Gateway', '503 Service')
+
+
+class NoSlotAvailable(RuntimeError):
+    """Aucun créneau ne correspond aux filtres."""
+
+
+class RetryRule:
+    """
+    Conduite à tenir pour une classe d'échec : `max_retries` reprises au plus,
+    après un délai exponentiel de `base_delay` à `max_delay` secondes, à ±`jitter`
+    (fraction) près.
+    """
+
+    def __init__(self, retry=True, base_delay=10, max_delay=60, max_retries=2, jitter=0.2):
+        self.retry = retry
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retries = max_retries
+        self.jitter = jitter
+
+    def delay(self, retry_number):
+        delay = min(self.max_delay, self.base_delay * 2 ** (retry_number - 1))
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+
+DEFAULT_RULES = {
+    NO_SLOT: RetryRule(retry=False),
+    # La reprise relance la recherche dans la même session : inutile d'attendre.
+    CAPTCHA: RetryRule(base_delay=1, max_delay=5, max_retries=2),
+    TIMEOUT: RetryRule(base_delay=5, max_delay=30, max_retries=2),
+    # Identifiants refusés : une seule nouvelle chance.
+    AUTH: RetryRule(base_delay=10, max_delay=10, max_retries=1),
+    SITE_DOWN: RetryRule(base_delay=30, max_delay=120, max_retries=3),
+    CANCELLED: RetryRule(retry=False),
+    INVALID: RetryRule(retry=False),
+    UNKNOWN: RetryRule(base_delay=10, max_delay=60, max_retries=2),
+}
+
+
+class RetryPolicy:
+    """
+    Choisit, pour chaque échec, le délai avant la prochaine tentative ou
+    l'abandon : règle de la classe d'échec, nombre total de tentatives et
+    échéance depuis la première tentative.
+    """
+
+    def __init__(self, rules=None, max_attempts=3, deadline_secs=600):
+        self.rules = {**DEFAULT_RULES, **(rules or {})}
+        self.max_attempts = max_attempts
+        self.deadline_secs = deadline_secs
+
+    def next_delay(self, failure_class, retry_number, attempts, elapsed_secs):
+        """
+        Délai en secondes avant la `retry_number`-ième reprise pour cette classe
+        d'échec, ou None s'il faut abandonner.
+        """
+        rule = self.rules.get(failure_class, self.rules[UNKNOWN])
+        if not rule.retry or retry_number > rule.max_retries or attempts >= self.max_attempts:
+            return None
+        delay = rule.delay(retry_number)
+        if elapsed_secs + delay > self.deadline_secs:
+            return None
+        return delay
+
+
+def load_retry_policy():
+    """
+    Politique de la configuration : BOOKING_RETRY_RULES (JSON) surcharge des
+    règles, par exemple '{"no_slot": {"retry": true, "base_delay": 20}}'.
+    """
+    rules = {}
+    try:
+        for failure_class, overrides in json.loads(os.getenv('BOOKING_RETRY_RULES', '{}')).items():
+            default = DEFAULT_RULES.get(failure_class, DEFAULT_RULES[UNKNOWN])
+            rules[failure_class] = RetryRule(**{**vars(default), **overrides})
+    except (ValueError, TypeError, AttributeError) as e:
+        logging.error(f"BOOKING_RETRY_RULES invalide, règles par défaut utilisées : {str(e)}")
+        rules = {}
+    return RetryPolicy(
+        rules,
+        max_attempts=int(os.getenv('BOOKING_MAX_ATTEMPTS', '3')),
+        deadline_secs=float(os.getenv('BOOKING_RETRY_DEADLINE_SECS', '600')),
+    )
+
+
+booking_retry_policy = load_retry_policy()
+
+
+def _exception_chain(exception):
+    # Les étapes relancent une RuntimeError depuis leur `except` : l'erreur d'origine est dans __context__.
+    seen = set()
+    while exception is not None and id(exception) not in seen:
+        seen.add(id(exception))
+        yield exception
+        exception = exception.__cause__ or exception.__context__
+
+
+def classify_failure(step, exception):
+    """Classe d'échec d'une tentative, d'après l'étape fautive et la chaîne d'exceptions."""
+    chain = list(_exception_chain(exception))
+    if any(isinstance(e, BookingCancelled) for e in chain):
+        return CANCELLED
+    if any(isinstance(e, NoSlotAvailable) for e in chain):
+        return NO_SLOT
+    if any(isinstance(e, ValueError) for e in chain):
+        return INVALID
+    if any(isinstance(e, (requests.ConnectionError, requests.Timeout)) for e in chain) or any(
+            isinstance(e, WebDriverException) and any(marker in str(e) for marker in SITE_DOWN_MARKERS)
+            for e in chain):
+        return SITE_DOWN
+    if any(isinstance(e, DriverPoolExhausted) for e in chain):
+        # Tous les navigateurs sont pris : une autre réservation va en rendre un.
+        return TIMEOUT
+    if step == 'captcha':
+        return CAPTCHA
+    if step == 'authenticate':
+        return AUTH
+    if any(isinstance(e, TimeoutException) for e in chain):
+        return TIMEOUT
+    return UNKNOWN
+
+
+# Les reprises attendent dans ce scheduler, pas dans un thread endormi.
+_scheduler = BackgroundScheduler()
+_scheduler_lock = threading.Lock()
+
+
+def _ensure_started():
+    with _scheduler_lock:
+        if not _scheduler.running:
+            _scheduler.start()
+
+
+def _run_now(job_id):
+    try:
+        _scheduler.modify_job(job_id, next_run_time=datetime.now())
+    except JobLookupError:
+        pass
+
+
+def schedule_retry(func, delay_secs, race=None):
+    """
+    Planifie `func()` dans `delay_secs` secondes, dans le contexte courant
+    (tâche, flux d'événements). Si `race` est gagnée entre-temps, la reprise
+    est avancée pour constater l'annulation et libérer sa session sans attendre.
+    """
+    _ensure_started()
+    job = _scheduler.add_job(
+        contextvars.copy_context().run,
+        trigger=DateTrigger(run_date=datetime.now() + timedelta(seconds=delay_secs)),
+        args=[func],
+        misfire_grace_time=None,
+    )
+    if race is not None:
+        race.on_won(lambda: _run_now(job.id))
+    return job.id
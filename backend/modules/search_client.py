@@ -0,0 +1,163 @@
+import re
+from datetime import datetime
+from html.parser import HTMLParser
+import requests
+from modules.session_cache import build_requests_session
+from modules.site_urls import TENNIS_BASE_URL
+from typesForFilters.court_type_enum import CourtType
+
+SEARCH_PARAMS = {'page': 'recherche', 'action': 'rechercher_creneau'}
+LOCATION_NAME = 'Elisabeth'
+
+# Valeurs du filtre "selInOut" du formulaire : V = couvert, F = découvert.
+IN_OUT_BY_COURT_TYPE = {
+    CourtType.INDOOR.value: ['V'],
+    CourtType.OUTDOOR.value: ['F'],
+    CourtType.BOTH.value: ['V', 'F'],
+}
+# Heure d'un créneau, dans `datedeb` ("2024/05/12 18:00:00") comme dans le texte du bloc ("18h").
+HOUR_PATTERN = re.compile(r'(\d{1,2})\s*(?:h|:\d{2})')
+
+
+def build_search_query(date, start_time, end_time, court_type):
+    """Construit les champs du formulaire recherche_creneau."""
+    date_obj = datetime.strptime(date, '%Y-%m-%d')
+    return {
+        'hourRange': f'{start_time}-{end_time}',
+        'when': date_obj.strftime('%d/%m/%Y'),
+        'selWhereTennisName': LOCATION_NAME,
+        'selInOut': IN_OUT_BY_COURT_TYPE[court_type],
+    }
+
+
+class SearchResultParser(HTMLParser):
+    """Extrait les blocs `search-result-block` / `tennis-court` d'une page de résultats."""
+
+    def __init__(self):
+        super().__init__()
+        self.no_result = False
+        self.results = []
+        self._tennis = None
+        self._block_depth = None
+        self._court = None
+        self._court_depth = None
+        self._heading = False
+        self._in_button = False
+        self._depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        classes = (attrs.get('class') or '').split()
+
+        if tag == 'div':
+            self._depth += 1
+            if 'no_result' in classes:
+                self.no_result = True
+            if 'search-result-block' in classes:
+                self._block_depth = self._depth
+                self._tennis = {'name': '', 'text': []}
+            elif 'tennis-court' in classes and self._block_depth is not None:
+                self._court_depth = self._depth
+                self._court = {'text': [], 'button': None}
+        elif tag == 'h4' and self._tennis is not None and self._court is None:
+            self._heading = True
+        elif tag == 'button' and self._court is not None:
+            self._in_button = True
+            if self._court['button'] is None:
+                self._court['button'] = attrs
+
+    def handle_endtag(self, tag):
+        if tag == 'h4':
+            self._heading = False
+        elif tag == 'button':
+            self._in_button = False
+        if tag != 'div':
+            return
+
+        if self._court is not None and self._depth == self._court_depth:
+            self.results.append(self._build_record())
+            self._court = None
+            self._court_depth = None
+        elif self._tennis is not None and self._depth == self._block_depth:
+            self._tennis = None
+            self._block_depth = None
+        self._depth -= 1
+
+    def handle_data(self, data):
+        text = data.strip()
+        if not text or self._in_button:
+            return
+        if self._court is not None:
+            self._court['text'].append(text)
+        elif self._tennis is not None:
+            if self._heading and not self._tennis['name']:
+                self._tennis['name'] = text
+            self._tennis['text'].append(text)
+
+    def _build_record(self):
+        text = ' '.join(self._court['text'])
+        button = self._court['button'] or {}
+        date_deb = button.get('datedeb')
+        match = HOUR_PATTERN.search(date_deb or ' '.join(self._tennis['text']))
+        hour = int(match.group(1)) if match else None
+
+        lowered = text.lower()
+        if 'découvert' in lowered:
+            covered = False
+        elif 'couvert' in lowered:
+            covered = True
+        else:
+            covered = None
+
+        return {
+            'tennis': self._tennis['name'],
+            'court': self._court['text'][0] if self._court['text'] else '',
+            'surface': next((part for part in self._court['text'][1:]
+                             if 'couvert' not in part.lower()), None),
+            'covered': covered,
+            'hour': hour,
+            'court_id': button.get('courtid'),
+            'date_deb': date_deb,
+            'date_fin': button.get('datefin'),
+        }
+
+
+def parse_search_results(html):
+    """Retourne {"no_result": bool, "results": [...]} pour une page de résultats."""
+    parser = SearchResultParser()
+    parser.feed(html)
+    parser.close()
+    return {"no_result": parser.no_result, "results": parser.results}
+
+
+class SearchClient:
+    """Client HTTP de recherche de créneaux, sans navigateur."""
+
+    def __init__(self, cookies=None, base_url=TENNIS_BASE_URL, timeout=10):
+        self.base_url = base_url
+        self.timeout = timeout
+        self.session = build_requests_session(cookies or [])
+
+    def search(self, date, start_time, end_time, court_type):
+        """Envoie la recherche et retourne les créneaux disponibles."""
+        try:
+            response = self.session.post(
+                self.base_url,
+                params=SEARCH_PARAMS,
+                data=build_search_query(
+                    date, start_time, end_time, court_type),
+                timeout=self.timeout
+            )
+            response.raise_for_status()
+        except requests.RequestException as e:
+            raise RuntimeError(
+                f"Erreur lors de la recherche de créneaux : {str(e)}")
+
+        try:
+            parsed = parse_search_results(response.text)
+        except Exception as e:
+            raise RuntimeError(
+                f"Erreur lors de la lecture des résultats de recherche : {str(e)}")
+        if parsed['no_result']:
+            return []
+        return parsed['results']
@@ -0,0 +1,66 @@
+import logging
+import statistics
+import time
+from email.utils import parsedate_to_datetime
+import requests
+from modules.site_urls import TENNIS_BASE_URL
+
+CLOCK_REFERENCE_URL = TENNIS_BASE_URL
+
+
+def _server_date(session, url, timeout):
+    """Retourne (heure locale au milieu de l'aller-retour, secondes de l'en-tête Date)."""
+    sent = time.time()
+    response = session.head(url, timeout=timeout, allow_redirects=False)
+    received = time.time()
+    header = response.headers.get('Date')
+    if not header:
+        raise RuntimeError("Erreur : le serveur n'envoie pas d'en-tête Date.")
+    return (sent + received) / 2, parsedate_to_datetime(header).timestamp()
+
+
+def measure_clock_offset(url=CLOCK_REFERENCE_URL, max_duration=3.0, interval=0.05, timeout=5):
+    """
+    Estime le décalage (en secondes) entre l'horloge du site et l'horloge locale :
+    heure serveur ≈ time.time() + décalage.
+
+    L'en-tête Date n'a qu'une précision d'une seconde : on interroge le serveur en
+    boucle jusqu'à voir la seconde changer, ce qui situe le changement de seconde
+    entre deux échantillons consécutifs. Si aucun changement n'est observé dans le
+    temps imparti, on retombe sur la médiane des échantillons (à ±0,5 s).
+    """
+    session = requests.Session()
+    estimates = []
+    previous = None
+    deadline = time.time() + max_duration
+
+    try:
+        while True:
+            local_mid, server_seconds = _server_date(session, url, timeout)
+            if previous is not None and server_seconds > previous[1]:
+                return server_seconds - (previous[0] + local_mid) / 2
+            previous = (local_mid, server_seconds)
+            # La valeur réelle est quelque part dans [s, s + 1[.
+            estimates.append(server_seconds + 0.5 - local_mid)
+            if time.time() >= deadline:
+                break
+            time.sleep(interval)
+    except (requests.RequestException, RuntimeError) as e:
+        logging.error(
+            f"Erreur lors de la mesure de l'horloge du site : {str(e)}")
+        if not estimates:
+            return 0.0
+    finally:
+        session.close()
+
+    return statistics.median(estimates)
+
+
+def sleep_until(target_epoch, offset=0.0, spin=0.05):
+    """Attend que l'horloge du site (horloge locale + décalage) atteigne `target_epoch`."""
+    local_target = target_epoch - offset
+    remaining = local_target - time.time()
+    if remaining > spin:
+        time.sleep(remaining - spin)
+    while time.time() < local_target:
+        pass
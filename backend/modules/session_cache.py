@@ -0,0 +1,132 @@
+import logging
+import time
+import requests
+from modules.database import delete_account_session, get_account_session, save_account_session
+from modules.site_urls import AUTH_HOST, CARNET_URL
+from modules.tracing import TracedWebDriverWait, traced
+
+# Page légère qui n'est accessible qu'avec une session valide : sans
+# authentification, le site redirige vers le formulaire Keycloak.
+SESSION_CHECK_URL = CARNET_URL
+
+# Champs acceptés par la commande CDP Network.setCookies.
+COOKIE_FIELDS = ('name', 'value', 'domain', 'path',
+                 'secure', 'httpOnly', 'sameSite', 'expires')
+
+
+def _is_expired(cookie, now):
+    expires = cookie.get('expires', -1)
+    return expires not in (None, -1) and expires <= now
+
+
+def _unexpired_cookies(cookies):
+    now = time.time()
+    return [cookie for cookie in cookies if not _is_expired(cookie, now)]
+
+
+def build_requests_session(cookies):
+    """Construit une requests.Session portant les cookies enregistrés."""
+    session = requests.Session()
+    for cookie in cookies:
+        session.cookies.set(
+            cookie['name'],
+            cookie['value'],
+            domain=cookie.get('domain'),
+            path=cookie.get('path', '/')
+        )
+    return session
+
+
+# Issues de la vérification d'une session enregistrée.
+SESSION_VALID = 'valid'
+SESSION_INVALID = 'invalid'
+# Le site n'a pas répondu (réseau, erreur serveur) : rien ne dit que la session a expiré.
+SESSION_UNKNOWN = 'unknown'
+
+
+def check_session(cookies, timeout=10):
+    """Vérifie en une requête que les cookies donnent toujours accès au site."""
+    try:
+        response = build_requests_session(cookies).get(
+            SESSION_CHECK_URL, timeout=timeout)
+    except requests.RequestException as e:
+        logging.warning(
+            f"Session non vérifiée, le site ne répond pas : {str(e)}")
+        return SESSION_UNKNOWN
+
+    if AUTH_HOST in response.url:
+        return SESSION_INVALID
+    if response.status_code >= 500:
+        logging.warning(
+            f"Session non vérifiée, erreur du site : {response.status_code}")
+        return SESSION_UNKNOWN
+    return SESSION_VALID if response.ok else SESSION_INVALID
+
+
+def get_cached_cookies(account):
+    """
+    Retourne les cookies encore valides d'un compte, ou None. La session
+    enregistrée n'est supprimée que si le site la refuse : si la vérification
+    échoue, les cookies sont gardés et réutilisés.
+    """
+    result = get_account_session(account['id'])
+    if not result['isSuccess']:
+        return None
+
+    cookies = _unexpired_cookies(result['data']['cookies'])
+    if cookies and check_session(cookies) != SESSION_INVALID:
+        return cookies
+
+    delete_account_session(account['id'])
+    return None
+
+
+def load_cookies(driver, cookies):
+    """Injecte des cookies, tous domaines confondus, dans le driver."""
+    driver.execute_cdp_cmd('Network.setCookies', {
+        'cookies': [
+            {key: cookie[key] for key in COOKIE_FIELDS if key in cookie}
+            for cookie in cookies
+        ]
+    })
+
+
+def restore_session(driver, account, cookies=None):
+    """Charge la session enregistrée dans le driver. Retourne False si un login est nécessaire."""
+    cookies = cookies or get_cached_cookies(account)
+    if not cookies:
+        return False
+
+    try:
+        load_cookies(driver, cookies)
+        return True
+    except Exception as e:
+        logging.error(
+            f"Erreur lors de la restauration de la session : {str(e)}")
+        return False
+
+
+def store_session(driver, account):
+    """Enregistre les cookies de tous les domaines (tennis et auth) après un login."""
+    try:
+        cookies = driver.execute_cdp_cmd('Network.getAllCookies', {})
+        save_account_session(account['id'], cookies.get('cookies', []))
+    except Exception as e:
+        logging.error(
+            f"Erreur lors de l'enregistrement de la session : {str(e)}")
+
+
+@traced
+def authenticate(driver, account, login, cookies=None):
+    """Réutilise la session enregistrée si elle est valide, sinon appelle `login`."""
+    if restore_session(driver, account, cookies):
+        return
+
+    login(driver, account)
+    try:
+        # Attend la fin des redirections pour récupérer aussi les cookies de tennis.paris.fr
+        TracedWebDriverWait(driver, 30).until(
+            lambda d: AUTH_HOST not in d.current_url)
+    except Exception:
+        return
+    store_session(driver, account)
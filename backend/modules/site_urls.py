@@ -0,0 +1,16 @@
+import os
+from urllib.parse import urlparse
+
+# Adresses du site de réservation, surchargeables pour viser un faux site local
+# (voir benchmarks/fake_tennis_site.py).
+TENNIS_BASE_URL = os.getenv(
+    'TENNIS_BASE_URL', 'https://tennis.paris.fr/tennis/jsp/site/Portal.jsp')
+LOGIN_URL = os.getenv(
+    'TENNIS_LOGIN_URL',
+    'https://v70-auth.paris.fr/auth/realms/paris/protocol/openid-connect/auth?client_id=moncompte_modal&response_type=code&redirect_uri=https%3A%2F%2Fmoncompte.paris.fr%2Fmoncompte%2Fjsp%2Fsite%2FPortal.jsp%3Fpage%3Dmyluteceusergu%26view%3DcreateAccountModal%26close_modal%3Dtrue%26data_client%3DauthData%26handler_name%3DbannerLoginHandler&scope=openid&state=be6675ef91c4d4e5143440d10b7e0cef&nonce=39f06d1f2f815f275edec4f6b8c30a13&app_code=&back_url=https%3A%2F%2Ftennis.paris.fr%2Ftennis%2Fjsp%2Fsite%2FPortal.jsp%3Fpage%3Dtennis%26view%3DstartDefault%26full%3D1')
+# Hôte du serveur d'authentification : tant que l'URL courante y pointe, l'utilisateur n'est pas connecté.
+AUTH_HOST = urlparse(LOGIN_URL).netloc
+SITE_ORIGINS = [f'{url.scheme}://{url.netloc}' for url in map(urlparse, (TENNIS_BASE_URL, LOGIN_URL))]
+
+SEARCH_PAGE_URL = f'{TENNIS_BASE_URL}?page=recherche&view=recherche_creneau'
+CARNET_URL = f'{TENNIS_BASE_URL}?page=profil&view=carnet_reservation'
@@ -0,0 +1,62 @@
+import logging
+import os
+
+CRITERIA = ('hour', 'court', 'surface')
+
+
+def _split(value):
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
+class SlotPreferences:
+    """
+    Classement des créneaux d'une page de résultats. Chaque critère est une
+    liste ordonnée de valeurs préférées (noms de court et surfaces comparés sans
+    casse, par inclusion ; heures exactes), et `order` dit quel critère départage
+    en premier. Les créneaux hors liste viennent après, dans l'ordre de la page.
+    """
+
+    def __init__(self, courts=None, surfaces=None, hours=None, order=CRITERIA):
+        self.preferences = {
+            'court': [court.lower() for court in courts or []],
+            'surface': [surface.lower() for surface in surfaces or []],
+            'hour': list(hours or []),
+        }
+        self.order = [criterion for criterion in order if criterion in CRITERIA]
+
+    def _criterion_rank(self, criterion, result):
+        preferred = self.preferences[criterion]
+        value = result.get(criterion)
+        if value is None:
+            return len(preferred)
+        for rank, wanted in enumerate(preferred):
+            if value == wanted if criterion == 'hour' else wanted in value.lower():
+                return rank
+        return len(preferred)
+
+    def rank(self, results):
+        """Retourne les créneaux du plus au moins préféré (tri stable)."""
+        return sorted(results, key=lambda result: tuple(
+            self._criterion_rank(criterion, result) for criterion in self.order))
+
+
+def load_slot_preferences():
+    """
+    Préférences de la configuration, par exemple BOOKING_PREFERRED_HOURS='19,18,20',
+    BOOKING_PREFERRED_COURTS='Court 3,Court 1', BOOKING_PREFERRED_SURFACES='Terre battue'
+    et BOOKING_PREFERENCE_ORDER='hour,court,surface'.
+    """
+    try:
+        hours = [int(hour) for hour in _split(os.getenv('BOOKING_PREFERRED_HOURS', ''))]
+    except ValueError as e:
+        logging.error(f"BOOKING_PREFERRED_HOURS invalide, heures ignorées : {str(e)}")
+        hours = []
+    return SlotPreferences(
+        courts=_split(os.getenv('BOOKING_PREFERRED_COURTS', '')),
+        surfaces=_split(os.getenv('BOOKING_PREFERRED_SURFACES', '')),
+        hours=hours,
+        order=_split(os.getenv('BOOKING_PREFERENCE_ORDER', ','.join(CRITERIA))),
+    )
+
+
+slot_preferences = load_slot_preferences()
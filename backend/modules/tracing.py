@@ -0,0 +1,146 @@
+import functools
+import logging
+import math
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from selenium.webdriver.support.ui import WebDriverWait
+from modules.database import add_pipeline_spans, get_pipeline_span_durations
+# Import du module (et non de poll_interval) : fast_wait importe aussi ce module.
+import modules.fast_wait as fast_wait
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+_local = threading.local()
+_step_listeners = []
+
+
+class Attempt:
+    """Spans collectés pendant une tentative (une exécution du pipeline dans un thread)."""
+
+    def __init__(self, pipeline):
+        self.id = str(uuid.uuid4())
+        self.pipeline = pipeline
+        self.spans = []
+        self.stack = []
+
+
+def start_attempt(pipeline):
+    """Commence une tentative dans le thread courant et retourne son identifiant."""
+    _local.attempt = Attempt(pipeline)
+    return _local.attempt.id
+
+
+def finish_attempt():
+    """Enregistre les spans de la tentative du thread courant dans SQLite."""
+    attempt = getattr(_local, 'attempt', None)
+    _local.attempt = None
+    if attempt is None or not attempt.spans:
+        return
+    add_pipeline_spans(attempt.id, attempt.pipeline, attempt.spans)
+
+
+def current_step():
+    attempt = getattr(_local, 'attempt', None)
+    if attempt is None or not attempt.stack:
+        return None
+    return attempt.stack[-1]
+
+
+def record_span(step, duration_secs, success=True):
+    """Ajoute un span déjà mesuré (par exemple la durée renvoyée par le solveur de captcha)."""
+    attempt = getattr(_local, 'attempt', None)
+    if attempt is None or duration_secs is None:
+        return
+    attempt.spans.append((step, duration_secs * 1000, success))
+
+
+@contextmanager
+def span(step):
+    """Mesure la durée du bloc et l'ajoute à la tentative en cours."""
+    attempt = getattr(_local, 'attempt', None)
+    if attempt is None:
+        yield
+        return
+
+    attempt.stack.append(step)
+    start = time.perf_counter()
+    success = False
+    try:
+        yield
+        success = True
+    finally:
+        attempt.stack.pop()
+        record_span(step, time.perf_counter() - start, success)
+
+
+def add_step_listener(listener):
+    """Enregistre `listener(step)`, appelé dans le thread du pipeline à chaque début d'étape."""
+    _step_listeners.append(listener)
+
+
+def _notify_step(step):
+    for listener in _step_listeners:
+        try:
+            listener(step)
+        except Exception as e:
+            logging.error(
+                f"Erreur dans un écouteur d'étape ({step}) : {str(e)}")
+
+
+def traced(func):
+    """Décore une étape du pipeline pour qu'elle produise un span à son nom."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        _notify_step(func.__name__)
+        with span(func.__name__):
+            return func(*args, **kwargs)
+    return wrapper
+
+
+class TracedWebDriverWait(WebDriverWait):
+    """
+    WebDriverWait dont chaque attente produit un span `<étape>.wait`, avec le
+    polling rapide de modules/fast_wait.py au lieu des 0,5 s de Selenium.
+    """
+
+    def __init__(self, driver, timeout, poll_frequency=None, ignored_exceptions=None):
+        super().__init__(driver, timeout, poll_frequency or fast_wait.poll_interval(), ignored_exceptions)
+
+    def until(self, method, message=""):
+        with span(f"{current_step() or 'pipeline'}.wait"):
+            return super().until(method, message)
+
+    def until_not(self, method, message=""):
+        with span(f"{current_step() or 'pipeline'}.wait"):
+            return super().until_not(method, message)
+
+
+def _quantile(sorted_values, q):
+    """Quantile par la méthode du rang le plus proche."""
+    index = max(0, math.ceil(q * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+def render_metrics():
+    """Retourne les p50/p95/p99 de chaque étape au format texte Prometheus."""
+    durations = {}
+    for pipeline, step, duration_ms in get_pipeline_span_durations():
+        durations.setdefault((pipeline, step), []).append(duration_ms / 1000)
+
+    lines = [
+        "# HELP booking_step_duration_seconds Durée des étapes du pipeline de réservation.",
+        "# TYPE booking_step_duration_seconds summary",
+    ]
+    for (pipeline, step), values in sorted(durations.items()):
+        values.sort()
+        labels = f'pipeline="{pipeline}",step="{step}"'
+        for q in QUANTILES:
+            lines.append(
+                f'booking_step_duration_seconds{{{labels},quantile="{q}"}} {_quantile(values, q):.6f}')
+        lines.append(
+            f'booking_step_duration_seconds_sum{{{labels}}} {sum(values):.6f}')
+        lines.append(
+            f'booking_step_duration_seconds_count{{{labels}}} {len(values)}')
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,18 @@
+import os
+import sys
+import pytest
+
+# Les modules s'importent comme depuis backend/ (`from modules.x import ...`).
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('CAPTCHA_SAMPLES', '0')
+
+import modules.database as database  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def temp_database(tmp_path, monkeypatch):
+    """Chaque test travaille sur sa propre base SQLite."""
+    monkeypatch.setattr(database, 'DB_NAME', str(tmp_path / 'slots.db'))
+    database.init_db()
+    yield database
+    database.close_connection()
@@ -0,0 +1,234 @@
+import pytest
+from selenium.common.exceptions import WebDriverException
+import modules.booking_tennis as booking_tennis
+from modules.booking_pipeline import ResumablePipeline, Step, StepFailed
+from modules.booking_race import BookingRace
+from modules.retry_policy import (AUTH, CAPTCHA, SITE_DOWN, TIMEOUT, UNKNOWN, NoSlotAvailable, RetryPolicy,
+                                  RetryRule)
+from modules.site_urls import AUTH_HOST, SEARCH_PAGE_URL
+
+RESULT = {'court': 'Court 1', 'surface': 'Résine', 'hour': 18, 'court_id': '1-18'}
+
+# Fonction remplacée dans booking_tennis -> étape du pipeline qui l'appelle.
+STUBBED_STEPS = {
+    'search_available_slots': 'search',
+    'authenticate': 'authenticate',
+    'navigate_to_tennis_page': 'open_search_page',
+    'open_search_results': 'search_results',
+    'click_preferred_booking_button': 'select_slot',
+    'solve_captcha': 'captcha',
+    'add_partner': 'partner',
+    'select_payment_formule': 'payment',
+}
+
+
+class FakeDriver:
+    def __init__(self):
+        self.current_url = SEARCH_PAGE_URL
+
+
+class FakeDriverPool:
+    def __init__(self):
+        self.acquired = []
+        self.released = []
+
+    def acquire(self, timeout=None):
+        driver = FakeDriver()
+        self.acquired.append(driver)
+        return driver
+
+    def release(self, driver, broken=False):
+        if driver is not None:
+            self.released.append((driver, broken))
+
+
+class FakeSite:
+    """Étapes du pipeline simulées : chaque appel est noté, et `fail` fait échouer une étape une fois."""
+
+    def __init__(self):
+        self.calls = []
+        self.failures = {}
+        self.events = []
+
+    def fail(self, step, exception, times=1):
+        self.failures[step] = [exception] * times
+
+    def stub(self, step, value=None):
+        def run(*args, **kwargs):
+            self.calls.append(step)
+            if self.failures.get(step):
+                raise self.failures[step].pop(0)
+            return value
+        return run
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    pool = FakeDriverPool()
+    monkeypatch.setattr(booking_tennis, 'driver_pool', pool)
+    return pool
+
+
+@pytest.fixture
+def site(monkeypatch, pool):
+    site = FakeSite()
+    values = {'search_available_slots': [RESULT], 'click_preferred_booking_button': RESULT}
+    for name, step in STUBBED_STEPS.items():
+        monkeypatch.setattr(booking_tennis, name, site.stub(step, values.get(name)))
+    monkeypatch.setattr(booking_tennis, 'get_cached_cookies', lambda account: {'JSESSIONID': 'session'})
+    monkeypatch.setattr(booking_tennis, 'publish_event',
+                        lambda event, **data: site.events.append(data.get('step')))
+    return site
+
+
+@pytest.fixture
+def scheduled(monkeypatch):
+    """Les reprises s'exécutent tout de suite ; leurs délais sont notés."""
+    delays = []
+
+    def schedule_retry(func, delay_secs, race=None):
+        delays.append(delay_secs)
+        func()
+
+    monkeypatch.setattr(booking_tennis, 'schedule_retry', schedule_retry)
+    return delays
+
+
+def immediate_policy(delay=0, max_retries=2):
+    rule = RetryRule(base_delay=delay, max_delay=delay, max_retries=max_retries, jitter=0)
+    return RetryPolicy({failure_class: rule for failure_class in (CAPTCHA, TIMEOUT, AUTH, SITE_DOWN, UNKNOWN)},
+                       max_attempts=5)
+
+
+def book(policy=None, race=None):
+    results = []
+    booking_tennis.start_booking('2030-01-02', 18, 20, 'indoor', {'id': 'account', 'email': 'a@b'},
+                                 race=race, on_done=results.append, policy=policy or immediate_policy())
+    assert len(results) == 1
+    return results[0]
+
+
+def test_pipeline_runs_steps_in_order_and_wraps_failures():
+    calls = []
+    pipeline = ResumablePipeline([
+        Step('first', lambda state: calls.append('first')),
+        Step('second', lambda state: calls.append('second')),
+        Step('third', lambda state: 1 / 0),
+    ])
+
+    with pytest.raises(StepFailed) as failure:
+        pipeline.run(object())
+    assert calls == ['first', 'second']
+    assert failure.value.step == 'third'
+    assert isinstance(failure.value.cause, ZeroDivisionError)
+
+    calls.clear()
+    with pytest.raises(StepFailed):
+        pipeline.run(object(), start='second')
+    assert calls == ['second']
+
+
+def test_resume_point_takes_the_earliest_step():
+    pipeline = booking_tennis.BOOKING_PIPELINE
+    assert pipeline.resume_point('search') == 'search'
+    assert pipeline.resume_point('captcha') == 'open_search_page'
+    assert pipeline.resume_point('captcha', 'authenticate') == 'authenticate'
+    assert pipeline.resume_point('search', 'authenticate') == 'search'
+
+
+@pytest.mark.parametrize('step, resume_from', [
+    ('search', 'search'),
+    ('authenticate', 'authenticate'),
+    ('open_search_page', 'open_search_page'),
+    ('search_results', 'open_search_page'),
+    ('select_slot', 'open_search_page'),
+    ('captcha', 'open_search_page'),
+    ('partner', 'open_search_page'),
+    ('payment', 'open_search_page'),
+])
+def test_failed_step_resumes_in_the_same_session(site, pool, scheduled, step, resume_from):
+    site.fail(step, RuntimeError(f"{step} failed"))
+
+    result = book()
+
+    assert result['isSuccess']
+    failed_at = site.calls.index(step)
+    assert site.calls[failed_at + 1] == resume_from
+    assert site.calls[-1] == 'payment'
+    assert len(pool.acquired) == 1
+    assert pool.released == [(pool.acquired[0], False)]
+    assert site.events.count('retry_scheduled') == 1
+
+
+def test_broken_driver_is_discarded_and_the_session_reopened(site, pool, scheduled):
+    site.fail('select_slot', WebDriverException('chrome not reachable'))
+
+    result = book()
+
+    assert result['isSuccess']
+    assert site.calls[site.calls.index('select_slot') + 1] == 'authenticate'
+    assert len(pool.acquired) == 2
+    assert pool.released == [(pool.acquired[0], True), (pool.acquired[1], False)]
+
+
+def test_logged_out_session_resumes_at_authentication(site, pool, monkeypatch, scheduled):
+    def logged_out(*args, **kwargs):
+        site.calls.append('select_slot')
+        if site.calls.count('select_slot') == 1:
+            pool.acquired[0].current_url = f'https://{AUTH_HOST}/auth'
+            raise RuntimeError('slot page lost')
+        return RESULT
+    monkeypatch.setattr(booking_tennis, 'click_preferred_booking_button', logged_out)
+
+    result = book()
+
+    assert result['isSuccess']
+    assert site.calls[site.calls.index('select_slot') + 1] == 'authenticate'
+    assert len(pool.acquired) == 1
+
+
+def test_long_backoff_gives_the_driver_back(site, pool, scheduled):
+    site.fail('select_slot', RuntimeError('page changed'))
+
+    result = book(immediate_policy(delay=booking_tennis.KEEP_DRIVER_MAX_DELAY_SECS + 1))
+
+    assert result['isSuccess']
+    assert scheduled == [booking_tennis.KEEP_DRIVER_MAX_DELAY_SECS + 1]
+    assert site.calls[site.calls.index('select_slot') + 1] == 'authenticate'
+    assert pool.released == [(pool.acquired[0], False), (pool.acquired[1], False)]
+
+
+def test_no_slot_is_not_retried(site, pool, scheduled):
+    site.fail('search', NoSlotAvailable('Erreur : Aucun créneau disponible avec les filtres choisis.'))
+
+    result = book()
+
+    assert not result['isSuccess']
+    assert result['failure'] == 'no_slot'
+    assert scheduled == []
+    assert pool.acquired == []
+    assert site.events[-1] == 'failed'
+
+
+def test_gives_up_once_retries_are_exhausted(site, pool, scheduled):
+    site.fail('captcha', RuntimeError('Failed to solve the captcha after multiple attempts.'), times=3)
+
+    result = book(immediate_policy(max_retries=2))
+
+    assert not result['isSuccess']
+    assert result['failure'] == CAPTCHA
+    assert site.calls.count('captcha') == 3
+    assert 'payment' not in site.calls
+    assert pool.released == [(pool.acquired[0], False)]
+
+
+def test_won_race_stops_before_payment(site, pool, scheduled):
+    race = BookingRace()
+    with race.claim():
+        pass
+
+    result = book(race=race)
+
+    assert not result['isSuccess']
+    assert 'annulée' in result['message']
+    assert 'payment' not in site.calls
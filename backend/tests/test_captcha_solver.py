@@ -0,0 +1,91 @@
+import time
+import pytest
+import modules.captcha_solver as captcha_solver
+from modules.captcha_solver import solve_capcha_hedged
+
+
+class FakeGpt:
+    """Réponses GPT simulées par modèle : (réponse, durée en secondes, coût)."""
+
+    def __init__(self, answers):
+        self.answers = answers
+        self.timeouts = {}
+
+    def __call__(self, image, model, concise, timeout):
+        self.timeouts[model] = timeout
+        answer, duration, cost = self.answers[model]
+        time.sleep(min(duration, timeout))
+        if duration > timeout:
+            result = {"success": False, "err_msg": "Request timed out.", "cost_usd": 0.0}
+        else:
+            result = {"success": True, "response": answer, "cost_usd": cost}
+        return result
+
+
+@pytest.fixture
+def gpt(monkeypatch):
+    def install(answers, local=None, local_secs=0.0):
+        fake = FakeGpt(answers)
+        monkeypatch.setattr(captcha_solver, 'CAPTCHA_GPT_MODELS', list(answers))
+        monkeypatch.setattr(captcha_solver, 'CAPTCHA_PREPROCESS', False)
+        monkeypatch.setattr(captcha_solver, '_solve_preprocessed', fake)
+
+        def solve_locally(image):
+            time.sleep(local_secs)
+            return local or {"success": False, "err_msg": "no model"}
+        monkeypatch.setattr(captcha_solver, 'solve_capcha_locally', solve_locally)
+        return fake
+    return install
+
+
+def test_confident_local_answer_skips_gpt(gpt):
+    fake = gpt({'a': ('K7P2QX', 0, 0.01)}, local={"success": True, "response": 'K7P2QX', "cost_usd": 0.0})
+
+    result = solve_capcha_hedged('image', requests=1)
+
+    assert result['solver'] == 'local' and result['response'] == 'K7P2QX'
+    assert fake.timeouts == {}
+
+
+def test_majority_answer_wins(gpt):
+    gpt({'a': ('K7P2QX', 0.0, 0.01), 'b': ('K7P2QX', 0.05, 0.01), 'c': ('K7P2OX', 0.0, 0.01)})
+
+    result = solve_capcha_hedged('image', use_local=False, requests=3, deadline_secs=2)
+
+    assert result['success'] and result['response'] == 'K7P2QX'
+    assert result['solver'] == 'vote'
+    assert result['cost_usd'] == pytest.approx(0.03)
+
+
+def test_requests_only_get_the_time_left_before_the_deadline(gpt):
+    fake = gpt({'a': ('K7P2QX', 0.0, 0.01)}, local_secs=0.3)
+
+    result = solve_capcha_hedged('image', requests=1, deadline_secs=1)
+
+    assert result['success']
+    assert fake.timeouts['a'] <= 0.7
+
+
+def test_abandoned_requests_add_their_cost_when_they_finish(gpt):
+    gpt({'a': ('K7P2QX', 0.0, 0.01), 'b': ('K7P2QX', 0.0, 0.01), 'c': ('ABCDEF', 0.3, 0.02)})
+
+    result = solve_capcha_hedged('image', use_local=False, requests=3, deadline_secs=2)
+
+    assert result['response'] == 'K7P2QX'
+    assert result['cost_usd'] == pytest.approx(0.02)
+
+    deadline = time.time() + 2
+    while result['cost_usd'] < 0.04 and time.time() < deadline:
+        time.sleep(0.01)
+    assert result['cost_usd'] == pytest.approx(0.04)
+
+
+def test_deadline_returns_the_first_valid_answer(gpt):
+    gpt({'a': ('K7P2QX', 0.0, 0.01), 'b': ('ABCDEF', 5, 0.01), 'c': ('K7P2OX', 5, 0.01)})
+
+    start = time.time()
+    result = solve_capcha_hedged('image', use_local=False, requests=3, deadline_secs=0.3)
+
+    assert time.time() - start < 1
+    assert result['success'] and result['response'] == 'K7P2QX'
+    assert result['solver'] == 'gpt'
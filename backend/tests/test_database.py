@@ -0,0 +1,66 @@
+import threading
+import modules.database as database
+from modules.database import add_slot, get_connection, get_slots_by_date_and_status, release_connection
+
+
+def in_thread(func):
+    """Exécute `func` dans un thread court, terminé comme une requête Flask."""
+    result = []
+
+    def request():
+        try:
+            result.append(func())
+        finally:
+            release_connection()
+
+    thread = threading.Thread(target=request)
+    thread.start()
+    thread.join()
+    return result[0]
+
+
+def test_short_threads_reuse_the_released_connection():
+    first = in_thread(get_connection)
+    second = in_thread(get_connection)
+
+    assert first is second
+    assert in_thread(lambda: get_slots_by_date_and_status('2030-01-02', 'waiting'))['isSuccess']
+
+
+def test_released_transaction_is_rolled_back():
+    def uncommitted_insert():
+        get_connection().execute(
+            "INSERT INTO slots (id, date, start_time, end_time, type, status) "
+            "VALUES ('slot', '2030-01-02', 10, 11, 'indoor', 'waiting')")
+
+    in_thread(uncommitted_insert)
+    in_thread(lambda: add_slot('2030-01-02', 12, 13, 'indoor', 'waiting'))
+
+    slots = get_slots_by_date_and_status('2030-01-02', 'waiting')['data']
+    assert [slot['start_time'] for slot in slots] == ['12']
+
+
+def test_pool_keeps_at_most_its_size(monkeypatch):
+    monkeypatch.setattr(database, 'CONNECTION_POOL_SIZE', 1)
+    opened = threading.Barrier(3)
+
+    def hold_connection():
+        conn = get_connection()
+        opened.wait()
+        return conn
+
+    threads = [threading.Thread(target=in_thread, args=(hold_connection,)) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    opened.wait()
+    for thread in threads:
+        thread.join()
+
+    assert len(database._idle_connections) == 1
+
+
+def test_connection_of_another_database_is_not_reused(tmp_path, monkeypatch):
+    first = in_thread(get_connection)
+    monkeypatch.setattr(database, 'DB_NAME', str(tmp_path / 'other.db'))
+
+    assert in_thread(get_connection) is not first
@@ -0,0 +1,109 @@
+import contextvars
+import json
+import socket
+import pytest
+import modules.events as events
+from modules.events import EventBroadcaster, event_context, publish_event
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def broadcaster():
+    broadcaster = EventBroadcaster(host='127.0.0.1', port=free_port())
+    assert broadcaster.start()
+    return broadcaster
+
+
+class Subscriber:
+    """Client SSE minimal : envoie la requête puis découpe le flux en blocs séparés par une ligne vide."""
+
+    def __init__(self, broadcaster, path=events.EVENTS_PATH, last_event_id=None):
+        self.sock = socket.create_connection((broadcaster.host, broadcaster.port), timeout=5)
+        headers = f"Last-Event-ID: {last_event_id}\r\n" if last_event_id else ''
+        self.sock.sendall(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n{headers}\r\n".encode())
+        self.buffer = b''
+
+    def read_until(self, marker):
+        while marker not in self.buffer:
+            chunk = self.sock.recv(4096)
+            if not chunk:
+                break
+            self.buffer += chunk
+        return self.buffer.decode('utf-8')
+
+    def headers(self):
+        head, _, self.buffer = self.read_until(b'\r\n\r\n').encode('utf-8').partition(b'\r\n\r\n')
+        return head.decode('utf-8')
+
+    def events(self, count):
+        """Les `count` prochains événements reçus : [(id, nom, données)]."""
+        received = []
+        while len(received) < count:
+            block, _, rest = self.read_until(b'\n\n').encode('utf-8').partition(b'\n\n')
+            self.buffer = rest
+            if not block.startswith(b'id: '):
+                continue
+            fields = dict(line.split(': ', 1) for line in block.decode('utf-8').split('\n'))
+            received.append((int(fields['id']), fields['event'], json.loads(fields['data'])))
+        return received
+
+    def close(self):
+        self.sock.close()
+
+
+def test_context_fields_are_added_and_carried_into_copied_contexts():
+    with event_context(job_id='job'):
+        with event_context(slot_id='slot'):
+            context = contextvars.copy_context()
+        assert events._context.get() == {'job_id': 'job'}
+
+    assert events._context.get() == {}
+    assert context.run(events._context.get) == {'job_id': 'job', 'slot_id': 'slot'}
+
+
+def test_published_events_carry_the_context(monkeypatch):
+    published = []
+    monkeypatch.setattr(events.event_broadcaster, 'publish', lambda event, data: published.append((event, data)))
+
+    with event_context(job_id='job', step='context'):
+        publish_event('booking', step='paid')
+
+    assert published == [('booking', {'job_id': 'job', 'step': 'paid'})]
+
+
+def test_subscribers_receive_published_events(broadcaster):
+    subscriber = Subscriber(broadcaster)
+    assert 'Content-Type: text/event-stream' in subscriber.headers()
+    assert subscriber.read_until(b'\n\n').startswith('retry: 3000')
+
+    broadcaster.publish('booking', {'step': 'paid', 'message': 'Réservation payée'})
+
+    assert subscriber.events(1) == [(1, 'booking', {'step': 'paid', 'message': 'Réservation payée'})]
+    subscriber.close()
+
+
+def test_reconnection_replays_missed_events(broadcaster):
+    first = Subscriber(broadcaster)
+    first.headers()
+    for step in ('searching', 'logged_in', 'paid'):
+        broadcaster.publish('booking', {'step': step})
+    assert [event_id for event_id, _, _ in first.events(3)] == [1, 2, 3]
+    first.close()
+
+    again = Subscriber(broadcaster, last_event_id=1)
+    again.headers()
+
+    assert [(event_id, data['step']) for event_id, _, data in again.events(2)] == [(2, 'logged_in'), (3, 'paid')]
+    again.close()
+
+
+def test_other_paths_are_not_found(broadcaster):
+    subscriber = Subscriber(broadcaster, path='/other')
+
+    assert subscriber.headers().startswith('HTTP/1.1 404')
+    subscriber.close()
@@ -0,0 +1,98 @@
+import pytest
+from selenium.common.exceptions import WebDriverException
+import modules.fast_wait as fast_wait
+from modules.database import get_pipeline_span_durations
+from modules.tracing import finish_attempt, start_attempt, traced
+
+
+class ScriptDriver:
+    """Driver qui note les scripts exécutés et renvoie les valeurs de `returns` dans l'ordre."""
+
+    def __init__(self, returns=(), fail=False):
+        self.returns = list(returns)
+        self.fail = fail
+        self.scripts = []
+        self.async_scripts = []
+
+    def execute_script(self, script, *args):
+        if self.fail:
+            raise WebDriverException('no page')
+        self.scripts.append(script)
+        return self.returns.pop(0) if self.returns else None
+
+    def execute_async_script(self, script, *args):
+        self.async_scripts.append(args)
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    slept = []
+    monkeypatch.setattr(fast_wait.time, 'sleep', slept.append)
+    return slept
+
+
+@pytest.fixture(params=[True, False], ids=['fast', 'legacy'])
+def fast_waits(request, monkeypatch):
+    monkeypatch.setattr(fast_wait, 'FAST_WAITS', request.param)
+    return request.param
+
+
+def test_poll_interval_and_pause_follow_the_mode(fast_waits, sleeps):
+    fast_wait.pause(0.1)
+
+    if fast_waits:
+        assert fast_wait.poll_interval() == fast_wait.POLL_INTERVAL_SECS
+        assert sleeps == []
+    else:
+        assert fast_wait.poll_interval() == fast_wait.SELENIUM_POLL_INTERVAL_SECS
+        assert sleeps == [0.1]
+
+
+def test_dom_settled_waits_in_the_page_capped_by_the_fallback(monkeypatch, sleeps):
+    monkeypatch.setattr(fast_wait, 'FAST_WAITS', True)
+    driver = ScriptDriver()
+
+    with fast_wait.dom_settled(driver, timeout=2.0, quiet_ms=100, fallback_secs=0.5):
+        assert driver.scripts == [fast_wait.WATCH_SCRIPT]
+
+    # Délai de calme, échéance et attente maximale sans mutation, en ms.
+    assert driver.async_scripts == [(100, 2000.0, 500.0)]
+    assert sleeps == []
+
+
+def test_dom_settled_sleeps_when_the_page_cannot_be_observed(monkeypatch, sleeps):
+    monkeypatch.setattr(fast_wait, 'FAST_WAITS', True)
+
+    with fast_wait.dom_settled(ScriptDriver(fail=True), fallback_secs=0.5):
+        pass
+
+    assert sleeps == [0.5]
+
+
+def test_dom_settled_keeps_the_fixed_pause_in_legacy_mode(monkeypatch, sleeps):
+    monkeypatch.setattr(fast_wait, 'FAST_WAITS', False)
+    driver = ScriptDriver()
+
+    with fast_wait.dom_settled(driver, fallback_secs=0.5):
+        pass
+
+    assert driver.scripts == [] and driver.async_scripts == []
+    assert sleeps == [0.5]
+
+
+def test_wait_page_ready_is_traced(monkeypatch):
+    monkeypatch.setattr(fast_wait, 'FAST_WAITS', True)
+    monkeypatch.setattr(fast_wait, 'POLL_INTERVAL_SECS', 0.01)
+    driver = ScriptDriver(returns=[False, False, True])
+
+    @traced
+    def select_terrain():
+        fast_wait.wait_page_ready(driver, timeout=1)
+
+    start_attempt('booking')
+    select_terrain()
+    finish_attempt()
+
+    assert driver.scripts == [fast_wait.PAGE_READY_SCRIPT] * 3
+    steps = {step for pipeline, step, duration_ms in get_pipeline_span_durations()}
+    assert steps == {'select_terrain', 'select_terrain.wait'}
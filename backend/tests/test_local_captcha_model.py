@@ -0,0 +1,84 @@
+import base64
+import io
+import numpy as np
+import pytest
+from PIL import Image
+import modules.local_captcha_model as local_captcha_model
+from benchmarks.fake_tennis_site import captcha_image
+from modules.local_captcha_model import TemplateModel, decode_image, solve_capcha_locally
+
+TRAINING_LABELS = ['ABCDEF', 'GHJKLM', 'NPQRST', 'UVWXYZ', '234567', '89ABCD']
+
+
+@pytest.fixture(scope='module')
+def model():
+    return TemplateModel.train((decode_image(captcha_image(label)), label) for label in TRAINING_LABELS)
+
+
+@pytest.fixture
+def trained(monkeypatch, model):
+    monkeypatch.setattr(local_captcha_model, '_model', model)
+    return model
+
+
+def noise_image():
+    return Image.fromarray((np.random.RandomState(0).rand(70, 220) * 255).astype(np.uint8))
+
+
+@pytest.mark.parametrize('answer', ['FACE23', 'ZYXWVU'])
+def test_trained_model_reads_unseen_combinations(model, answer):
+    prediction, confidence = model.predict(decode_image(captcha_image(answer)))
+
+    assert prediction == answer
+    assert confidence >= local_captcha_model.MIN_CONFIDENCE
+
+
+def test_model_survives_a_save_and_load(model, tmp_path):
+    path = str(tmp_path / 'models' / 'captcha_templates.npz')
+    model.save(path)
+
+    loaded = TemplateModel.load(path)
+
+    assert loaded.predict(decode_image(captcha_image('FACE23'))) == model.predict(
+        decode_image(captcha_image('FACE23')))
+
+
+def test_training_needs_usable_examples():
+    with pytest.raises(ValueError):
+        TemplateModel.train([(Image.new('RGB', (220, 70), 'white'), 'ABCDEF'), (noise_image(), 'ABC')])
+
+
+def test_confident_answer_is_accepted(trained):
+    result = solve_capcha_locally(captcha_image('FACE23'))
+
+    assert result['success'] and result['response'] == 'FACE23'
+    assert result['cost_usd'] == 0.0
+
+
+def test_low_confidence_answer_is_refused(trained):
+    result = solve_capcha_locally(captcha_image('FACE23'), min_confidence=0.99)
+
+    assert not result['success']
+    assert result['response'] == 'FACE23'
+    assert result['err_msg'].startswith('Low confidence')
+
+
+def test_noisy_image_is_refused(trained):
+    buffer = io.BytesIO()
+    noise_image().save(buffer, format='PNG')
+
+    result = solve_capcha_locally(base64.b64encode(buffer.getvalue()).decode())
+
+    assert not result['success']
+    assert result['confidence'] < local_captcha_model.MIN_CONFIDENCE
+    assert trained.predict(Image.new('RGB', (220, 70), 'white')) == (None, 0.0)
+
+
+def test_missing_model_defers_to_gpt(monkeypatch, tmp_path):
+    monkeypatch.setattr(local_captcha_model, '_model', None)
+    monkeypatch.setattr(local_captcha_model, 'MODEL_PATH', str(tmp_path / 'missing.npz'))
+
+    result = solve_capcha_locally(captcha_image('FACE23'))
+
+    assert not result['success']
+    assert result['err_msg'] == 'Local model not trained.'
@@ -0,0 +1,121 @@
+import threading
+import pytest
+import requests
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from modules.booking_race import BookingCancelled, BookingRace, ResultCollector
+from modules.driver_pool import DriverPoolExhausted
+from modules.retry_policy import (AUTH, CANCELLED, CAPTCHA, INVALID, NO_SLOT, SITE_DOWN, TIMEOUT, UNKNOWN,
+                                  NoSlotAvailable, RetryPolicy, RetryRule, classify_failure, load_retry_policy,
+                                  schedule_retry)
+
+
+def raised_from(cause, message='Erreur'):
+    """RuntimeError relancée depuis un `except`, comme dans les étapes du pipeline."""
+    try:
+        try:
+            raise cause
+        except Exception:
+            raise RuntimeError(message)
+    except RuntimeError as e:
+        return e
+
+
+@pytest.mark.parametrize('step, exception, expected', [
+    ('select_slot', BookingCancelled('annulée'), CANCELLED),
+    ('search', NoSlotAvailable('aucun'), NO_SLOT),
+    ('validate', ValueError('date'), INVALID),
+    ('search', raised_from(requests.ConnectionError()), SITE_DOWN),
+    ('open_search_page', WebDriverException('unknown error: net::ERR_CONNECTION_REFUSED'), SITE_DOWN),
+    ('authenticate', raised_from(DriverPoolExhausted('aucun driver')), TIMEOUT),
+    ('captcha', RuntimeError('Failed to solve the captcha'), CAPTCHA),
+    ('authenticate', RuntimeError('Identifiants refusés'), AUTH),
+    ('select_slot', raised_from(TimeoutException()), TIMEOUT),
+    ('partner', RuntimeError('Error in add_partenaire'), UNKNOWN),
+])
+def test_classify_failure(step, exception, expected):
+    assert classify_failure(step, exception) == expected
+
+
+def test_delay_grows_exponentially_up_to_the_cap():
+    policy = RetryPolicy({TIMEOUT: RetryRule(base_delay=5, max_delay=12, max_retries=5, jitter=0)},
+                         max_attempts=10)
+
+    assert [policy.next_delay(TIMEOUT, n, n, 0) for n in (1, 2, 3)] == [5, 10, 12]
+
+
+def test_jitter_stays_within_bounds():
+    rule = RetryRule(base_delay=10, max_delay=10, jitter=0.2)
+
+    assert all(8 <= rule.delay(1) <= 12 for _ in range(100))
+
+
+@pytest.mark.parametrize('failure_class, retry_number, attempts, elapsed', [
+    (NO_SLOT, 1, 1, 0),
+    (CANCELLED, 1, 1, 0),
+    (AUTH, 2, 2, 0),
+    (UNKNOWN, 1, 3, 0),
+    (SITE_DOWN, 1, 1, 590),
+])
+def test_policy_gives_up(failure_class, retry_number, attempts, elapsed):
+    assert RetryPolicy().next_delay(failure_class, retry_number, attempts, elapsed) is None
+
+
+def test_rules_from_the_environment(monkeypatch):
+    monkeypatch.setenv('BOOKING_RETRY_RULES', '{"no_slot": {"retry": true, "base_delay": 20, "jitter": 0}}')
+    monkeypatch.setenv('BOOKING_MAX_ATTEMPTS', '4')
+
+    policy = load_retry_policy()
+
+    assert policy.max_attempts == 4
+    assert policy.next_delay(NO_SLOT, 1, 1, 0) == 20
+
+
+def test_invalid_rules_fall_back_to_the_defaults(monkeypatch):
+    monkeypatch.setenv('BOOKING_RETRY_RULES', '{"no_slot": {"unknown_field": 1}}')
+
+    assert load_retry_policy().next_delay(NO_SLOT, 1, 1, 0) is None
+
+
+def test_race_is_won_by_the_first_successful_claim():
+    race = BookingRace()
+    won = []
+    race.on_won(lambda: won.append('callback'))
+
+    with pytest.raises(RuntimeError):
+        with race.claim():
+            raise RuntimeError('paiement refusé')
+    assert not race.is_won and won == []
+
+    with race.claim():
+        pass
+    assert race.is_won and won == ['callback']
+    with pytest.raises(BookingCancelled):
+        race.check()
+
+    race.on_won(lambda: won.append('late'))
+    assert won == ['callback', 'late']
+
+
+def test_result_collector_calls_back_once_with_every_result():
+    done = []
+    collector = ResultCollector(2, done.append)
+
+    collector.add('a', {'isSuccess': False})
+    assert done == []
+    collector.add('b', {'isSuccess': True})
+    assert done == [{'a': {'isSuccess': False}, 'b': {'isSuccess': True}}]
+
+    empty = []
+    ResultCollector(0, empty.append)
+    assert empty == [{}]
+
+
+def test_won_race_brings_the_scheduled_retry_forward():
+    race = BookingRace()
+    ran = threading.Event()
+
+    schedule_retry(ran.set, 60, race)
+    with race.claim():
+        pass
+
+    assert ran.wait(5)
@@ -0,0 +1,122 @@
+import functools
+from datetime import date, timedelta
+import pytest
+import requests
+import modules.booking_tennis as booking_tennis
+import modules.search_client as search_client
+from benchmarks.fake_tennis_site import SESSION_COOKIE, FakeTennisSite, parse_latency
+from modules.search_client import SearchClient, build_search_query, parse_search_results
+from typesForFilters.court_type_enum import CourtType
+
+DAY = (date.today() + timedelta(days=6)).isoformat()
+
+
+@pytest.fixture
+def site():
+    with FakeTennisSite(courts_per_hour=4) as site:
+        yield site
+
+
+def login(site, email='a@b'):
+    """Parcours de connexion du faux site ; retourne les cookies comme session_cache les enregistre."""
+    session = requests.Session()
+    session.post(site.login_url, data={'username': email, 'password': 'secret', 'Submit': 'Se connecter'})
+    return [{'name': cookie.name, 'value': cookie.value, 'domain': cookie.domain, 'path': cookie.path}
+            for cookie in session.cookies if cookie.name == SESSION_COOKIE]
+
+
+def search(site, court_type, start_time=18, end_time=20):
+    return SearchClient(login(site), base_url=site.base_url).search(DAY, start_time, end_time, court_type)
+
+
+def test_search_query_follows_the_form():
+    query = build_search_query('2030-01-02', 18, 20, CourtType.BOTH.value)
+
+    assert query == {'hourRange': '18-20', 'when': '02/01/2030', 'selWhereTennisName': 'Elisabeth',
+                     'selInOut': ['V', 'F']}
+
+
+def test_search_returns_the_available_courts(site):
+    results = search(site, CourtType.INDOOR.value)
+
+    assert [(result['court'], result['hour']) for result in results] == [
+        ('Court 1', 18), ('Court 3', 18), ('Court 1', 19), ('Court 3', 19)]
+    assert results[0] == {
+        'tennis': 'Elisabeth',
+        'court': 'Court 1',
+        'surface': 'Quick',
+        'covered': True,
+        'hour': 18,
+        'court_id': '1-18',
+        'date_deb': f"{DAY.replace('-', '/')} 18:00:00",
+        'date_fin': f"{DAY.replace('-', '/')} 19:00:00",
+    }
+    assert site.requests['search'] == 1
+
+
+def test_court_type_filters_covered_courts(site):
+    outdoor = search(site, CourtType.OUTDOOR.value, 18, 19)
+    both = search(site, CourtType.BOTH.value, 18, 19)
+
+    assert [(result['court'], result['covered']) for result in outdoor] == [
+        ('Court 2', False), ('Court 4', False)]
+    assert [result['court'] for result in both] == ['Court 1', 'Court 2', 'Court 3', 'Court 4']
+
+
+def test_no_result_page_gives_an_empty_list():
+    with FakeTennisSite(courts_per_hour=0) as site:
+        assert search(site, CourtType.INDOOR.value) == []
+
+    parsed = parse_search_results('<div class="no_result">Aucun créneau disponible.</div>')
+    assert parsed == {'no_result': True, 'results': []}
+
+
+def test_hour_falls_back_to_the_block_text_without_a_button():
+    parsed = parse_search_results("""
+        <div class="search-result-block"><h4>Elisabeth</h4><p>Créneau de 9h</p>
+            <div class="tennis-court"><span>Court 2</span><span>Découvert</span></div>
+        </div>""")
+
+    assert not parsed['no_result']
+    assert [(result['court'], result['covered'], result['hour'], result['court_id'])
+            for result in parsed['results']] == [('Court 2', False, 9, None)]
+
+
+@pytest.mark.parametrize('date_deb, hour', [
+    ('2030/01/02 18:00:00', 18),
+    ('2030-01-02T09:30', 9),
+    ('18h', 18),
+    ('02/01/2030', None),
+])
+def test_hour_tolerates_other_date_shapes(date_deb, hour):
+    parsed = parse_search_results(f"""
+        <div class="search-result-block"><h4>Elisabeth</h4>
+            <div class="tennis-court"><span>Court 1</span>
+                <button courtid="1-18" datedeb="{date_deb}">Réserver</button></div>
+        </div>""")
+
+    assert parsed['results'][0]['hour'] == hour
+
+
+def test_unreadable_results_fall_back_to_the_browser(site, monkeypatch):
+    def broken_markup(html):
+        raise ValueError('unexpected markup')
+    monkeypatch.setattr(search_client, 'parse_search_results', broken_markup)
+    monkeypatch.setattr(booking_tennis, 'SearchClient', functools.partial(SearchClient, base_url=site.base_url))
+    cookies = login(site)
+
+    with pytest.raises(RuntimeError, match='Erreur lors de la lecture des résultats'):
+        SearchClient(cookies, base_url=site.base_url).search(DAY, 18, 20, CourtType.INDOOR.value)
+    assert booking_tennis.search_available_slots(cookies, DAY, 18, 20, CourtType.INDOOR.value) is None
+
+
+def test_http_errors_are_reported(site):
+    client = SearchClient(login(site), base_url=site.base_url.replace('Portal.jsp', 'missing.jsp'))
+
+    with pytest.raises(RuntimeError, match='Erreur lors de la recherche de créneaux'):
+        client.search(DAY, 18, 20, CourtType.INDOOR.value)
+
+
+def test_latency_options_are_parsed():
+    assert parse_latency(['search=800', 'login=300']) == {'search': 800.0, 'login': 300.0}
+    assert parse_latency(None) == {}
@@ -0,0 +1,73 @@
+import pytest
+import modules.booking_tennis as booking_tennis
+from modules.search_client import build_search_query
+
+KEYSTROKE_STEPS = ('select_location_and_time', 'select_terrain', 'handle_slider', 'click_search_button')
+
+
+class FormDriver:
+    """Page de recherche simulée : le script de remplissage renvoie `missing`, la page de résultats `page`."""
+
+    def __init__(self, missing=(), page=None):
+        self.missing = list(missing)
+        self.page = page
+        self.fill_arguments = None
+
+    def find_element(self, by, value):
+        return object()
+
+    def execute_script(self, script, *args):
+        if script == booking_tennis.FILL_SEARCH_FORM_SCRIPT:
+            self.fill_arguments = args
+            return self.missing
+        if script == booking_tennis.EXTRACT_RESULTS_SCRIPT:
+            return self.page
+        raise AssertionError('unexpected script')
+
+
+@pytest.fixture
+def keystrokes(monkeypatch):
+    calls = []
+    for name in KEYSTROKE_STEPS + ('navigate_to_tennis_page',):
+        monkeypatch.setattr(booking_tennis, name, lambda *args, name=name: calls.append(name))
+    monkeypatch.setattr(booking_tennis, 'SCRIPTED_SEARCH_TIMEOUT_SECS', 0.1)
+    return calls
+
+
+def search(driver):
+    booking_tennis.search_with_form(driver, '2030-01-02', 18, 20, 'indoor')
+
+
+def test_scripted_form_submits_the_search_query(keystrokes):
+    driver = FormDriver(page={'no_result': False, 'results': []})
+
+    search(driver)
+
+    assert driver.fill_arguments == (build_search_query('2030-01-02', 18, 20, 'indoor'), 'rechercher')
+    assert keystrokes == []
+
+
+def test_no_result_page_counts_as_a_loaded_search(keystrokes):
+    search(FormDriver(page={'no_result': True, 'results': []}))
+
+    assert keystrokes == []
+
+
+@pytest.mark.parametrize('driver', [
+    FormDriver(missing=['selWhereTennisName']),
+    FormDriver(page=None),
+], ids=['missing-field', 'no-results-page'])
+def test_keyboard_takes_over_when_the_script_fails(keystrokes, driver):
+    search(driver)
+
+    assert keystrokes == ['navigate_to_tennis_page', *KEYSTROKE_STEPS]
+
+
+def test_keys_mode_skips_the_script(keystrokes, monkeypatch):
+    monkeypatch.setattr(booking_tennis, 'SEARCH_FORM_MODE', 'keys')
+    driver = FormDriver()
+
+    search(driver)
+
+    assert driver.fill_arguments is None
+    assert keystrokes == list(KEYSTROKE_STEPS)
@@ -0,0 +1,69 @@
+from urllib.parse import urlparse
+import pytest
+import requests
+import modules.session_cache as session_cache
+from benchmarks.fake_tennis_site import SESSION_COOKIE, FakeTennisSite
+from modules.database import get_account_session, save_account_session
+from modules.session_cache import SESSION_INVALID, SESSION_UNKNOWN, SESSION_VALID, check_session, get_cached_cookies
+
+ACCOUNT = {'id': 'account', 'email': 'a@b'}
+
+
+@pytest.fixture
+def site(monkeypatch):
+    with FakeTennisSite() as site:
+        monkeypatch.setattr(session_cache, 'SESSION_CHECK_URL',
+                            f"{site.base_url}?page=profil&view=carnet_reservation")
+        monkeypatch.setattr(session_cache, 'AUTH_HOST', urlparse(site.auth_url).netloc)
+        yield site
+
+
+def login(site):
+    session = requests.Session()
+    session.post(site.login_url, data={'username': ACCOUNT['email'], 'password': 'secret'})
+    return [{'name': cookie.name, 'value': cookie.value, 'domain': cookie.domain, 'path': cookie.path}
+            for cookie in session.cookies if cookie.name == SESSION_COOKIE]
+
+
+def expired_cookies(site):
+    return [{**cookie, 'value': 'expired'} for cookie in login(site)]
+
+
+class ServerErrorSession:
+    def get(self, url, timeout):
+        response = requests.Response()
+        response.status_code = 503
+        response.url = url
+        return response
+
+
+def test_logged_in_session_is_valid(site):
+    assert check_session(login(site)) == SESSION_VALID
+
+
+def test_redirect_to_the_login_form_is_invalid(site):
+    assert check_session(expired_cookies(site)) == SESSION_INVALID
+
+
+def test_unreachable_or_failing_site_leaves_the_session_unknown(site, monkeypatch):
+    cookies = login(site)
+    monkeypatch.setattr(session_cache, 'SESSION_CHECK_URL', site.base_url.replace(
+        f":{site.tennis_httpd.server_address[1]}", ':9'))
+    assert check_session(cookies) == SESSION_UNKNOWN
+
+    monkeypatch.setattr(session_cache, 'build_requests_session', lambda cookies: ServerErrorSession())
+    assert check_session(cookies) == SESSION_UNKNOWN
+
+
+@pytest.mark.parametrize('outcome, kept', [
+    (SESSION_VALID, True),
+    (SESSION_UNKNOWN, True),
+    (SESSION_INVALID, False),
+])
+def test_stored_session_is_only_deleted_when_refused(monkeypatch, outcome, kept):
+    cookies = [{'name': SESSION_COOKIE, 'value': 'token', 'domain': 'tennis.paris.fr', 'path': '/'}]
+    save_account_session(ACCOUNT['id'], cookies)
+    monkeypatch.setattr(session_cache, 'check_session', lambda cookies: outcome)
+
+    assert get_cached_cookies(ACCOUNT) == (cookies if kept else None)
+    assert get_account_session(ACCOUNT['id'])['isSuccess'] == kept
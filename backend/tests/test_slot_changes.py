@@ -0,0 +1,56 @@
+from modules.database import (SLOT_CHANGES_RETENTION, add_slot, delete_slot, get_connection,
+                              get_latest_slot_change_seq, get_slot_changes, update_slots_status)
+
+
+def test_empty_log_needs_no_reset():
+    changes = get_slot_changes(0)
+
+    assert changes == {"isSuccess": True, "reset": False, "data": [], "latest_seq": 0, "has_more": False}
+
+
+def test_writes_are_logged_in_order():
+    slot_id = add_slot('2030-01-02', 18, 20, 'indoor', 'waiting')['slot_id']
+    update_slots_status({slot_id: 'book'})
+    delete_slot(slot_id)
+
+    changes = get_slot_changes(0)
+
+    assert [(change['seq'], change['op']) for change in changes['data']] == [(1, 'insert'), (2, 'update'), (3, 'delete')]
+    assert changes['data'][1]['slot']['status'] == 'book'
+    assert changes['data'][2]['slot'] == {'id': slot_id}
+    assert changes['latest_seq'] == get_latest_slot_change_seq()['data'] == 3
+    assert get_slot_changes(3)['data'] == []
+
+
+def test_pages_are_limited():
+    for hour in (10, 12, 14):
+        add_slot('2030-01-02', hour, hour + 2, 'indoor', 'waiting')
+
+    first = get_slot_changes(0, limit=2)
+    rest = get_slot_changes(first['data'][-1]['seq'], limit=2)
+
+    assert [change['seq'] for change in first['data']] == [1, 2] and first['has_more']
+    assert [change['seq'] for change in rest['data']] == [3] and not rest['has_more']
+
+
+def test_cursor_ahead_of_the_log_resets():
+    add_slot('2030-01-02', 18, 20, 'indoor', 'waiting')
+
+    assert get_slot_changes(5)['reset']
+
+
+def test_compacted_changes_force_a_reset():
+    extra = 5
+    with get_connection() as conn:
+        conn.executemany(
+            "INSERT INTO slots (id, date, start_time, end_time, type, status) VALUES (?, '2030-01-02', '8', '9', 'indoor', 'waiting')",
+            [(f'slot-{index}',) for index in range(SLOT_CHANGES_RETENTION + extra)])
+
+    latest_seq = SLOT_CHANGES_RETENTION + extra
+    assert get_slot_changes(0)['reset']
+    assert get_slot_changes(extra - 1)['reset']
+    # Le changement extra + 1 est le plus ancien gardé : un client à `extra` n'a rien perdu.
+    changes = get_slot_changes(extra, limit=SLOT_CHANGES_RETENTION)
+    assert not changes['reset']
+    assert len(changes['data']) == SLOT_CHANGES_RETENTION
+    assert changes['latest_seq'] == latest_seq
@@ -0,0 +1,88 @@
+import pytest
+import modules.booking_tennis as booking_tennis
+from modules.retry_policy import NoSlotAvailable
+from modules.slot_preferences import SlotPreferences, load_slot_preferences
+
+RESULTS = [
+    {'index': 0, 'court': 'Court 1', 'surface': 'Résine', 'hour': 18, 'court_id': '1-18'},
+    {'index': 1, 'court': 'Court 2', 'surface': 'Terre battue', 'hour': 18, 'court_id': '2-18'},
+    {'index': 2, 'court': 'Court 1', 'surface': 'Résine', 'hour': 19, 'court_id': '1-19'},
+    {'index': 3, 'court': 'Court 3', 'surface': 'Terre battue', 'hour': 19, 'court_id': '3-19'},
+]
+
+
+def ranked(preferences):
+    return [result['index'] for result in preferences.rank(RESULTS)]
+
+
+def test_without_preferences_the_page_order_is_kept():
+    assert ranked(SlotPreferences()) == [0, 1, 2, 3]
+
+
+def test_hour_then_court():
+    assert ranked(SlotPreferences(hours=[19], courts=['court 3'])) == [3, 2, 0, 1]
+
+
+def test_order_chooses_the_first_criterion():
+    preferences = dict(hours=[18], surfaces=['terre'])
+    assert ranked(SlotPreferences(**preferences, order=['hour', 'surface'])) == [1, 0, 3, 2]
+    assert ranked(SlotPreferences(**preferences, order=['surface', 'hour'])) == [1, 3, 0, 2]
+
+
+def test_unknown_values_rank_last():
+    results = [{'court': 'Court 1', 'surface': None, 'hour': None}, {'court': 'Court 2', 'surface': 'Résine', 'hour': 8}]
+    assert SlotPreferences(hours=[8], surfaces=['résine']).rank(results)[0]['court'] == 'Court 2'
+
+
+def test_preferences_from_the_environment(monkeypatch):
+    monkeypatch.setenv('BOOKING_PREFERRED_HOURS', '19, 18')
+    monkeypatch.setenv('BOOKING_PREFERRED_COURTS', 'Court 3')
+    monkeypatch.setenv('BOOKING_PREFERENCE_ORDER', 'court,hour')
+
+    assert ranked(load_slot_preferences()) == [3, 2, 0, 1]
+
+
+def test_invalid_hours_are_ignored(monkeypatch):
+    monkeypatch.setenv('BOOKING_PREFERRED_HOURS', 'soir')
+
+    assert load_slot_preferences().preferences['hour'] == []
+
+
+class ResultsDriver:
+    def __init__(self, page, clicked=True):
+        self.page = page
+        self.clicked = clicked
+        self.click_arguments = None
+
+    def execute_script(self, script, *args):
+        if script == booking_tennis.EXTRACT_RESULTS_SCRIPT:
+            return self.page
+        self.click_arguments = args
+        return self.clicked
+
+
+def test_clicks_the_preferred_result():
+    driver = ResultsDriver({'no_result': False, 'results': RESULTS})
+
+    slot = booking_tennis.click_preferred_booking_button(driver, SlotPreferences(hours=[19]))
+
+    assert slot['court_id'] == '1-19'
+    assert driver.click_arguments == (booking_tennis.BOOKING_BUTTON_SELECTOR, 2, '1-19')
+
+
+@pytest.mark.parametrize('page', [
+    {'no_result': True, 'results': []},
+    {'no_result': False, 'results': []},
+])
+def test_no_result_page_raises_no_slot(page):
+    driver = ResultsDriver(page)
+
+    with pytest.raises(NoSlotAvailable):
+        booking_tennis.click_preferred_booking_button(driver)
+    assert driver.click_arguments is None
+
+
+def test_changed_page_is_not_clicked_blindly():
+    with pytest.raises(RuntimeError, match='Impossible de cliquer'):
+        booking_tennis.click_preferred_booking_button(
+            ResultsDriver({'no_result': False, 'results': RESULTS}, clicked=False))
@@ -1,16 +1,20 @@
-import React, { useCallback, useEffect, useState } from "react";
+import React, { useCallback, useEffect, useRef, useState } from "react";
 
 import { Box, Button, Typography } from "@mui/material";
 
 import {
   addAccount,
   addSlot,
+  applySlotChanges,
   deleteAccount,
   deleteSlot,
   getAccounts,
   getCarnetsReservation,
-  getSlots,
-  updateAccount
+  getSlotChanges,
+  getSlotsSnapshot,
+  subscribeToEvents,
+  updateAccount,
+  waitForJob
 } from "./api/api";
 import CustomCalendar from "./components/customCalendar/CustomCalendar";
 import Loader from "./components/loader/Loader";
@@ -20,12 +24,45 @@ import ModalCarnetComponent from "./components/modals/ModalCarnetComponent";
 import ModalDeleteComponent from "./components/modals/ModalDeleteComponent";
 import ModalErrorComponent from "./components/modals/ModalErrorComponent";
 import { useLoader } from "./contexts/loaderContext";
-import { Account, CarnetReservation, Slot } from "./types/types";
+import {
+  Account,
+  BookingEvent,
+  CarnetReservation,
+  Slot
+} from "./types/types";
+
+const bookingStepLabel = (event: BookingEvent): string => {
+  switch (event.step) {
+    case "searching":
+      return `Recherche des créneaux (tentative ${event.attempt})`;
+    case "results_found":
+      return `${event.count} créneau(x) trouvé(s)`;
+    case "logged_in":
+      return "Connecté à Paris Tennis";
+    case "slot_selected":
+      return `${event.court} choisi (${event.hour}h)`;
+    case "captcha_attempt":
+      return `Résolution du captcha (essai ${event.attempt})`;
+    case "partner_added":
+      return "Partenaire ajouté";
+    case "retry_scheduled":
+      return `Nouvelle tentative dans ${event.delay} s (${event.message})`;
+    case "paid":
+      return event.latency_ms != null
+        ? `Réservation payée (clic ${event.latency_ms} ms après l'ouverture)`
+        : "Réservation payée";
+    case "failed":
+      return event.message || "Réservation échouée";
+  }
+};
 
 const App: React.FC = () => {
   const { loading, setLoading } = useLoader();
 
   const [slots, setSlots] = useState<Slot[]>([]);
+  // Numéro du dernier changement appliqué à `slots`
+  const changeSeq = useRef<number | null>(null);
+  const [bookingStep, setBookingStep] = useState<string | undefined>();
   const [accounts, setAccounts] = useState<Account[]>([]);
 
   const [selectedSlot, setSelectedSlot] = useState<{
@@ -58,8 +95,9 @@ const App: React.FC = () => {
   const fetchSlots = useCallback(async () => {
     updateLoadingState(true); // Augmenter le compteur
     try {
-      const slots = await getSlots();
-      setSlots(slots);
+      const snapshot = await getSlotsSnapshot();
+      changeSeq.current = snapshot.changeSeq;
+      setSlots(snapshot.slots);
     } catch (err: any) {
       setErrorMessage(err?.message);
     } finally {
@@ -67,6 +105,29 @@ const App: React.FC = () => {
     }
   }, []);
 
+  // Applique seulement les changements depuis le dernier chargement, et
+  // recharge tout si le serveur ne les a plus.
+  const syncSlots = useCallback(async () => {
+    if (changeSeq.current === null) {
+      return fetchSlots();
+    }
+    updateLoadingState(true);
+    try {
+      const delta = await getSlotChanges(changeSeq.current);
+      if (delta === null) {
+        changeSeq.current = null;
+        fetchSlots();
+        return;
+      }
+      changeSeq.current = delta.latestSeq;
+      setSlots((prev) => applySlotChanges(prev, delta.changes));
+    } catch (err: any) {
+      setErrorMessage(err?.message);
+    } finally {
+      updateLoadingState(false);
+    }
+  }, [fetchSlots]);
+
   const fetchAccounts = useCallback(async () => {
     updateLoadingState(true);
     try {
@@ -97,6 +158,16 @@ const App: React.FC = () => {
     fetchCarnets();
   }, [fetchSlots, fetchAccounts, fetchCarnets]);
 
+  // Progression en direct des réservations et statuts mis à jour par le cron
+  useEffect(
+    () =>
+      subscribeToEvents({
+        onBookingStep: (event) => setBookingStep(bookingStepLabel(event)),
+        onSlotStatus: () => syncSlots()
+      }),
+    [syncSlots]
+  );
+
   useEffect(() => {
     if (activeRequests > 0) {
       setLoading(true);
@@ -134,13 +205,21 @@ const App: React.FC = () => {
       updateLoadingState(true);
       setIsModalOpen(false);
       try {
-        await addSlot(
+        const { jobId } = await addSlot(
           selectedSlot.start.toISOString().split("T")[0],
           selectedSlot.start.getHours(),
           selectedSlot.end.getHours(),
           courtType
         );
-        fetchSlots();
+        if (jobId) {
+          const job = await waitForJob(jobId);
+          if (job.status === "failed") {
+            setErrorMessage(
+              job.result?.message || "Erreur lors de la réservation"
+            );
+          }
+        }
+        syncSlots();
       } catch (err: unknown) {
         if (err instanceof Error) {
           setErrorMessage(err.message);
@@ -156,6 +235,7 @@ const App: React.FC = () => {
           setErrorMessage("Une erreur inconnue est survenue");
         }
       } finally {
+        setBookingStep(undefined);
         updateLoadingState(false);
       }
     }
@@ -167,7 +247,7 @@ const App: React.FC = () => {
       setIsDeleteModalOpen(false);
       try {
         await deleteSlot(slotToDelete.id);
-        fetchSlots();
+        syncSlots();
       } catch (err: unknown) {
         if (err instanceof Error) {
           setErrorMessage(err.message);
@@ -264,7 +344,7 @@ const App: React.FC = () => {
 
   return (
     <div>
-      {loading && <Loader />}
+      {loading && <Loader message={bookingStep} />}
       <div style={{ padding: "20px" }}>
         <Box sx={{ display: "flex", justifyContent: "center" }}>
           <Typography variant="h3">Calendrier de Réservation</Typography>
@@ -3,44 +3,189 @@ import {
   convertAccountApiToAccount,
   convertSlotApiToSlot
 } from "../mappers/mappers";
-import { AccountApi, CarnetReservation, SlotApi } from "../types/types";
+import {
+  AccountApi,
+  BookingEvent,
+  CarnetReservation,
+  Job,
+  Slot,
+  SlotApi,
+  SlotChange,
+  SlotStatusEvent
+} from "../types/types";
 
 //const API_BASE_URL = "http://192.168.1.15:5000";
 const API_BASE_URL = "http://localhost:5000";
+const EVENTS_URL = "http://localhost:5001/events";
+
+export interface SlotFilters {
+  from?: string;
+  to?: string;
+  status?: "book" | "not_book" | "waiting";
+}
+
+interface SlotsPage {
+  slots: SlotApi[];
+  nextCursor: string | null;
+  changeSeq: number | null;
+}
+
+// Dernière réponse reçue par URL, renvoyée telle quelle sur un 304 Not Modified.
+const slotPagesCache = new Map<string, SlotsPage & { etag: string }>();
+
+const getSlotsPage = async (
+  filters: SlotFilters,
+  cursor: string | null
+): Promise<SlotsPage> => {
+  const params = new URLSearchParams();
+  Object.entries(filters).forEach(([key, value]) => {
+    if (value) {
+      params.append(key, value);
+    }
+  });
+  if (cursor) {
+    params.append("cursor", cursor);
+  }
+  const url = `${API_BASE_URL}/slots?${params.toString()}`;
+  const cached = slotPagesCache.get(url);
+
+  const response = await fetch(url, {
+    method: "GET",
+    headers: {
+      "Content-Type": "application/json",
+      ...(cached ? { "If-None-Match": cached.etag } : {})
+    }
+  });
+
+  if (response.status === 304 && cached) {
+    return cached;
+  }
 
-export const getSlots = async () => {
+  if (!response.ok) {
+    throw new Error("Erreur lors de la récupération des créneaux");
+  }
+
+  const data = await response.json();
+  if (!data.isSuccess) {
+    throw new Error(
+      data.message || "Erreur inconnue lors de la récupération des créneaux"
+    );
+  }
+
+  const page = {
+    slots: data.data,
+    nextCursor: data.nextCursor ?? null,
+    changeSeq: data.changeSeq ?? null
+  };
+  const etag = response.headers.get("ETag");
+  if (etag) {
+    slotPagesCache.set(url, { etag, ...page });
+  }
+  return page;
+};
+
+// Liste complète des créneaux et numéro du dernier changement qu'elle inclut,
+// à passer ensuite à getSlotChanges.
+export const getSlotsSnapshot = async (
+  filters: SlotFilters = {}
+): Promise<{ slots: Slot[]; changeSeq: number | null }> => {
   try {
-    const response = await fetch(`${API_BASE_URL}/slots`, {
-      method: "GET",
-      headers: {
-        "Content-Type": "application/json"
+    const slots: SlotApi[] = [];
+    let cursor: string | null = null;
+    let changeSeq: number | null = null;
+
+    do {
+      const page: SlotsPage = await getSlotsPage(filters, cursor);
+      if (changeSeq === null) {
+        changeSeq = page.changeSeq;
       }
-    });
+      slots.push(...page.slots);
+      cursor = page.nextCursor;
+    } while (cursor);
 
-    if (!response.ok) {
-      throw new Error("Erreur lors de la récupération des créneaux");
-    }
+    return {
+      slots: slots.map((slot: SlotApi) => convertSlotApiToSlot(slot)),
+      changeSeq
+    };
+  } catch (error: any) {
+    console.error("Erreur API:", error);
+    throw new Error(error.message || "Une erreur inconnue est survenue");
+  }
+};
 
-    const data = await response.json();
-    if (data.isSuccess) {
-      return data.data.map((slot: SlotApi) => convertSlotApiToSlot(slot));
-    } else {
-      throw new Error(
-        data.message || "Erreur inconnue lors de la récupération des créneaux"
+export const getSlots = async (filters: SlotFilters = {}) => {
+  const { slots } = await getSlotsSnapshot(filters);
+  return slots;
+};
+
+// Changements postérieurs à `since`, ou null si le serveur les a compactés
+// (410 Gone) : il faut alors recharger la liste avec getSlotsSnapshot.
+export const getSlotChanges = async (
+  since: number
+): Promise<{ changes: SlotChange[]; latestSeq: number } | null> => {
+  try {
+    const changes: SlotChange[] = [];
+    let seq = since;
+    let hasMore = true;
+
+    while (hasMore) {
+      const response = await fetch(
+        `${API_BASE_URL}/slots/changes?since=${seq}`,
+        {
+          method: "GET",
+          headers: {
+            "Content-Type": "application/json"
+          }
+        }
       );
+
+      if (response.status === 410) {
+        return null;
+      }
+
+      const data = await response.json();
+      if (!data.isSuccess) {
+        throw new Error(
+          data.message || "Erreur lors de la récupération des changements"
+        );
+      }
+
+      changes.push(...data.data);
+      seq = changes.length ? changes[changes.length - 1].seq : data.latestSeq;
+      hasMore = data.hasMore;
     }
+
+    return { changes, latestSeq: seq };
   } catch (error: any) {
     console.error("Erreur API:", error);
     throw new Error(error.message || "Une erreur inconnue est survenue");
   }
 };
 
+export const applySlotChanges = (
+  slots: Slot[],
+  changes: SlotChange[]
+): Slot[] => {
+  const slotsById = new Map(slots.map((slot) => [slot.id, slot]));
+  changes.forEach((change) => {
+    if (change.op === "delete") {
+      slotsById.delete(change.slot.id);
+    } else {
+      slotsById.set(
+        change.slot.id,
+        convertSlotApiToSlot(change.slot as SlotApi)
+      );
+    }
+  });
+  return Array.from(slotsById.values());
+};
+
 export const addSlot = async (
   date: string,
   startTime: number,
   endTime: number,
   slotType: string
-): Promise<{ message: string; status?: string }> => {
+): Promise<{ message: string; status?: string; jobId?: string }> => {
   try {
     const response = await fetch(`${API_BASE_URL}/slots`, {
       method: "POST",
@@ -63,7 +208,8 @@ export const addSlot = async (
 
     return {
       message: data.message,
-      status: data.data?.status
+      status: data.data?.status,
+      jobId: data.data?.job_id
     };
   } catch (error: any) {
     console.error("Erreur API:", error);
@@ -71,6 +217,69 @@ export const addSlot = async (
   }
 };
 
+export const getJob = async (id: string): Promise<Job> => {
+  try {
+    const response = await fetch(`${API_BASE_URL}/jobs/${id}`, {
+      method: "GET",
+      headers: {
+        "Content-Type": "application/json"
+      }
+    });
+
+    const data = await response.json();
+
+    if (!data.isSuccess) {
+      throw new Error(
+        data.message || "Erreur lors de la récupération de la tâche"
+      );
+    }
+
+    return data.data;
+  } catch (error: any) {
+    console.error("Erreur API:", error);
+    throw new Error(error.message || "Une erreur inconnue est survenue");
+  }
+};
+
+const JOB_POLL_INTERVAL_MS = 2000;
+// Au-delà du délai maximal des reprises côté serveur (10 min) : la tâche est
+// considérée bloquée et l'attente abandonnée pour libérer l'interface.
+const JOB_TIMEOUT_MS = 15 * 60 * 1000;
+
+export const waitForJob = async (
+  id: string,
+  timeoutMs: number = JOB_TIMEOUT_MS
+): Promise<Job> => {
+  const deadline = Date.now() + timeoutMs;
+  while (true) {
+    const job = await getJob(id);
+    if (job.status === "done" || job.status === "failed") {
+      return job;
+    }
+    if (Date.now() >= deadline) {
+      throw new Error(
+        "La réservation prend trop de temps, vérifiez son état dans le calendrier"
+      );
+    }
+    await new Promise((resolve) => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
+  }
+};
+
+// Flux SSE de la progression des réservations ; retourne la fonction de désabonnement.
+export const subscribeToEvents = (handlers: {
+  onBookingStep?: (event: BookingEvent) => void;
+  onSlotStatus?: (event: SlotStatusEvent) => void;
+}): (() => void) => {
+  const source = new EventSource(EVENTS_URL);
+  source.addEventListener("booking", (event) => {
+    handlers.onBookingStep?.(JSON.parse((event as MessageEvent).data));
+  });
+  source.addEventListener("slot_status", (event) => {
+    handlers.onSlotStatus?.(JSON.parse((event as MessageEvent).data));
+  });
+  return () => source.close();
+};
+
 export const deleteSlot = async (id: string): Promise<string> => {
   try {
     const response = await fetch(`${API_BASE_URL}/slots/${id}`, {
@@ -2,11 +2,12 @@ import "./Loader.css";
 
 import React from "react";
 
-const Loader: React.FC = () => {
+const Loader: React.FC<{ message?: string }> = ({ message }) => {
   return (
     <div className="container">
       <div className="ball"></div>
       <div className="shadow"></div>
+      {message && <p className="message">{message}</p>}
     </div>
   );
 };
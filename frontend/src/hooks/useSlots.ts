@@ -1,7 +1,7 @@
 // /src/hooks/useSlots.ts
 import { useEffect, useState } from "react";
 
-import { addSlot, deleteSlot, getSlots } from "../api/api";
+import { addSlot, deleteSlot, getSlots, waitForJob } from "../api/api";
 import { Slot } from "../types/types";
 
 const useSlots = () => {
@@ -32,7 +32,13 @@ const useSlots = () => {
     slotType: string
   ) => {
     try {
-      await addSlot(date, startTime, endTime, slotType);
+      const { jobId } = await addSlot(date, startTime, endTime, slotType);
+      if (jobId) {
+        const job = await waitForJob(jobId);
+        if (job.status === "failed") {
+          setError(job.result?.message || "Erreur lors de la réservation");
+        }
+      }
       const slots = await getSlots();
       setSlots(slots);
     } catch (error) {
@@ -16,6 +16,12 @@ export interface SlotApi {
   status?: "book" | "not_book" | "waiting";
 }
 
+export interface SlotChange {
+  seq: number;
+  op: "insert" | "update" | "delete";
+  slot: SlotApi | { id: string };
+}
+
 export interface SlotCalendar {
   id: string;
   title: "indoor" | "outdoor" | "both";
@@ -46,3 +52,43 @@ export type CarnetReservation = {
   nom: string;
   nombreDeCreneaux: number;
 };
+
+export interface Job {
+  id: string;
+  status: "pending" | "running" | "done" | "failed";
+  step: string | null;
+  result: { isSuccess: boolean; message: string; status?: string } | null;
+  created_at: string;
+  updated_at: string;
+}
+
+export interface BookingEvent {
+  step:
+    | "searching"
+    | "results_found"
+    | "logged_in"
+    | "slot_selected"
+    | "captcha_attempt"
+    | "partner_added"
+    | "retry_scheduled"
+    | "paid"
+    | "failed";
+  job_id?: string;
+  date?: string;
+  start_time?: number;
+  end_time?: number;
+  attempt?: number;
+  count?: number;
+  court?: string;
+  surface?: string | null;
+  hour?: number | null;
+  failure?: string;
+  delay?: number;
+  latency_ms?: number | null;
+  message?: string;
+}
+
+export interface SlotStatusEvent {
+  slot_id: string;
+  status: "book" | "not_book" | "waiting";
+}